@@ -0,0 +1,152 @@
+"""
+게이트웨이 캐시 프로필별 메모리 벤치마크.
+
+Discord에 접속하지 않고, 합성 GUILD_CREATE / MESSAGE_CREATE 페이로드를 discord.py ConnectionState에
+직접 넣어 캐시가 차는 만큼의 RSS 증가량을 측정합니다. 프로필마다 별도 프로세스에서 실행합니다.
+
+사용법 (저장소 루트에서):
+    PYTHONPATH=src python benchmarks/cache_memory.py --guilds 1000 --messages 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "benchmark")
+
+PROFILES = ["default", "lean"]
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _snowflake(n: int) -> str:
+    return str(10**17 + n)
+
+
+def _guild_payload(guild_no: int, *, channels: int, roles: int, emojis: int, members: int) -> dict:
+    base = guild_no * 10_000
+    guild_id = _snowflake(base)
+    return {
+        "id": guild_id,
+        "name": f"guild-{guild_no}",
+        "owner_id": _snowflake(base + 1),
+        "member_count": members,
+        "channels": [
+            {"id": _snowflake(base + 100 + c), "type": 0, "name": f"ch-{c}", "position": c, "guild_id": guild_id}
+            for c in range(channels)
+        ],
+        "roles": [
+            {"id": guild_id if r == 0 else _snowflake(base + 300 + r), "name": f"role-{r}", "permissions": "0", "position": r}
+            for r in range(roles)
+        ],
+        "emojis": [
+            {"id": _snowflake(base + 500 + e), "name": f"emoji_{e}", "roles": [], "require_colons": True}
+            for e in range(emojis)
+        ],
+        "members": [
+            {
+                "user": {"id": _snowflake(base + 1000 + m), "username": f"user{m}", "discriminator": "0", "avatar": None},
+                "nick": f"nick{m}",
+                "roles": [],
+                "joined_at": "2025-01-01T00:00:00+00:00",
+                "deaf": False,
+                "mute": False,
+                "flags": 0,
+            }
+            for m in range(members)
+        ],
+        "voice_states": [],
+        "threads": [],
+        "stickers": [],
+    }
+
+
+def _message_payload(msg_no: int, guild_no: int) -> dict:
+    base = guild_no * 10_000
+    return {
+        "id": _snowflake(10**9 + msg_no),
+        "channel_id": _snowflake(base + 100),
+        "guild_id": _snowflake(base),
+        "author": {"id": _snowflake(base + 1000), "username": "user0", "discriminator": "0", "avatar": None},
+        "member": {"roles": [], "joined_at": "2025-01-01T00:00:00+00:00", "deaf": False, "mute": False, "nick": "nick0", "flags": 0},
+        "content": "!잔고확인",
+        "timestamp": "2025-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+async def run_child(args: argparse.Namespace) -> None:
+    import discord
+
+    from bot.config.gateway_config import build_client_options
+
+    # 페이로드 생성 비용이 측정에 섞이지 않도록 먼저 만든 뒤 기준 RSS를 잽니다.
+    guilds = [
+        _guild_payload(g, channels=args.channels, roles=args.roles, emojis=args.emojis, members=args.members)
+        for g in range(args.guilds)
+    ]
+    messages = [_message_payload(i, i % args.guilds) for i in range(args.messages)]
+
+    # 명령 처리(on_message) 없이 캐시만 채우도록 순수 Client를 사용합니다.
+    client = discord.Client(**build_client_options(args.profile))
+    state = client._connection
+    gc.collect()
+    before = _rss_kb()
+
+    for data in guilds:
+        state._add_guild_from_data(data)
+    for data in messages:
+        state.parse_message_create(data)
+
+    del guilds, messages
+    gc.collect()
+    after = _rss_kb()
+    delta_mb = (after - before) / 1024
+    per_1k = delta_mb * 1000 / args.guilds
+    cached_messages = len(state._messages) if state._messages is not None else 0
+    cached_members = sum(len(g._members) for g in state.guilds)
+    print(
+        f"{args.profile:<8} guilds={args.guilds} cached_members={cached_members} "
+        f"cached_messages={cached_messages} rss_delta={delta_mb:.1f}MB per_1k_guilds={per_1k:.1f}MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--roles", type=int, default=15)
+    parser.add_argument("--emojis", type=int, default=30)
+    parser.add_argument("--members", type=int, default=50, help="GUILD_CREATE에 포함되는 멤버 수 (members 인텐트 사용 시)")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--profile", choices=PROFILES)
+    args = parser.parse_args()
+
+    if args.profile:
+        asyncio.run(run_child(args))
+        return
+
+    for profile in PROFILES:
+        subprocess.run([sys.executable, __file__, *sys.argv[1:], "--profile", profile], check=True)
+
+
+if __name__ == "__main__":
+    main()
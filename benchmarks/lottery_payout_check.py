@@ -0,0 +1,57 @@
+"""
+복권 상금표 몬테카를로 검증.
+
+설정된 상금표(LOTTERY_TABLES_FILE, 없으면 기본 균등 분포)를 alias 테이블과 같은 방식으로 numpy 벡터화 추첨해
+평균/분산/최댓값을 이론값과 LOTTERY_EXPECTED_PAYOUT에 비교하고, 봇이 실제로 쓰는 1회 추첨(draw)의 처리량도 잽니다.
+검증에 실패한 상금표가 있으면 종료 코드 1을 반환합니다.
+
+사용법 (저장소 루트에서, numpy 필요: pip install '.[analytics]'):
+    PYTHONPATH=src python benchmarks/lottery_payout_check.py --draws 5000000
+    PYTHONPATH=src python benchmarks/lottery_payout_check.py --guild 123456789 --target 650
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "benchmark")
+
+
+def main() -> None:
+    from bot.config.bot_config import LOTTERY_EXPECTED_PAYOUT
+    from bot.services import lottery_tables
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--draws", type=int, default=5_000_000)
+    parser.add_argument("--guild", type=int, help="길드 상금표만 검증 (생략 시 설정된 모든 상금표)")
+    parser.add_argument("--target", type=float, default=LOTTERY_EXPECTED_PAYOUT, help="목표 기댓값")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--scalar-draws", type=int, default=200_000, help="1회 추첨 처리량 측정 횟수")
+    args = parser.parse_args()
+
+    lottery_tables.get_payout_table()
+    tables = lottery_tables._tables or {}
+    if args.guild is not None:
+        tables = {str(args.guild): lottery_tables.get_payout_table(args.guild)}
+
+    failed = False
+    for table in tables.values():
+        report = lottery_tables.verify_payout_table(
+            table, draws=args.draws, target_mean=args.target, seed=args.seed
+        )
+        print(report.summary())
+        failed = failed or not report.ok
+
+        started = time.perf_counter()
+        for _ in range(args.scalar_draws):
+            table.draw()
+        elapsed = time.perf_counter() - started
+        print(f"  draw(): {args.scalar_draws / elapsed:,.0f}회/s (구간 {len(table.tiers)}개)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
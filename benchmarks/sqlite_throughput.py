@@ -0,0 +1,115 @@
+"""
+SQLite 프로필별 처리량 벤치마크.
+
+임시 SQLite 파일에 사용자 지갑을 만든 뒤, 여러 스레드(명령 동시 처리/작업 큐 워커를 흉내)에서
+복권(달란트 차감 + 금고 입금을 한 트랜잭션으로)과 잔고 조회(읽기)를 동시에 실행해 초당 처리량과 실패(database is locked) 수를 잽니다.
+프로필마다 별도 프로세스에서 실행합니다. (db_config가 임포트 시점에 엔진을 만들기 때문)
+
+사용법 (저장소 루트에서):
+    PYTHONPATH=src python benchmarks/sqlite_throughput.py --threads 8 --ops 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "benchmark")
+
+PROFILES = ["default", "fast"]
+GUILD_ID = 1
+
+
+def _timed_run(fn, ops: int, threads: int) -> tuple[float, int]:
+    errors = 0
+
+    def one(_):
+        nonlocal errors
+        try:
+            fn()
+        except Exception:
+            errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(ops)))
+    return time.perf_counter() - started, errors
+
+
+def run_child(args: argparse.Namespace) -> None:
+    from bot.config.db_config import init_db
+    from bot.models.gm_resources import ResourceType
+    from bot.services.lottery_service import draw_lottery_payout
+    from bot.services.wallet_executor import WalletMutation
+    from bot.services.wallet_service import apply_wallet_batch, get_member_balances
+
+    init_db()
+    apply_wallet_batch(
+        mutations=[
+            WalletMutation(
+                user_id=user_id, guild_id=GUILD_ID, changes=[(ResourceType.TALENT, args.ops, "manual_deposit_command")]
+            ).to_job()
+            for user_id in range(1, args.users + 1)
+        ]
+    )
+
+    def lottery():
+        # 실행기가 워커에서 실행하는 것과 같은 작업 (배치 크기 1: 그룹 커밋 없이 한 건씩)
+        mutation = WalletMutation(
+            user_id=random.randint(1, args.users),
+            guild_id=GUILD_ID,
+            changes=[(ResourceType.TALENT, -1, "spend"), (ResourceType.VAULT, draw_lottery_payout(GUILD_ID), "lottery_payout")],
+        )
+        if not apply_wallet_batch(mutations=[mutation.to_job()])[0]["ok"]:
+            raise RuntimeError("달란트 부족")
+
+    def balance():
+        get_member_balances(user_id=random.randint(1, args.users), guild_id=GUILD_ID)
+
+    def mixed():
+        # 실제 트래픽처럼 읽기가 대부분인 혼합 부하
+        if random.random() < 0.2:
+            lottery()
+        else:
+            balance()
+
+    results = []
+    for name, fn in (("lottery", lottery), ("balance", balance), ("mixed", mixed)):
+        elapsed, errors = _timed_run(fn, args.ops, args.threads)
+        results.append(f"{name}={args.ops / elapsed:.0f}ops/s errors={errors}")
+    print(f"{args.profile:<8} threads={args.threads} " + " ".join(results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=2000, help="시나리오별 실행 횟수")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--profile", choices=PROFILES)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_child(args)
+        return
+
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                SQLITE_PROFILE=profile,
+                DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                DB_POOL_SIZE=str(args.threads),
+            )
+            env.pop("DATABASE_REPLICA_URL", None)
+            subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:], "--profile", profile], check=True, env=env
+            )
+
+
+if __name__ == "__main__":
+    main()
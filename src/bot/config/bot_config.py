@@ -11,12 +11,146 @@ if DISCORD_BOT_TOKEN is None:
 # 복권 설정
 # - 최대 상금
 LOTTERY_MAX_PAYOUT = int(os.getenv("LOTTERY_MAX_PAYOUT", "1205"))
-# - 1회당 기댓값 (정수)
+# - 1회당 기댓값 (정수). 기본 상금표 검증 기준 (bot.services.lottery_tables.verify_payout_table)
 LOTTERY_EXPECTED_PAYOUT = int(os.getenv("LOTTERY_EXPECTED_PAYOUT", "603"))
+# - 길드별 상금표 JSON 파일 경로. 비우면 1 ~ LOTTERY_MAX_PAYOUT 균등 분포
+LOTTERY_TABLES_FILE = os.getenv("LOTTERY_TABLES_FILE", "")
+# - !복권통계 내역 한 페이지의 행 수
+LOTTERY_HISTORY_PAGE_SIZE = int(os.getenv("LOTTERY_HISTORY_PAGE_SIZE", "20"))
 
 # 경마 설정
 # n초 안에 전체 완주
 HORSE_RACE_ALL_FINISH_SEC = int(os.getenv("HORSE_RACE_ALL_FINISH_SEC", "20"))
 HORSE_RACE_JOIN_REACTION = os.getenv("HORSE_RACE_JOIN_REACTION", "\U0001f3c7")  # 🏇
 HORSE_RACE_START_REACTION = os.getenv("HORSE_RACE_START_REACTION", "🏁")  # 체커드 플래그
-HORSE_RACE_TEST_REACTION = os.getenv("HORSE_RACE_TEST_REACTION", "\U0001f9ea")  # 🧪
\ No newline at end of file
+HORSE_RACE_TEST_REACTION = os.getenv("HORSE_RACE_TEST_REACTION", "\U0001f9ea")  # 🧪
+
+# 이벤트 루프 정지 감지(워치독) 설정
+# - 워치독 사용 여부 (1/0)
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "1").lower() in ("1", "true", "yes")
+# - 이 시간(ms) 이상 루프가 응답하지 않으면 정지로 판단하고 스택을 수집
+LOOP_STALL_THRESHOLD_MS = int(os.getenv("LOOP_STALL_THRESHOLD_MS", "250"))
+# - 루프 지연 측정 주기(ms)
+LOOP_WATCHDOG_INTERVAL_MS = int(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "500"))
+
+# 요청 추적(트레이싱) 설정
+# - 설정 시 스팬을 OpenTelemetry(OTLP JSON) 형태로 이 경로의 JSONL 파일에 기록합니다. 미설정 시 비활성.
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+# - 추적 데이터에 기록할 서비스 이름
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "duode-tactical-support")
+
+# 샤딩 설정
+# - AUTO_SHARD=1: AutoShardedBot으로 한 프로세스에서 여러 샤드를 운영 (샤드 수는 Discord 권장값)
+# - SHARD_COUNT + SHARD_IDS: 여러 프로세스가 샤드 범위를 나눠 맡는 경우 (예: SHARD_COUNT=8, SHARD_IDS=0-3)
+AUTO_SHARD = os.getenv("AUTO_SHARD", "0").lower() in ("1", "true", "yes")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+
+
+def _parse_shard_ids(raw: str) -> list[int] | None:
+    """'0-3' 또는 '0,2,4' 형태의 샤드 범위를 정수 목록으로 변환합니다."""
+    raw = raw.strip()
+    if not raw:
+        return None
+    ids: list[int] = []
+    for part in raw.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            ids.extend(range(int(start), int(end) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+SHARD_IDS = _parse_shard_ids(os.getenv("SHARD_IDS", ""))
+# SHARD_IDS만 있으면 샤딩 없는 봇이 만들어지고, 0번이 빠진 경우 스키마 초기화/정기 작업까지 아무도 하지 않게 됩니다.
+if SHARD_IDS is not None and SHARD_COUNT is None:
+    raise ValueError("SHARD_IDS를 지정하려면 SHARD_COUNT도 설정해야 합니다.")
+if SHARD_IDS is not None and any(shard_id < 0 or shard_id >= SHARD_COUNT for shard_id in SHARD_IDS):
+    raise ValueError(f"SHARD_IDS({SHARD_IDS})는 0 ~ SHARD_COUNT-1({SHARD_COUNT - 1}) 범위여야 합니다.")
+
+# 메트릭 보고 주기(초). 0이면 주기 보고를 끕니다.
+METRICS_REPORT_SEC = int(os.getenv("METRICS_REPORT_SEC", "300"))
+
+# 작업 큐(게이트웨이/워커 분리) 설정
+# - inline: 게이트웨이 프로세스에서 바로 실행 (기본값)
+# - process: 로컬 프로세스 풀 워커에서 실행
+# - redis: Redis 호환 브로커를 통해 별도 워커 컨테이너(python -m bot.worker)에서 실행
+WORK_QUEUE_MODE = os.getenv("WORK_QUEUE_MODE", "inline").lower()
+WORK_QUEUE_WORKERS = int(os.getenv("WORK_QUEUE_WORKERS", str(os.cpu_count() or 2)))
+WORK_QUEUE_REDIS_URL = os.getenv("WORK_QUEUE_REDIS_URL", "redis://redis:6379/0")
+WORK_QUEUE_NAME = os.getenv("WORK_QUEUE_NAME", "bot:jobs")
+WORK_QUEUE_TIMEOUT_SEC = int(os.getenv("WORK_QUEUE_TIMEOUT_SEC", "30"))
+
+# 게이트웨이 캐시 프로필
+# - default: discord.py 기본 인텐트/캐시 (메시지 캐시 1000개)
+# - lean: 필요한 인텐트만 구독하고 멤버 캐시/시작 시 청킹을 끄며 메시지 캐시를 작게 유지
+GATEWAY_CACHE_PROFILE = os.getenv("GATEWAY_CACHE_PROFILE", "default").lower()
+# - lean 프로필의 메시지 캐시 크기 (경마 준비 메시지 등 최근 메시지만 필요)
+CACHE_MAX_MESSAGES = int(os.getenv("CACHE_MAX_MESSAGES", "100"))
+# - 멤버 인텐트(특권 인텐트, 개발자 포털에서 활성화 필요). 켜면 닉네임 변경/입장/퇴장 이벤트로 닉네임 색인을 갱신합니다.
+MEMBERS_INTENT = os.getenv("MEMBERS_INTENT", "0").lower() in ("1", "true", "yes")
+
+# 닉네임 색인 (길드별 서버닉네임 → 사용자)
+# - 멤버 이벤트로 바뀐 닉네임을 DB에 모아서 기록하는 주기(초)
+NICKNAME_FLUSH_INTERVAL_SEC = float(os.getenv("NICKNAME_FLUSH_INTERVAL_SEC", "5"))
+# - 이 수만큼 쌓이면 주기를 기다리지 않고 바로 기록
+NICKNAME_FLUSH_MAX = int(os.getenv("NICKNAME_FLUSH_MAX", "500"))
+
+# 명령 호출 속도 제한 (토큰 버킷)
+# - 형식: "그룹=용량/기간초" 를 쉼표로 나열. 기간 동안 용량만큼 허용하고 토큰은 균등하게 다시 찹니다.
+# - 그룹: lottery(복권), wallet(입금/출금/달란트지급), read(잔고확인/복권통계), race(경마), export(내역 내보내기), default(그 외)
+#   명령별 그룹은 각 Cog의 throttle_group 속성 또는 명령의 extras={"throttle_group": ...}로 지정합니다.
+THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", "1").lower() in ("1", "true", "yes")
+
+
+def _parse_rate_limits(raw: str) -> dict[str, tuple[int, float]]:
+    """'lottery=5/10,default=10/10' 형태를 {그룹: (용량, 기간초)}로 변환합니다."""
+    limits: dict[str, tuple[int, float]] = {}
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        group, spec = part.split("=", 1)
+        capacity, period = spec.split("/", 1)
+        limits[group.strip()] = (int(capacity), float(period))
+    return limits
+
+
+# - 사용자별 (길드, 사용자, 그룹) 한도
+THROTTLE_USER_LIMITS = _parse_rate_limits(
+    os.getenv("THROTTLE_USER_LIMITS", "lottery=5/10,wallet=5/10,read=10/10,race=5/10,export=1/60,default=10/10")
+)
+# - 길드별 (길드, 그룹) 한도: 여러 계정을 동원한 매크로로부터 풀을 보호
+THROTTLE_GUILD_LIMITS = _parse_rate_limits(
+    os.getenv("THROTTLE_GUILD_LIMITS", "lottery=60/10,wallet=60/10,export=3/60,default=120/10")
+)
+
+# 지갑 변경 그룹 커밋
+# - 이 시간(ms) 안에 들어온 서로 다른 지갑의 변경을 한 트랜잭션으로 묶어 커밋합니다. 0이면 즉시 커밋.
+WALLET_BATCH_WINDOW_MS = int(os.getenv("WALLET_BATCH_WINDOW_MS", "5"))
+# - 한 번에 묶을 최대 변경 수
+WALLET_BATCH_MAX = int(os.getenv("WALLET_BATCH_MAX", "64"))
+
+# 금고 순위(!금고순위)
+# - 표시할 상위 인원 수
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "10"))
+# - 상위 목록 캐시 유지 시간(초). 그 사이에도 상위권 경계를 넘는 지갑 변경이 있으면 다시 조회합니다.
+LEADERBOARD_CACHE_SEC = int(os.getenv("LEADERBOARD_CACHE_SEC", "60"))
+
+# 거래 내역(gm_resource_log) 보존 정책
+# - 이 기간(일)보다 오래된 내역은 월별 합계로 요약하고 압축 아카이브 파일로 옮긴 뒤 삭제합니다. 0이면 끕니다.
+LEDGER_RETENTION_DAYS = int(os.getenv("LEDGER_RETENTION_DAYS", "0"))
+# - 아카이브(gzip CSV) 저장 경로
+LEDGER_ARCHIVE_DIR = os.getenv("LEDGER_ARCHIVE_DIR", "./archive")
+# - 한 트랜잭션에서 옮길 행 수 (잠금 시간을 짧게 유지)
+LEDGER_RETENTION_CHUNK = int(os.getenv("LEDGER_RETENTION_CHUNK", "1000"))
+# - 자동 정리 주기(시간). 0이면 관리자 명령(!장부정리)으로만 실행합니다.
+LEDGER_RETENTION_INTERVAL_HOURS = int(os.getenv("LEDGER_RETENTION_INTERVAL_HOURS", "24"))
+
+# 지갑-거래내역 대사
+# - 자동 증분 대사 주기(시간). 0이면 관리자 명령(!장부대사)으로만 실행합니다.
+LEDGER_RECONCILE_INTERVAL_HOURS = int(os.getenv("LEDGER_RECONCILE_INTERVAL_HOURS", "24"))
+# - 서버 측 커서에서 한 번에 가져올 행 수
+LEDGER_RECONCILE_CHUNK = int(os.getenv("LEDGER_RECONCILE_CHUNK", "1000"))
+# - 워터마크를 이 시간(초)보다 오래된 로그까지만 올립니다. (늦게 커밋된 트랜잭션의 작은 id를 건너뛰지 않도록, 가장 긴 쓰기 트랜잭션보다 길게)
+LEDGER_RECONCILE_SAFETY_SEC = int(os.getenv("LEDGER_RECONCILE_SAFETY_SEC", "300"))
@@ -1,10 +1,17 @@
 from dotenv import load_dotenv
+import functools
+import inspect
 import os
-from typing import Iterator
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
 
+from sqlalchemy import inspect as inspect_db
+from sqlalchemy.exc import DBAPIError
 from sqlmodel import SQLModel, Session, create_engine
 
 from bot.config import log_config
+from bot.config.db_instrumentation import MeteredQueuePool, db_metrics, install_slow_query_log
+from bot.config.replica_routing import RecentWriteTracker, ReplicaLagMonitor
+from bot.config.sqlite_profile import READ_ONLY_OPTION, install_sqlite_profile
 
 
 load_dotenv()
@@ -13,18 +20,102 @@ load_dotenv()
 # 예시: mysql+pymysql://user:password@db:3306/database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bot_database.db")
 
+# 느린 쿼리 로그 (옵트인): 설정 시 이 시간(ms) 이상 걸린 쿼리를 기록하고 EXPLAIN을 수집합니다.
+DB_SLOW_QUERY_MS = os.getenv("DB_SLOW_QUERY_MS")
+# 같은 형태의 쿼리에 대해 EXPLAIN을 다시 수집하기까지의 간격(초)
+DB_EXPLAIN_INTERVAL_SEC = int(os.getenv("DB_EXPLAIN_INTERVAL_SEC", "600"))
+
+# 커넥션 풀 설정
+# - 명령 1회에 세션을 여러 개 열기 때문에 기본값은 SQLAlchemy 기본(5/10)보다 여유 있게 둡니다.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# - 풀이 가득 찼을 때 연결을 기다리는 최대 시간(초)
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# - 오래된 연결 재활용 시간(초). MySQL wait_timeout보다 짧게 유지합니다.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+# - 체크아웃마다 SELECT 1 확인 여부. 기본은 끄고, 끊긴 연결은 retry_on_disconnect로 1회 재시도합니다.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0").lower() in ("1", "true", "yes")
+
+# 읽기 복제본 (옵트인): 설정 시 읽기 전용 조회를 복제본으로 보냅니다.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# 이 값(초)보다 복제 지연이 크면 주 DB에서 읽습니다.
+REPLICA_MAX_LAG_SEC = float(os.getenv("REPLICA_MAX_LAG_SEC", "2"))
+# 복제 지연 재확인 간격(초)
+REPLICA_LAG_CHECK_SEC = float(os.getenv("REPLICA_LAG_CHECK_SEC", "5"))
+# 쓰기 직후 같은 사용자의 읽기를 주 DB로 고정하는 시간(초)
+REPLICA_READ_YOUR_WRITES_SEC = float(os.getenv("REPLICA_READ_YOUR_WRITES_SEC", "10"))
+# 복제 설정이 없는 서버(복제본 URL이 주 DB와 같은 서버를 가리키는 개발 구성)를 지연 없음으로 볼지 여부 (옵트인)
+# 끄면 복제 상태가 없는 서버는 지연을 알 수 없는 것으로 보고 주 DB에서 읽습니다.
+REPLICA_ASSUME_SAME_SERVER = os.getenv("REPLICA_ASSUME_SAME_SERVER", "0").lower() in ("1", "true", "yes")
+
+# SQLite 프로필: fast(기본, WAL + BEGIN IMMEDIATE) 또는 default(SQLite/pysqlite 기본 동작)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "fast").lower()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
 
 logger = log_config.setup_logger()
 
+
+
+def _pool_options(url: str) -> Dict[str, Any]:
+    """URL에 맞는 풀 옵션. 메모리 SQLite는 단일 연결 풀을 쓰므로 크기 옵션을 넘기지 않습니다."""
+    options: Dict[str, Any] = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite:/")):
+        return options
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def _build_engine(url: str, *, name: str):
+    """
+    엔진 생성과 프로필/느린 쿼리 로그 설치를 한곳에서 수행합니다. (주 DB/복제본 공통)
+    SQL 스팬과 풀 게이지는 services 계층이 시작 시 이벤트로 붙입니다. (bot.services.db_telemetry)
+    """
+    built = create_engine(url, echo=False, **_pool_options(url))
+    built.pool.metrics_name = name
+    if built.dialect.name == "sqlite" and SQLITE_PROFILE == "fast":
+        install_sqlite_profile(
+            built,
+            mmap_size=SQLITE_MMAP_SIZE,
+            cache_size_kb=SQLITE_CACHE_SIZE_KB,
+            busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS,
+        )
+    if DB_SLOW_QUERY_MS:
+        install_slow_query_log(
+            built,
+            threshold_ms=int(DB_SLOW_QUERY_MS),
+            explain_interval_sec=DB_EXPLAIN_INTERVAL_SEC,
+        )
+    return built
+
+
 # SQLAlchemy Engine 생성
-# - pool_pre_ping: MySQL의 'server has gone away' 방지를 위한 연결 확인
-# - pool_recycle: 오래된 연결 재활용 시간(초)
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
+engine = _build_engine(DATABASE_URL, name="primary")
+# 주 DB에서 읽기 전용 세션에 사용하는 엔진 (같은 풀 공유, SQLite fast 프로필에서는 쓰기 잠금 없이 BEGIN)
+_primary_read_engine = engine.execution_options(**{READ_ONLY_OPTION: True})
+
+# 읽기 복제본 엔진 (미설정 시 None)
+replica_engine = _build_engine(DATABASE_REPLICA_URL, name="replica") if DATABASE_REPLICA_URL else None
+_replica_lag: Optional[ReplicaLagMonitor] = None
+_recent_writes = RecentWriteTracker(REPLICA_READ_YOUR_WRITES_SEC)
+
+if replica_engine is not None:
+    _replica_lag = ReplicaLagMonitor(
+        replica_engine,
+        max_lag_sec=REPLICA_MAX_LAG_SEC,
+        check_interval_sec=REPLICA_LAG_CHECK_SEC,
+        assume_same_server=REPLICA_ASSUME_SAME_SERVER,
+    )
 
 
 def get_engine():
@@ -32,6 +123,66 @@ def get_engine():
     return engine
 
 
+def get_read_engine():
+    """주 DB의 읽기 전용 엔진을 반환합니다. (대사/내보내기처럼 복제본이 아닌 주 DB를 길게 읽는 작업용)"""
+    return _primary_read_engine
+
+
+def retry_on_disconnect(fn=None, *, when: Optional[Callable[..., bool]] = None):
+    """
+    낙관적 연결 끊김 처리: 끊긴 연결(server has gone away 등)로 실패하면 1회만 재시도합니다.
+    끊김이 감지되면 SQLAlchemy가 풀 전체를 무효화하므로 재시도는 새 연결을 사용합니다.
+    세션을 스스로 열고 닫는 함수(서비스/작업 단위)에만 적용하세요.
+
+    커밋 직후 연결이 끊기면 서버에는 반영되었는데 호출 측은 실패로 볼 수 있으므로, 함수 전체를 다시 실행해도 되는
+    단위에만 씁니다.
+    - 그대로(@retry_on_disconnect): 읽기 전용이거나 결과가 같은 upsert/삭제처럼 다시 실행해도 같은 상태가 되는 함수
+    - when 지정(@retry_on_disconnect(when=...)): 쓰기 함수. 호출 인자로 when(*args, **kwargs)가 참일 때만 재시도
+      (예: 멱등 키가 있어 중복 반영이 막히는 경우). 거짓이면 끊김 오류를 그대로 올립니다.
+    """
+    if fn is None:
+        return functools.partial(retry_on_disconnect, when=when)
+
+    def should_retry(exc: DBAPIError, args, kwargs) -> bool:
+        if not exc.connection_invalidated:
+            return False
+        if when is not None and not when(*args, **kwargs):
+            db_metrics.incr("db_disconnect_not_retried", function=fn.__name__)
+            logger.warning(f"DB 연결 끊김 감지, 멱등이 보장되지 않아 재시도하지 않음: {fn.__qualname__}: {exc.orig}")
+            return False
+        _log_disconnect_retry(fn, exc)
+        return True
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except DBAPIError as exc:
+                if not should_retry(exc, args, kwargs):
+                    raise
+                return await fn(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except DBAPIError as exc:
+            if not should_retry(exc, args, kwargs):
+                raise
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _log_disconnect_retry(fn, exc: DBAPIError) -> None:
+    db_metrics.incr("db_disconnect_retries", function=fn.__name__)
+    logger.warning(f"DB 연결 끊김 감지, 1회 재시도: {fn.__qualname__}: {exc.orig}")
+
+
 def init_db() -> None:
     """
     모델 메타데이터를 기반으로 테이블을 생성합니다.
@@ -39,15 +190,55 @@ def init_db() -> None:
     """
     try:
         # 순환 의존성을 피하기 위해 함수 내부에서 임포트합니다.
-        from bot.models import members, gm_resources, horse_race  # noqa: F401
+        from bot.models import members, gm_resources, horse_race, reconciliation  # noqa: F401
 
         SQLModel.metadata.create_all(engine)
+        _add_missing_columns()
+        _create_missing_indexes()
         logger.info("데이터베이스 초기화(SQLModel.metadata.create_all) 완료")
     except Exception as exc:
         logger.error(f"DB 초기화 중 오류: {exc}")
         raise
 
 
+def _add_missing_columns() -> None:
+    """
+    create_all은 이미 있는 테이블에 새 컬럼을 추가하지 않으므로, 모델에 추가된 nullable 컬럼을 ALTER TABLE로 보충합니다.
+    NOT NULL 컬럼은 기본값 채우기가 필요하므로 자동으로 추가하지 않고 경고만 남깁니다.
+    """
+    inspector = inspect_db(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                logger.warning(f"NOT NULL 컬럼은 자동으로 추가하지 않습니다: {table.name}.{column.name}")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            logger.info(f"컬럼 추가: {table.name}.{column.name} {column_type}")
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                )
+
+
+def _create_missing_indexes() -> None:
+    """
+    create_all은 이미 있는 테이블에 새로 선언된 인덱스를 만들지 않으므로, 모델에 추가된 인덱스를 보충합니다.
+    (대용량 테이블에서는 인덱스 생성에 시간이 걸릴 수 있으므로 시작 로그로 남깁니다)
+    """
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            with engine.begin() as connection:
+                if not inspect_db(connection).has_index(table.name, index.name):
+                    logger.info(f"인덱스 생성: {table.name}.{index.name}")
+                    index.create(connection)
+
+
 def ping_db() -> bool:
     """DB 연결 확인용 간단한 핑. 연결 가능하면 True."""
     try:
@@ -70,6 +261,61 @@ def create_session() -> Session:
     return Session(engine)
 
 
+def mark_recent_write(*, guild_id: int, user_id: int) -> None:
+    """이 사용자의 데이터가 방금 바뀌었음을 기록합니다. 잠시 동안 읽기도 주 DB에서 수행합니다."""
+    _recent_writes.mark(guild_id=guild_id, user_id=user_id)
+
+
+def _read_target(guild_id: Optional[int], user_id: Optional[int]) -> str:
+    if replica_engine is None or _replica_lag is None:
+        return "primary"
+    if _recent_writes.is_pinned(guild_id=guild_id, user_id=user_id):
+        return "primary_recent_write"
+    if not _replica_lag.is_fresh():
+        return "primary_replica_lag"
+    return "replica"
+
+
+def create_read_session(*, guild_id: Optional[int] = None, user_id: Optional[int] = None) -> Session:
+    """
+    읽기 전용 조회용 세션을 반환합니다.
+    복제본이 설정되어 있고, 복제 지연이 허용 범위 안이며, 해당 사용자의 최근 쓰기가 없으면 복제본을 사용합니다.
+    그 외에는 주 DB 세션을 반환하므로 호출 측은 구분 없이 사용할 수 있습니다.
+    이 세션에서는 쓰기(add/commit)를 하지 마세요.
+    """
+    target = _read_target(guild_id, user_id)
+    db_metrics.incr("db_read_sessions", target=target)
+    if target == "replica":
+        return Session(replica_engine)
+    return Session(_primary_read_engine)
+
+
+def is_replica_session(session: Session) -> bool:
+    return replica_engine is not None and session.get_bind() is replica_engine
+
+
+_T = TypeVar("_T")
+
+
+def read_with_primary_fallback(
+    query: Callable[[Session], Optional[_T]],
+    *,
+    guild_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Optional[_T]:
+    """
+    방금 만들어졌을 수 있는 행을 찾는 조회용.
+    복제본에서 찾지 못하면(아직 복제되지 않았을 수 있음) 주 DB에서 한 번 더 조회합니다.
+    """
+    with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+        result = query(session)
+        if result is not None or not is_replica_session(session):
+            return result
+    db_metrics.incr("db_replica_miss_fallbacks")
+    with create_session() as session:
+        return query(session)
+
+
 def get_session() -> Iterator[Session]:
     """
     FastAPI 등 DI 스타일에서 사용할 수 있는 제너레이터 형태의 세션 제공자.
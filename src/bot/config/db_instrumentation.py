@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as SATimeoutError
+from sqlalchemy.pool import QueuePool
+
+from bot.config import log_config
+
+
+logger = log_config.setup_logger()
+
+
+class DbMetricsHook:
+    """
+    config 계층(풀, 재시도, 복제본 라우팅)이 남기는 DB 메트릭의 전달 지점.
+    config는 services에 의존하지 않으므로 실제 저장소는 시작 시 bot.services.db_telemetry가 connect()로 연결합니다.
+    연결 전(단독 스크립트 등)에는 기록하지 않습니다.
+    """
+
+    def __init__(self):
+        self._sink: Any = None
+
+    def connect(self, sink: Any) -> None:
+        """incr/observe/set_gauge를 가진 메트릭 저장소(bot.services.metrics)를 연결합니다."""
+        self._sink = sink
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        if self._sink is not None:
+            self._sink.incr(name, value, **labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if self._sink is not None:
+            self._sink.observe(name, value, **labels)
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        if self._sink is not None:
+            self._sink.set_gauge(name, value, **labels)
+
+
+db_metrics = DbMetricsHook()
+
+
+# SQL 정규화용 패턴: 리터럴/플레이스홀더/IN 목록을 '?'로 치환하여 같은 형태의 쿼리를 묶습니다.
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.)*'")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+
+def normalize_sql(statement: str) -> str:
+    """바인딩 값과 무관하게 같은 '형태'의 SQL이 같은 문자열이 되도록 정규화합니다."""
+    sql = _WHITESPACE_RE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return sql
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """바인딩 파라미터의 값 대신 타입 구조만 표시합니다. (개인정보/잔액 노출 방지)"""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} rows x {parameter_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+def find_calling_function() -> str:
+    """
+    현재 스택에서 쿼리를 유발한 함수를 찾습니다.
+    bot.databases(리포지토리) 함수를 우선하고, 없으면 가장 가까운 bot 패키지 함수를 반환합니다.
+    """
+    frame = sys._getframe(1)
+    fallback: Optional[str] = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("bot.databases."):
+            return f"{module}.{frame.f_code.co_name}"
+        if fallback is None and module.startswith("bot.") and not module.startswith("bot.config."):
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or "(unknown)"
+
+
+class SlowQueryLogger:
+    """
+    엔진의 cursor 실행 이벤트에 붙어 느린 쿼리를 기록합니다.
+    - threshold_ms 이상 걸린 쿼리: 정규화 SQL, 파라미터 형태, 소요시간, 호출 리포지토리 함수 기록
+    - 같은 형태의 쿼리는 explain_interval_sec 마다 1회 EXPLAIN 결과를 함께 기록
+    """
+
+    def __init__(self, *, threshold_ms: int, explain_interval_sec: int):
+        self.threshold_sec = threshold_ms / 1000
+        self.explain_interval_sec = explain_interval_sec
+        self._last_explained: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        logger.info(
+            f"느린 쿼리 로그 활성화 (임계값 {self.threshold_sec * 1000:.0f}ms, "
+            f"EXPLAIN 주기 {self.explain_interval_sec}s)"
+        )
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        # 실패한 실행은 after 이벤트가 오지 않으므로 남은 시작 시각을 정리
+        starts.clear()
+        if elapsed < self.threshold_sec:
+            return
+
+        normalized = normalize_sql(statement)
+        logger.warning(
+            f"느린 쿼리 {elapsed * 1000:.1f}ms | 호출={find_calling_function()} | "
+            f"파라미터={parameter_shape(parameters, executemany)} | SQL={normalized}"
+        )
+
+        if executemany or not _EXPLAINABLE_RE.match(statement):
+            return
+        # 스트리밍 조회(stream_results/yield_per)는 서버 측 커서의 결과가 아직 남아 있어,
+        # 같은 연결에서 EXPLAIN을 실행하면 pymysql이 남은 행을 버리고 스트림이 오류 없이 끝나 버립니다.
+        if _is_streaming(context):
+            return
+        if not self._should_explain(normalized):
+            return
+        plan = self._explain(conn, statement, parameters)
+        if plan:
+            logger.warning(f"EXPLAIN ({normalized}):\n{plan}")
+
+    def _should_explain(self, normalized: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(normalized)
+            if last is not None and now - last < self.explain_interval_sec:
+                return False
+            self._last_explained[normalized] = now
+            return True
+
+    def _explain(self, conn, statement: str, parameters: Any) -> Optional[str]:
+        """
+        같은 DBAPI 연결에서 EXPLAIN을 실행합니다.
+        SQLAlchemy 실행 경로를 거치지 않으므로 이벤트가 재귀 호출되지 않습니다.
+        """
+        dialect = conn.dialect.name
+        if dialect == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        elif dialect in ("mysql", "mariadb"):
+            prefix = "EXPLAIN "
+        else:
+            return None
+
+        try:
+            raw_cursor = conn.connection.cursor()
+            try:
+                raw_cursor.execute(prefix + statement, parameters)
+                columns = [d[0] for d in raw_cursor.description or []]
+                rows = raw_cursor.fetchall()
+            finally:
+                raw_cursor.close()
+        except Exception as exc:
+            logger.warning(f"EXPLAIN 실행 실패: {exc}")
+            return None
+
+        lines = [" | ".join(columns)]
+        lines.extend(" | ".join(str(v) for v in row) for row in rows)
+        return "\n".join(lines)
+
+
+def _is_streaming(context) -> bool:
+    if context is None:
+        return False
+    options = context.execution_options
+    return bool(options.get("stream_results") or options.get("yield_per"))
+
+
+def install_slow_query_log(engine: Engine, *, threshold_ms: int, explain_interval_sec: int) -> SlowQueryLogger:
+    slow_query_logger = SlowQueryLogger(threshold_ms=threshold_ms, explain_interval_sec=explain_interval_sec)
+    slow_query_logger.install(engine)
+    return slow_query_logger
+
+
+class MeteredQueuePool(QueuePool):
+    """체크아웃 대기 시간과 풀 고갈(타임아웃)을 메트릭으로 남기는 QueuePool."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except SATimeoutError:
+            db_metrics.incr("db_pool_timeouts", pool=self._metrics_name)
+            raise
+        finally:
+            db_metrics.observe(
+                "db_pool_checkout_wait_ms", (time.perf_counter() - started) * 1000, pool=self._metrics_name
+            )
+
+    def recreate(self):
+        # engine.dispose()/연결 무효화 시 새 풀에도 이름을 이어 붙입니다. (이벤트 리스너는 SQLAlchemy가 복사)
+        pool = super().recreate()
+        pool.metrics_name = self._metrics_name
+        return pool
+
+    @property
+    def _metrics_name(self) -> str:
+        return getattr(self, "metrics_name", "default")
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import discord
+
+from bot.config.bot_config import CACHE_MAX_MESSAGES, MEMBERS_INTENT
+
+
+def build_intents(profile: str) -> discord.Intents:
+    """
+    캐시 프로필에 맞는 게이트웨이 인텐트를 만듭니다.
+    lean 프로필은 봇이 실제로 쓰는 이벤트(길드, 길드 메시지/본문, 리액션)만 구독하여
+    이모지/스티커/음성 상태/예약 이벤트 등 사용하지 않는 캐시가 만들어지지 않도록 합니다.
+    멤버 인텐트는 프로필과 관계없이 MEMBERS_INTENT 설정을 따릅니다.
+    """
+    if profile == "lean":
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.guild_reactions = True
+    else:
+        intents = discord.Intents.default()
+        intents.reactions = True
+    intents.message_content = True
+    # 닉네임 색인을 멤버 이벤트(on_member_update/join/remove)로 갱신하려면 멤버 인텐트가 필요합니다.
+    intents.members = MEMBERS_INTENT
+    return intents
+
+
+def build_client_options(profile: str) -> Dict[str, Any]:
+    """
+    캐시 프로필에 맞는 commands.Bot 생성 옵션을 반환합니다.
+    lean 프로필에서는 멤버를 캐시하지 않으므로 표시 이름이 필요한 곳은
+    bot.services.member_lookup.resolve_display_names로 DB에 없는 멤버만 필요할 때 조회합니다.
+    """
+    intents = build_intents(profile)
+    options: Dict[str, Any] = {"intents": intents}
+    if profile == "lean":
+        options.update(
+            # 멤버 인텐트가 켜져 있으면 입장/변경 이벤트로 들어온 멤버만 캐시합니다. (청킹은 하지 않음)
+            # discord.py는 캐시에 없는 멤버의 on_member_update를 보내지 않으므로 닉네임 색인 갱신에 필요합니다.
+            member_cache_flags=(
+                discord.MemberCacheFlags.from_intents(intents) if MEMBERS_INTENT else discord.MemberCacheFlags.none()
+            ),
+            max_messages=CACHE_MAX_MESSAGES,
+            chunk_guilds_at_startup=False,
+        )
+    return options
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+
+from bot.config import log_config
+from bot.config.db_instrumentation import db_metrics
+
+
+logger = log_config.setup_logger()
+
+
+class ReplicaLagMonitor:
+    """
+    읽기 복제본의 복제 지연(초)을 백그라운드 스레드에서 check_interval_sec마다 확인합니다.
+    is_fresh()는 마지막 측정값만 읽으므로 이벤트 루프에서 읽기 세션을 만들어도 복제본 왕복이나 잠금 대기로 막히지 않습니다.
+    측정 스레드는 처음 is_fresh()가 불릴 때 시작하고, 첫 측정 전이나 측정이 오래 멈춰 있으면 지연을 알 수 없는 것으로 봅니다.
+    지연을 알 수 없으면(복제 중단, 복제 미설정, 권한 부족, 연결 실패) 복제본을 사용하지 않습니다.
+    assume_same_server가 켜져 있으면 복제 설정이 없는 서버를 주 DB와 같은 서버로 보고 지연 없음으로 간주합니다. (개발용)
+    """
+
+    # 마지막 측정이 확인 간격의 이 배수보다 오래되면 측정값을 믿지 않습니다.
+    STALE_FACTOR = 3
+
+    def __init__(
+        self, engine: Engine, *, max_lag_sec: float, check_interval_sec: float, assume_same_server: bool = False
+    ):
+        self._engine = engine
+        self._max_lag_sec = max_lag_sec
+        self._check_interval_sec = check_interval_sec
+        self._assume_same_server = assume_same_server
+        self._warned_no_replication = False
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # (지연 초, 측정 시각) - 튜플 하나로 바꿔 넣으므로 읽는 쪽에 잠금이 필요 없습니다.
+        self._last: Tuple[Optional[float], float] = (None, 0.0)
+
+    @property
+    def lag_sec(self) -> Optional[float]:
+        return self._last[0]
+
+    def is_fresh(self) -> bool:
+        """복제 지연이 허용 범위 안이면 True. (측정하지 않고 마지막 값만 확인)"""
+        self._ensure_started()
+        lag, checked_at = self._last
+        if lag is None or time.monotonic() - checked_at > self._check_interval_sec * self.STALE_FACTOR:
+            return False
+        return lag <= self._max_lag_sec
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="replica-lag-monitor", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        # 데몬 스레드이므로 프로세스가 끝나면 함께 종료됩니다.
+        while True:
+            self._last = (self._measure(), time.monotonic())
+            time.sleep(self._check_interval_sec)
+
+    def _measure(self) -> Optional[float]:
+        try:
+            with self._engine.connect() as connection:
+                if self._engine.dialect.name != "mysql":
+                    # SQLite 등 복제 상태를 노출하지 않는 DB는 지연 없음으로 간주합니다. (로컬 개발용)
+                    lag: Optional[float] = 0.0
+                else:
+                    lag = self._mysql_lag(connection)
+        except Exception as exc:
+            logger.warning(f"복제본 지연 확인 실패, 주 DB로 읽습니다: {exc}")
+            lag = None
+
+        if lag is None:
+            db_metrics.incr("db_replica_lag_unknown")
+        else:
+            db_metrics.set_gauge("db_replica_lag_sec", lag)
+        return lag
+
+    def _mysql_lag(self, connection) -> Optional[float]:
+        # MySQL 8.0.22+는 SHOW REPLICA STATUS, 이전 버전/MariaDB는 SHOW SLAVE STATUS
+        for statement, column in (
+            ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+            ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+        ):
+            try:
+                row = connection.exec_driver_sql(statement).mappings().first()
+            except Exception:
+                continue
+            if row is None:
+                # 복제 설정이 없는 서버: 복제본이 아니거나 복제가 해제된 상태일 수 있으므로
+                # 같은 서버를 가리키는 구성이라고 명시한 경우에만 지연 없음으로 봅니다.
+                if self._assume_same_server:
+                    return 0.0
+                if not self._warned_no_replication:
+                    self._warned_no_replication = True
+                    logger.warning(
+                        "복제본에 복제 상태가 없어 지연을 알 수 없습니다, 주 DB로 읽습니다 (같은 서버 구성이면 REPLICA_ASSUME_SAME_SERVER=1)"
+                    )
+                return None
+            value = row.get(column)
+            # NULL이면 복제 스레드가 멈춘 상태
+            return None if value is None else float(value)
+        return None
+
+
+class RecentWriteTracker:
+    """
+    최근에 쓰기가 있었던 (guild_id, user_id)를 기억해 잠시 동안 주 DB에서 읽도록 고정합니다.
+    (입금 직후 잔고 확인처럼 자신의 쓰기를 바로 읽어야 하는 흐름 보호)
+    프로세스 로컬 상태이므로 작업 큐로 실행한 쓰기는 submit_job에서 함께 표시합니다.
+    """
+
+    def __init__(self, window_sec: float):
+        self._window_sec = window_sec
+        self._lock = threading.Lock()
+        self._until: Dict[Tuple[int, int], float] = {}
+
+    def mark(self, *, guild_id: int, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[(guild_id, user_id)] = now + self._window_sec
+            # 만료 항목 정리 (쓰기 시점에만 수행하므로 비용은 쓰기 횟수에 비례)
+            if len(self._until) > 1024:
+                for key in [k for k, until in self._until.items() if until <= now]:
+                    del self._until[key]
+
+    def is_pinned(self, *, guild_id: Optional[int], user_id: Optional[int]) -> bool:
+        if guild_id is None or user_id is None:
+            return False
+        with self._lock:
+            until = self._until.get((guild_id, user_id))
+        return until is not None and until > time.monotonic()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from bot.config import log_config
+
+
+logger = log_config.setup_logger()
+
+
+# 읽기 전용 세션용 엔진에 붙이는 실행 옵션. 이 옵션이 있으면 쓰기 잠금 없이(DEFERRED) 트랜잭션을 시작합니다.
+READ_ONLY_OPTION = "sqlite_read_only"
+
+
+def install_sqlite_profile(engine: Engine, *, mmap_size: int, cache_size_kb: int, busy_timeout_ms: int) -> None:
+    """
+    단일 호스트 배포용 SQLite 성능 프로필을 엔진에 적용합니다.
+    - WAL 저널: 읽기와 쓰기가 서로를 막지 않음
+    - synchronous=NORMAL: 커밋마다 fsync하지 않고 체크포인트 시점에만 동기화 (WAL에서는 DB 손상 위험 없음)
+    - mmap_size / cache_size: 페이지 읽기를 메모리에서 처리
+    - busy_timeout: 잠금 대기 중 즉시 'database is locked'로 실패하지 않음
+    - 쓰기 트랜잭션은 BEGIN IMMEDIATE로 시작해 읽기 후 쓰기로 승격할 때의 교착(SQLITE_BUSY)을 피함
+    """
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # pysqlite의 자체 BEGIN 처리를 끄고 아래 begin 이벤트에서 직접 BEGIN을 보냅니다.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            # 음수는 KiB 단위
+            cursor.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        if conn.get_execution_options().get(READ_ONLY_OPTION):
+            conn.exec_driver_sql("BEGIN")
+        else:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    logger.info("SQLite 성능 프로필 적용 (WAL, synchronous=NORMAL, BEGIN IMMEDIATE)")
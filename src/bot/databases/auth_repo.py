@@ -1,11 +1,15 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel import Session
 
 from bot.models.members import User, Guild, GuildMember, RoleLevel
+from bot.services.tracing import traced
 
 
+@traced()
 def ensure_guild_member(
     session: Session,
     *,
@@ -18,7 +22,33 @@ def ensure_guild_member(
     """
     주어진 Discord 사용자/길드 정보를 기준으로 DB에 User, Guild, GuildMember를 보장합니다.
     존재하지 않으면 생성하고, 이름이 변경되었으면 갱신합니다.
+
+    User는 길드와 무관한 전역 행이므로, 서로 다른 샤드(프로세스)가 같은 사용자를 동시에
+    처음 생성하면 PK 충돌이 날 수 있습니다. 이 경우 롤백 후 1회 재시도합니다.
     """
+    kwargs = dict(
+        user_id=user_id,
+        user_name=user_name,
+        guild_id=guild_id,
+        guild_name=guild_name,
+        server_nickname=server_nickname,
+    )
+    try:
+        return _ensure_guild_member_once(session, **kwargs)
+    except IntegrityError:
+        session.rollback()
+        return _ensure_guild_member_once(session, **kwargs)
+
+
+def _ensure_guild_member_once(
+    session: Session,
+    *,
+    user_id: int,
+    user_name: str,
+    guild_id: int,
+    guild_name: str,
+    server_nickname: str | None,
+) -> GuildMember:
     # User 확보 및 이름 갱신
     user: Optional[User] = session.get(User, user_id)
     if user is None:
@@ -63,6 +93,7 @@ def ensure_guild_member(
 
 
 
+@traced()
 def find_guild_member_by_nickname(
     session: Session, *, guild_id: int, server_nickname: str
 ):
@@ -73,3 +104,71 @@ def find_guild_member_by_nickname(
     )
     return session.exec(stmt).first()
 
+
+@traced()
+def find_guild_members(
+    session: Session, *, guild_id: int, nicknames: Sequence[str] = (), user_ids: Sequence[int] = ()
+) -> List[GuildMember]:
+    """서버 닉네임 또는 user_id 목록에 해당하는 길드 회원을 한 번의 쿼리로 조회합니다."""
+    conditions = []
+    if nicknames:
+        conditions.append(GuildMember.server_nickname.in_(list(nicknames)))
+    if user_ids:
+        conditions.append(GuildMember.user_id.in_(list(user_ids)))
+    if not conditions:
+        return []
+    stmt = select(GuildMember).where(GuildMember.guild_id == guild_id, or_(*conditions))
+    return list(session.exec(stmt).all())
+
+
+@traced()
+def list_guild_nicknames(session: Session, *, guild_ids: Sequence[int]) -> List[Tuple[int, int, Optional[str]]]:
+    """주어진 길드들의 (guild_id, user_id, server_nickname) 목록을 반환합니다. (닉네임 색인 초기 구성용)"""
+    if not guild_ids:
+        return []
+    stmt = select(GuildMember.guild_id, GuildMember.user_id, GuildMember.server_nickname).where(
+        GuildMember.guild_id.in_(list(guild_ids))
+    )
+    return list(session.exec(stmt).all())
+
+
+@traced()
+def upsert_guild_member_nicknames(session: Session, members: Sequence[Dict[str, Any]]) -> None:
+    """
+    여러 길드 회원의 서버 닉네임을 한 번에 반영합니다. (커밋하지 않음)
+    members: {"user_id", "user_name", "guild_id", "guild_name", "server_nickname"} 목록.
+    대상 수와 관계없이 없는 User/Guild/GuildMember는 executemany INSERT로, 닉네임은 기본 키 기준 일괄 UPDATE로 처리합니다.
+    기존 User/Guild의 이름은 건드리지 않습니다. (명령 실행 시 가드가 갱신)
+    """
+    if not members:
+        return
+    user_ids = {member["user_id"] for member in members}
+    guild_ids = {member["guild_id"] for member in members}
+
+    known_users = set(session.exec(select(User.id).where(User.id.in_(user_ids))).all())
+    new_users = {m["user_id"]: m["user_name"] for m in members if m["user_id"] not in known_users}
+    if new_users:
+        session.exec(insert(User), params=[{"id": uid, "name": name} for uid, name in new_users.items()])
+
+    known_guilds = set(session.exec(select(Guild.id).where(Guild.id.in_(guild_ids))).all())
+    new_guilds = {m["guild_id"]: m["guild_name"] for m in members if m["guild_id"] not in known_guilds}
+    if new_guilds:
+        session.exec(insert(Guild), params=[{"id": gid, "name": name} for gid, name in new_guilds.items()])
+
+    known_members = set(
+        session.exec(
+            select(GuildMember.guild_id, GuildMember.user_id).where(
+                GuildMember.guild_id.in_(guild_ids), GuildMember.user_id.in_(user_ids)
+            )
+        ).all()
+    )
+    rows = [
+        {"user_id": m["user_id"], "guild_id": m["guild_id"], "server_nickname": m["server_nickname"]}
+        for m in members
+    ]
+    inserts = [row for row in rows if (row["guild_id"], row["user_id"]) not in known_members]
+    updates = [row for row in rows if (row["guild_id"], row["user_id"]) in known_members]
+    if inserts:
+        session.exec(insert(GuildMember), params=[dict(row, role=RoleLevel.USER) for row in inserts])
+    if updates:
+        session.exec(update(GuildMember), params=updates)
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-from typing import Optional, Iterable, List, Tuple
+from typing import Dict, Optional, Iterable, List, Tuple
 from datetime import datetime
 
+from sqlalchemy import and_
 from sqlmodel import Session, select
 
 from bot.models.horse_race import HorseRace, HorseRaceEntry, HorseRaceStatus
 from bot.models.members import User, GuildMember
+from bot.services.tracing import traced
 
 
+@traced()
 def create_race(session: Session, *, guild_id: int, host_user_id: int, prep_message_id: int) -> HorseRace:
     race = HorseRace(guild_id=guild_id, host_user_id=host_user_id, prep_message_id=prep_message_id)
     session.add(race)
@@ -17,6 +20,7 @@ def create_race(session: Session, *, guild_id: int, host_user_id: int, prep_mess
     return race
 
 
+@traced()
 def get_latest_race_by_host(session: Session, *, guild_id: int, host_user_id: int) -> Optional[HorseRace]:
     stmt = (
         select(HorseRace)
@@ -26,6 +30,7 @@ def get_latest_race_by_host(session: Session, *, guild_id: int, host_user_id: in
     return session.exec(stmt).first()
 
 
+@traced()
 def get_active_race_by_host(session: Session, *, guild_id: int, host_user_id: int) -> Optional[HorseRace]:
     """해당 호스트의 PREPARED 또는 STARTED 상태인 최신 경마를 반환"""
     stmt = (
@@ -40,6 +45,7 @@ def get_active_race_by_host(session: Session, *, guild_id: int, host_user_id: in
     return session.exec(stmt).first()
 
 
+@traced()
 def get_latest_prepared_race_by_host(session: Session, *, guild_id: int, host_user_id: int) -> Optional[HorseRace]:
     stmt = (
         select(HorseRace)
@@ -53,6 +59,7 @@ def get_latest_prepared_race_by_host(session: Session, *, guild_id: int, host_us
     return session.exec(stmt).first()
 
 
+@traced()
 def get_prepared_race_by_prep_message_id(session: Session, *, prep_message_id: int) -> Optional[HorseRace]:
     stmt = (
         select(HorseRace)
@@ -65,6 +72,7 @@ def get_prepared_race_by_prep_message_id(session: Session, *, prep_message_id: i
     return session.exec(stmt).first()
 
 
+@traced()
 def add_participant(session: Session, *, race_id: int, user_id: int, emoji: Optional[str] = None) -> bool:
     print(f"🔍 [REPO] add_participant called: race_id={race_id}, user_id={user_id}, emoji={emoji}")
     
@@ -102,11 +110,13 @@ def add_participant(session: Session, *, race_id: int, user_id: int, emoji: Opti
         return False
 
 
+@traced()
 def list_participants(session: Session, *, race_id: int) -> List[Tuple[int, Optional[str]]]:
     stmt = select(HorseRaceEntry.user_id, HorseRaceEntry.emoji).where(HorseRaceEntry.race_id == race_id)
     return [(row[0], row[1]) for row in session.exec(stmt).all()]
 
 
+@traced()
 def remove_participant(session: Session, *, race_id: int, user_id: int) -> bool:
     stmt = select(HorseRaceEntry).where(HorseRaceEntry.race_id == race_id, HorseRaceEntry.user_id == user_id)
     entry = session.exec(stmt).first()
@@ -117,6 +127,7 @@ def remove_participant(session: Session, *, race_id: int, user_id: int) -> bool:
     return True
 
 
+@traced()
 def mark_started(session: Session, *, race_id: int, race_message_id: int) -> None:
     race = session.get(HorseRace, race_id)
     if race is None:
@@ -128,6 +139,7 @@ def mark_started(session: Session, *, race_id: int, race_message_id: int) -> Non
     session.commit()
 
 
+@traced()
 def mark_finished(session: Session, *, race_id: int) -> None:
     race = session.get(HorseRace, race_id)
     if race is None:
@@ -138,6 +150,7 @@ def mark_finished(session: Session, *, race_id: int) -> None:
     session.commit()
 
 
+@traced()
 def get_user_display_name(session: Session, *, user_id: int, guild_id: int) -> str:
     """사용자의 서버 닉네임 또는 전역 이름을 조회"""
     # 먼저 서버별 닉네임 확인
@@ -159,3 +172,20 @@ def get_user_display_name(session: Session, *, user_id: int, guild_id: int) -> s
     return f"사용자{user_id}"
 
 
+def get_user_display_names(session: Session, *, user_ids: Iterable[int], guild_id: int) -> Dict[int, str]:
+    """여러 사용자의 서버 닉네임 또는 전역 이름을 한 번에 조회 (DB에 이름이 없는 사용자는 결과에서 빠짐)"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    stmt = (
+        select(User.id, User.name, GuildMember.server_nickname)
+        .outerjoin(GuildMember, and_(GuildMember.user_id == User.id, GuildMember.guild_id == guild_id))
+        .where(User.id.in_(user_ids))
+    )
+    names: Dict[int, str] = {}
+    for user_id, name, server_nickname in session.exec(stmt):
+        if server_nickname or name:
+            names[user_id] = server_nickname or name
+    return names
+
+
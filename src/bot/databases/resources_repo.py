@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
+from sqlalchemy import func, insert, update
 from sqlmodel import Session, select
 
-from bot.models.gm_resources import GMResourceWallet, GMResourceLog, ResourceType
+from bot.services.wallet_events import publish_wallet_change
+from bot.models.gm_resources import GMResourceWallet, GMResourceLog, GMResourceLogMonthly, ResourceType
+from bot.models.members import GuildMember, User
+from bot.services.tracing import traced
 
 
+@traced()
 def get_wallet(
     session: Session, *, user_id: int, guild_id: int, resource_type: ResourceType
 ) -> Optional[GMResourceWallet]:
@@ -18,6 +24,7 @@ def get_wallet(
     return session.exec(stmt).first()
 
 
+@traced()
 def get_or_create_wallet(
     session: Session, *, user_id: int, guild_id: int, resource_type: ResourceType
 ) -> GMResourceWallet:
@@ -36,6 +43,7 @@ def get_or_create_wallet(
     return wallet
 
 
+@traced()
 def consume_resource(
     session: Session,
     *,
@@ -72,10 +80,12 @@ def consume_resource(
     )
     session.add(log)
     session.commit()
+    publish_wallet_change(guild_id=guild_id, user_id=user_id)
     session.refresh(wallet)
     return True, wallet.amount
 
 
+@traced()
 def get_wallet_balance(
     session: Session, *, user_id: int, guild_id: int, resource_type: ResourceType
 ) -> int:
@@ -85,6 +95,7 @@ def get_wallet_balance(
     return wallet.amount or 0
 
 
+@traced()
 def withdraw_resource(
     session: Session,
     *,
@@ -103,6 +114,7 @@ def withdraw_resource(
         reason=reason,
     )
 
+@traced()
 def deposit_resource(
     session: Session, *, user_id: int, guild_id: int, resource_type: ResourceType, amount: int, reason: str = "deposit"
 ) -> int:
@@ -127,25 +139,349 @@ def deposit_resource(
         )
     )
     session.commit()
+    publish_wallet_change(guild_id=guild_id, user_id=user_id)
     session.refresh(wallet)
     return wallet.amount
 
 
-def get_lottery_payout_logs(
+def _lottery_payout_filter(stmt, *, guild_id: int, user_id: Optional[int]):
+    stmt = stmt.where(
+        GMResourceLog.guild_id == guild_id,
+        GMResourceLog.resource_type == ResourceType.VAULT,
+        GMResourceLog.change_amount > 0,
+        GMResourceLog.reason == "lottery_payout",
+    )
+    if user_id is not None:
+        stmt = stmt.where(GMResourceLog.user_id == user_id)
+    return stmt
+
+
+PayoutKey = Tuple[datetime, int]
+
+
+@traced()
+def get_lottery_payout_page(
+    session: Session,
+    *,
+    user_id: int,
+    guild_id: int,
+    limit: int,
+    cursor: Optional[PayoutKey] = None,
+    older: bool = True,
+) -> List[Tuple[int, datetime, int]]:
+    """
+    복권 당첨 로그 한 페이지를 (id, created_at, 당첨금)으로 반환합니다. (keyset 페이지네이션)
+    - older=True: cursor(created_at, id)보다 오래된 로그를 최신 순으로 limit개 (cursor가 없으면 가장 최근부터)
+    - older=False: cursor보다 새로운 로그를 오래된 순으로 limit개 (호출 측에서 뒤집어 표시)
+    ix_gm_resource_log_payouts 인덱스 범위를 cursor 위치에서 바로 읽기 시작하므로 페이지 깊이와 관계없이 비용이 같습니다.
+    """
+    stmt = _lottery_payout_filter(
+        select(GMResourceLog.id, GMResourceLog.created_at, GMResourceLog.change_amount),
+        guild_id=guild_id,
+        user_id=user_id,
+    )
+    if cursor is not None:
+        created_at, log_id = cursor
+        if older:
+            stmt = stmt.where(
+                (GMResourceLog.created_at < created_at)
+                | ((GMResourceLog.created_at == created_at) & (GMResourceLog.id < log_id))
+            )
+        else:
+            stmt = stmt.where(
+                (GMResourceLog.created_at > created_at)
+                | ((GMResourceLog.created_at == created_at) & (GMResourceLog.id > log_id))
+            )
+    if older:
+        stmt = stmt.order_by(GMResourceLog.created_at.desc(), GMResourceLog.id.desc())
+    else:
+        stmt = stmt.order_by(GMResourceLog.created_at.asc(), GMResourceLog.id.asc())
+    return [(log_id, created_at, amount) for log_id, created_at, amount in session.exec(stmt.limit(limit)).all()]
+
+
+@traced()
+def sum_lottery_payouts(session: Session, *, user_id: int, guild_id: int) -> Tuple[int, int]:
+    """개별 로그로 남아 있는 복권 당첨의 (횟수, 합계). (인덱스만 읽는 집계)"""
+    stmt = _lottery_payout_filter(
+        select(func.count(), func.coalesce(func.sum(GMResourceLog.change_amount), 0)),
+        guild_id=guild_id,
+        user_id=user_id,
+    )
+    count, total = session.exec(stmt).one()
+    return int(count), int(total)
+
+
+@traced()
+def get_lottery_payout_monthly(
     session: Session, *, user_id: int, guild_id: int
 ):
-    """복권 당첨 로그(입금 로그) 목록을 오래된 순으로 반환합니다."""
+    """보존 기간이 지나 월별 합계로 정리된 복권 당첨 내역을 오래된 순으로 반환합니다."""
     stmt = (
-        select(GMResourceLog)
+        select(GMResourceLogMonthly)
         .where(
-            GMResourceLog.user_id == user_id,
-            GMResourceLog.guild_id == guild_id,
-            GMResourceLog.resource_type == ResourceType.VAULT,
-            GMResourceLog.change_amount > 0,
-            GMResourceLog.reason == "lottery_payout",
+            GMResourceLogMonthly.guild_id == guild_id,
+            GMResourceLogMonthly.user_id == user_id,
+            GMResourceLogMonthly.resource_type == ResourceType.VAULT,
+            GMResourceLogMonthly.reason == "lottery_payout",
         )
-        .order_by(GMResourceLog.created_at.asc())
+        .order_by(GMResourceLogMonthly.month.asc())
     )
     return list(session.exec(stmt).all())
 
 
+@traced()
+def iter_lottery_payout_columns(
+    session: Session, *, guild_id: int, user_id: Optional[int] = None, chunk_size: int = 5000
+) -> Iterator[List[Tuple[datetime, int]]]:
+    """
+    복권 당첨 로그의 (created_at, change_amount) 두 컬럼만 오래된 순으로 chunk_size개씩 묶어 반환합니다.
+    ORM 객체를 만들지 않으므로 분석용 배열로 바로 옮길 수 있습니다. user_id가 없으면 길드 전체.
+    """
+    stmt = _lottery_payout_filter(
+        select(GMResourceLog.created_at, GMResourceLog.change_amount), guild_id=guild_id, user_id=user_id
+    ).order_by(GMResourceLog.created_at, GMResourceLog.id)
+    result = session.exec(stmt.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [(created_at, amount) for created_at, amount in partition]
+
+
+@traced()
+def sum_lottery_payout_monthly(
+    session: Session, *, guild_id: int, user_id: Optional[int] = None
+) -> Tuple[int, int]:
+    """보존 기간이 지나 월별 합계로 정리된 복권 당첨의 (횟수, 합계). user_id가 없으면 길드 전체."""
+    stmt = select(
+        func.coalesce(func.sum(GMResourceLogMonthly.entry_count), 0),
+        func.coalesce(func.sum(GMResourceLogMonthly.total_amount), 0),
+    ).where(
+        GMResourceLogMonthly.guild_id == guild_id,
+        GMResourceLogMonthly.resource_type == ResourceType.VAULT,
+        GMResourceLogMonthly.reason == "lottery_payout",
+    )
+    if user_id is not None:
+        stmt = stmt.where(GMResourceLogMonthly.user_id == user_id)
+    count, total = session.exec(stmt).one()
+    return int(count), int(total)
+
+
+@traced()
+def get_top_wallets(
+    session: Session, *, guild_id: int, resource_type: ResourceType, limit: int
+) -> List[Tuple[int, int, str]]:
+    """
+    길드에서 자원 잔액이 많은 순으로 (user_id, 잔액, 표시 이름) 최대 limit개를 반환합니다. (잔액 0 제외)
+    (guild_id, resource_type, amount) 인덱스를 역순으로 limit개만 읽고, 이름은 그 행들에만 조인합니다.
+    """
+    stmt = (
+        select(GMResourceWallet.user_id, GMResourceWallet.amount, GuildMember.server_nickname, User.name)
+        .outerjoin(
+            GuildMember,
+            (GuildMember.user_id == GMResourceWallet.user_id) & (GuildMember.guild_id == GMResourceWallet.guild_id),
+        )
+        .outerjoin(User, User.id == GMResourceWallet.user_id)
+        .where(
+            GMResourceWallet.guild_id == guild_id,
+            GMResourceWallet.resource_type == resource_type,
+            GMResourceWallet.amount > 0,
+        )
+        .order_by(GMResourceWallet.amount.desc(), GMResourceWallet.user_id.desc())
+        .limit(limit)
+    )
+    return [
+        (user_id, amount, nickname or name or f"사용자{user_id}")
+        for user_id, amount, nickname, name in session.exec(stmt).all()
+    ]
+
+
+@traced()
+def count_wallets_above(session: Session, *, guild_id: int, resource_type: ResourceType, amount: int) -> int:
+    """길드에서 자원 잔액이 amount보다 많은 지갑 수. (순위 = 이 값 + 1, 동점은 같은 순위)"""
+    stmt = select(func.count()).select_from(GMResourceWallet).where(
+        GMResourceWallet.guild_id == guild_id,
+        GMResourceWallet.resource_type == resource_type,
+        GMResourceWallet.amount > amount,
+    )
+    return int(session.exec(stmt).one())
+
+
+@traced()
+def get_wallet_amounts(
+    session: Session, *, guild_id: int, user_ids: Sequence[int], resource_type: ResourceType
+) -> Dict[int, int]:
+    """여러 사용자의 자원 잔액을 한 번에 조회합니다. (지갑이 없는 사용자는 빠짐)"""
+    if not user_ids:
+        return {}
+    stmt = select(GMResourceWallet.user_id, GMResourceWallet.amount).where(
+        GMResourceWallet.guild_id == guild_id,
+        GMResourceWallet.resource_type == resource_type,
+        GMResourceWallet.user_id.in_(list(user_ids)),
+    )
+    return {user_id: amount for user_id, amount in session.exec(stmt).all()}
+
+
+class InsufficientBalance(Exception):
+    """apply_resource_changes에서 차감할 잔액이 부족할 때 발생합니다."""
+
+    def __init__(self, resource_type: ResourceType, balance: int):
+        super().__init__(f"{resource_type.value} 잔액 부족: {balance}")
+        self.resource_type = resource_type
+        self.balance = balance
+
+
+def bulk_idempotency_keys(idempotency_key: str, user_ids: Sequence[int]) -> List[str]:
+    """일괄 지급의 대상별 멱등 키. ('{요청 키}:u{user_id}')"""
+    return [f"{idempotency_key}:u{user_id}" for user_id in user_ids]
+
+
+@traced()
+def grant_resource_bulk(
+    session: Session,
+    *,
+    guild_id: int,
+    user_ids: Sequence[int],
+    resource_type: ResourceType,
+    amount: int,
+    reason: str,
+    idempotency_key: Optional[str] = None,
+) -> Dict[int, int]:
+    """
+    여러 사용자에게 같은 양의 자원을 한 트랜잭션으로 지급하고 {user_id: 지급 후 잔액}을 반환합니다. (커밋하지 않음)
+    대상 수와 관계없이 문장 수가 일정합니다.
+      1) 대상 지갑을 한 번에 잠그고 읽기 (SELECT ... IN ... FOR UPDATE, user_id 순)
+      2) 로그를 executemany로 삽입 (멱등 키가 있으면 이 단계에서 중복이 IntegrityError로 드러남: insert-first)
+      3) 없는 지갑을 executemany로 생성
+      4) 잔액을 UPDATE ... SET amount = amount + :amount WHERE user_id IN (...) 한 문장으로 반영
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids or amount <= 0:
+        return {}
+
+    in_targets = (
+        (GMResourceWallet.guild_id == guild_id)
+        & (GMResourceWallet.resource_type == resource_type)
+        & (GMResourceWallet.user_id.in_(user_ids))
+    )
+    existing = {
+        user_id: balance or 0
+        for user_id, balance in session.exec(
+            select(GMResourceWallet.user_id, GMResourceWallet.amount)
+            .where(in_targets)
+            .order_by(GMResourceWallet.user_id)
+            .with_for_update()
+        ).all()
+    }
+    balances = {user_id: existing.get(user_id, 0) + amount for user_id in user_ids}
+
+    keys = bulk_idempotency_keys(idempotency_key, user_ids) if idempotency_key else [None] * len(user_ids)
+    now = datetime.utcnow()
+    session.exec(
+        insert(GMResourceLog),
+        params=[
+            {
+                "user_id": user_id,
+                "guild_id": guild_id,
+                "resource_type": resource_type,
+                "change_amount": amount,
+                "reason": reason,
+                "created_at": now,
+                "idempotency_key": key,
+                "balance_after": balances[user_id],
+            }
+            for user_id, key in zip(user_ids, keys)
+        ],
+    )
+
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        session.exec(
+            insert(GMResourceWallet),
+            params=[
+                {"user_id": user_id, "guild_id": guild_id, "resource_type": resource_type, "amount": 0}
+                for user_id in missing
+            ],
+        )
+    session.exec(update(GMResourceWallet).where(in_targets).values(amount=GMResourceWallet.amount + amount))
+    return balances
+
+
+@traced()
+def get_bulk_grant_logs(session: Session, *, idempotency_key: str, user_ids: Sequence[int]) -> List[GMResourceLog]:
+    """멱등 키로 이미 기록된 일괄 지급 로그를 반환합니다."""
+    keys = bulk_idempotency_keys(idempotency_key, sorted(set(user_ids)))
+    return list(session.exec(select(GMResourceLog).where(GMResourceLog.idempotency_key.in_(keys))).all())
+
+
+def idempotency_leg_keys(idempotency_key: str, leg_count: int) -> List[str]:
+    """한 변경 묶음의 변경별 멱등 키. ('{요청 키}:{순번}')"""
+    return [f"{idempotency_key}:{index}" for index in range(leg_count)]
+
+
+@traced()
+def get_idempotent_logs(session: Session, *, idempotency_key: str, leg_count: int) -> List[GMResourceLog]:
+    """멱등 키로 이미 기록된 변경 로그를 순번 순으로 반환합니다. (없으면 빈 목록)"""
+    keys = idempotency_leg_keys(idempotency_key, leg_count)
+    logs = session.exec(select(GMResourceLog).where(GMResourceLog.idempotency_key.in_(keys))).all()
+    return sorted(logs, key=lambda log: keys.index(log.idempotency_key))
+
+
+@traced()
+def apply_resource_changes(
+    session: Session,
+    *,
+    user_id: int,
+    guild_id: int,
+    changes: Sequence[Tuple[ResourceType, int, str]],
+    idempotency_key: Optional[str] = None,
+) -> Dict[ResourceType, int]:
+    """
+    한 사용자의 여러 지갑 증감((자원, 증감량, 사유) 목록)을 현재 트랜잭션에 반영하고 변경 후 잔액을 반환합니다.
+    커밋하지 않으므로 호출 측이 트랜잭션(세이브포인트)과 커밋, 지갑 변경 알림을 책임집니다.
+    차감할 잔액이 부족하면 InsufficientBalance를 발생시킵니다. (호출 측에서 세이브포인트 롤백)
+
+    idempotency_key가 있으면 지갑을 건드리기 전에 키를 단 로그를 먼저 삽입합니다. (insert-first)
+    이미 반영된 키라면 유니크 인덱스 위반(IntegrityError)으로 바로 실패하므로,
+    호출 측은 세이브포인트를 롤백하고 get_idempotent_logs로 원래 결과를 돌려주면 됩니다.
+    """
+    logs: List[GMResourceLog] = []
+    leg_keys = idempotency_leg_keys(idempotency_key, len(changes)) if idempotency_key else [None] * len(changes)
+    for (resource_type, delta, reason), leg_key in zip(changes, leg_keys):
+        logs.append(
+            GMResourceLog(
+                user_id=user_id,
+                guild_id=guild_id,
+                resource_type=resource_type,
+                change_amount=delta,
+                reason=reason,
+                idempotency_key=leg_key,
+            )
+        )
+    if idempotency_key:
+        session.add_all(logs)
+        session.flush()
+
+    balances: Dict[ResourceType, int] = {}
+    for (resource_type, delta, _), log in zip(changes, logs):
+        # 다른 프로세스의 동시 수정에 대비해 지갑 행을 잠그고 읽습니다. (SQLite는 무시)
+        wallet = session.exec(
+            select(GMResourceWallet)
+            .where(
+                GMResourceWallet.user_id == user_id,
+                GMResourceWallet.guild_id == guild_id,
+                GMResourceWallet.resource_type == resource_type,
+            )
+            .with_for_update()
+        ).first()
+        if wallet is None:
+            wallet = GMResourceWallet(user_id=user_id, guild_id=guild_id, resource_type=resource_type, amount=0)
+            session.add(wallet)
+
+        current_amount = wallet.amount or 0
+        if delta < 0 and current_amount < -delta:
+            raise InsufficientBalance(resource_type, current_amount)
+
+        wallet.amount = current_amount + delta
+        log.balance_after = wallet.amount
+        session.add(log)
+        session.flush()
+        balances[resource_type] = wallet.amount
+    return balances
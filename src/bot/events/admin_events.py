@@ -1,18 +1,70 @@
+import re
+
+import discord
 from discord.ext import commands
 
 from bot.config.db_config import create_session
 from bot.config import log_config
 from bot.services.authorization import require_min_role
 from bot.models.members import RoleLevel
-from bot.databases.auth_repo import find_guild_member_by_nickname
-from bot.databases.resources_repo import deposit_resource
+from bot.databases.auth_repo import find_guild_member_by_nickname, find_guild_members
 from bot.models.gm_resources import ResourceType
+from bot.services.nickname_index import get_nickname_index
+from bot.services.wallet_executor import (
+    WalletMutation,
+    message_idempotency_key,
+    run_bulk_grant,
+    run_wallet_mutation,
+)
+from bot.services.command_catalog import CATEGORY_ADMIN
+from bot.services.rate_limiter import THROTTLE_WALLET
 
 
 logger = log_config.setup_logger()
 
+_USER_MENTION = re.compile(r"^<@!?(\d+)>$")
+_ROLE_MENTION = re.compile(r"^<@&(\d+)>$")
+
+
+def _find_user_by_nickname(guild_id: int, nickname: str) -> int | None:
+    """닉네임 색인에서 O(1)로 찾습니다. 색인이 아직 구성되지 않은 길드만 DB를 조회합니다."""
+    index = get_nickname_index()
+    if index.is_loaded(guild_id):
+        return index.lookup(guild_id, nickname)
+    with create_session() as session:
+        member = find_guild_member_by_nickname(session, guild_id=guild_id, server_nickname=nickname)
+    return member.user_id if member else None
+
+
+def _resolve_members(guild_id: int, nicknames: list[str], user_ids: list[int]) -> tuple[dict[int, str], set[str]]:
+    """
+    닉네임/user_id 목록을 길드 회원으로 확인해 ({user_id: 표시 이름}, 찾은 닉네임 집합)을 반환합니다.
+    색인이 구성된 길드는 DB 조회 없이, 아니면 한 번의 쿼리로 찾습니다.
+    """
+    index = get_nickname_index()
+    if index.is_loaded(guild_id):
+        names: dict[int, str] = {}
+        found: set[str] = set()
+        for nickname in nicknames:
+            user_id = index.lookup(guild_id, nickname)
+            if user_id is not None:
+                names[user_id] = nickname
+                found.add(nickname)
+        for user_id in user_ids:
+            if index.contains(guild_id, user_id):
+                names[user_id] = index.nickname_of(guild_id, user_id) or f"사용자{user_id}"
+        return names, found
+
+    with create_session() as session:
+        members = find_guild_members(session, guild_id=guild_id, nicknames=nicknames, user_ids=user_ids)
+    names = {member.user_id: member.server_nickname or f"사용자{member.user_id}" for member in members}
+    return names, {member.server_nickname for member in members}
+
 
 class AdminEvents(commands.Cog):
+    help_category = CATEGORY_ADMIN
+    throttle_group = THROTTLE_WALLET
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
@@ -31,28 +83,107 @@ class AdminEvents(commands.Cog):
             await ctx.send("지급 수량은 1 이상이어야 합니다.")
             return
 
-        with create_session() as session:
-            target_gm = find_guild_member_by_nickname(
-                session, guild_id=ctx.guild.id, server_nickname=target_nick
-            )
-            if target_gm is None:
-                await ctx.send(f"해당 닉네임을 가진 길드 회원을 찾지 못했습니다: {target_nick}")
-                return
-
-            new_balance = deposit_resource(
-                session,
-                user_id=target_gm.user_id,
-                guild_id=target_gm.guild_id,
-                resource_type=ResourceType.TALENT,
-                amount=amount,
-                reason="admin_grant",
+        target_user_id = _find_user_by_nickname(ctx.guild.id, target_nick)
+        if target_user_id is None:
+            await ctx.send(f"해당 닉네임을 가진 길드 회원을 찾지 못했습니다: {target_nick}")
+            return
+
+        result = await run_wallet_mutation(
+            WalletMutation(
+                user_id=target_user_id,
+                guild_id=ctx.guild.id,
+                changes=[(ResourceType.TALENT, amount, "admin_grant")],
+                idempotency_key=message_idempotency_key(ctx.message.id),
             )
+        )
+        new_balance = result.balances[ResourceType.TALENT]
 
         await ctx.send(
             f"{target_nick} 님께 달란트 {amount} 지급 완료. 현재 잔액: {new_balance}"
         )
 
 
+    async def _ensure_chunked(self, guild: discord.Guild) -> bool:
+        """
+        역할 구성원을 펼치기 전에 길드 멤버 캐시를 채웁니다.
+        시작 시 청킹을 하지 않는 프로필에서는 최근 활동/변경한 멤버만 캐시에 있어 role.members가 일부만 돌려주기 때문입니다.
+        """
+        if guild.chunked:
+            return True
+        try:
+            await guild.chunk()
+        except Exception as exc:
+            logger.warning(f"길드 멤버 목록 조회 실패: guild={guild.id}: {exc}")
+            return False
+        return True
+
+    @commands.command(name="달란트일괄지급")
+    @require_min_role(RoleLevel.ADMIN)
+    async def grant_talent_bulk(self, ctx: commands.Context, amount: int, *targets: str):
+        """
+        ADMIN 이상만 사용 가능. 여러 길드 회원에게 같은 수의 달란트를 한 번에 지급합니다.
+        사용법: !달란트일괄지급 {지급갯수} {서버닉네임|@멘션|@역할} ...
+        """
+        if ctx.guild is None:
+            await ctx.send("길드(서버) 안에서만 사용할 수 있습니다.")
+            return
+
+        if amount <= 0:
+            await ctx.send("지급 수량은 1 이상이어야 합니다.")
+            return
+        if not targets:
+            await ctx.send("사용법: !달란트일괄지급 {지급갯수} {서버닉네임|@멘션|@역할} ...")
+            return
+
+        nicknames: list[str] = []
+        mentioned_ids: list[int] = []
+        unresolved: list[str] = []
+        for token in targets:
+            if match := _USER_MENTION.match(token):
+                mentioned_ids.append(int(match.group(1)))
+            elif match := _ROLE_MENTION.match(token):
+                role = ctx.guild.get_role(int(match.group(1)))
+                if role is None:
+                    unresolved.append(token)
+                elif not self.bot.intents.members:
+                    # 역할 구성원 목록은 멤버 인텐트와 멤버 캐시가 있어야 알 수 있습니다.
+                    unresolved.append(f"@{role.name}(멤버 인텐트 필요)")
+                elif not await self._ensure_chunked(ctx.guild):
+                    unresolved.append(f"@{role.name}(멤버 목록 조회 실패)")
+                else:
+                    mentioned_ids.extend(member.id for member in role.members if not member.bot)
+            else:
+                nicknames.append(token)
+
+        names, found_nicknames = _resolve_members(ctx.guild.id, nicknames, mentioned_ids)
+        unresolved.extend(nick for nick in nicknames if nick not in found_nicknames)
+        unresolved.extend(f"<@{user_id}>" for user_id in dict.fromkeys(mentioned_ids) if user_id not in names)
+
+        if not names:
+            await ctx.send("지급할 길드 회원을 찾지 못했습니다: " + ", ".join(unresolved))
+            return
+
+        balances, duplicate = await run_bulk_grant(
+            guild_id=ctx.guild.id,
+            user_ids=list(names),
+            resource_type=ResourceType.TALENT,
+            amount=amount,
+            reason="admin_grant",
+            idempotency_key=message_idempotency_key(ctx.message.id),
+        )
+
+        granted = ", ".join(
+            f"{names.get(user_id, f'사용자{user_id}')}({balance})"
+            for user_id, balance in sorted(balances.items(), key=lambda item: names.get(item[0], ""))
+        )
+        lines = [f"달란트 {amount} 일괄 지급 완료: {len(balances)}명 (총 {amount * len(balances)})"]
+        if duplicate:
+            lines[0] += " (이미 처리된 요청)"
+        lines.append(f"지급 후 잔액: {granted}")
+        if unresolved:
+            lines.append("찾지 못한 대상: " + ", ".join(unresolved))
+        await ctx.send("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(AdminEvents(bot))
 
@@ -2,6 +2,7 @@ from discord.ext import commands
 from bot.config import log_config
 from bot.services.authorization import require_min_role
 from bot.models.members import RoleLevel
+from bot.services.command_catalog import CATEGORY_ADMIN
 
 logger = log_config.setup_logger()
 
@@ -10,6 +11,9 @@ class BasicCog(commands.Cog):
     """
     봇의 기본적인 이벤트와 명령어들을 담고 있는 Cog 클래스입니다.
     """
+
+    help_category = CATEGORY_ADMIN
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         logger.info("BasicCog가 준비되었습니다.")
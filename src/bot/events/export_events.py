@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+
+import discord
+from discord.ext import commands
+
+from bot.config import log_config
+from bot.models.members import RoleLevel
+from bot.services.authorization import require_min_role
+from bot.services.command_catalog import CATEGORY_ADMIN, CATEGORY_ASSETS
+from bot.services.ledger_export import LedgerExport, export_ledger_csv
+from bot.services.rate_limiter import THROTTLE_EXPORT
+
+
+logger = log_config.setup_logger()
+
+
+class ExportCog(commands.Cog):
+    """거래 내역을 gzip CSV 파일로 내보냅니다. 개인 내역이 채널에 노출되지 않도록 DM으로 보냅니다."""
+
+    help_category = CATEGORY_ASSETS
+    throttle_group = THROTTLE_EXPORT
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def _deliver(self, ctx: commands.Context, export: LedgerExport) -> None:
+        try:
+            if export.row_count == 0:
+                await ctx.send("내보낼 거래 내역이 없습니다.")
+                return
+            limit = ctx.guild.filesize_limit
+            if export.truncated:
+                await ctx.send(
+                    f"내보낼 파일이 업로드 한도({limit // 1024}KB)를 넘습니다. ({export.row_count}건 이상에서 중단)"
+                )
+                return
+            if export.size_bytes > limit:
+                await ctx.send(
+                    f"내보낼 파일이 업로드 한도를 넘습니다. ({export.size_bytes // 1024}KB > {limit // 1024}KB)"
+                )
+                return
+            try:
+                await ctx.author.send(
+                    f"거래 내역 {export.row_count}건을 보냅니다.",
+                    file=discord.File(export.file, filename=export.filename),
+                )
+            except discord.Forbidden:
+                await ctx.send("DM을 보낼 수 없습니다. 서버 개인정보 설정에서 DM 허용 후 다시 시도하세요.")
+                return
+            await ctx.send(f"{ctx.author.display_name} 님께 거래 내역 {export.row_count}건을 DM으로 보냈습니다.")
+        finally:
+            export.file.close()
+
+    @commands.command(name="내역내보내기")
+    async def export_my_ledger(self, ctx: commands.Context):
+        """
+        본인의 전체 거래 내역을 CSV(gzip) 파일로 DM 전송합니다.
+        사용법: !내역내보내기
+        """
+        if ctx.guild is None:
+            await ctx.send("길드(서버) 안에서만 사용할 수 있습니다.")
+            return
+        export = await asyncio.to_thread(
+            export_ledger_csv, guild_id=ctx.guild.id, user_id=ctx.author.id, max_bytes=ctx.guild.filesize_limit
+        )
+        await self._deliver(ctx, export)
+
+    @commands.command(name="길드내역내보내기", extras={"help_category": CATEGORY_ADMIN})
+    @require_min_role(RoleLevel.ADMIN)
+    async def export_guild_ledger(self, ctx: commands.Context):
+        """
+        ADMIN 이상만 사용 가능. 길드 전체 거래 내역을 CSV(gzip) 파일로 DM 전송합니다.
+        사용법: !길드내역내보내기
+        """
+        if ctx.guild is None:
+            await ctx.send("길드(서버) 안에서만 사용할 수 있습니다.")
+            return
+        export = await asyncio.to_thread(export_ledger_csv, guild_id=ctx.guild.id, max_bytes=ctx.guild.filesize_limit)
+        await self._deliver(ctx, export)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ExportCog(bot))
@@ -8,7 +8,7 @@ import discord
 from discord.ext import commands
 
 from bot.config import log_config
-from bot.config.db_config import create_session
+from bot.config.db_config import create_session, read_with_primary_fallback
 from bot.config.bot_config import (
     HORSE_RACE_ALL_FINISH_SEC,
     HORSE_RACE_JOIN_REACTION,
@@ -21,19 +21,30 @@ from bot.databases.horse_race_repo import (
     create_race,
     get_latest_race_by_host,
     get_prepared_race_by_prep_message_id,
-    get_user_display_name,
-)
-from bot.services.horse_race_service import (
-    add_participant_by_reaction,
-    remove_participant_by_reaction,
 )
+from bot.services.work_queue import submit_job
+from bot.services.member_lookup import resolve_display_names
 from bot.models.horse_race import HorseRaceStatus
+from bot.services.request_context import set_current_operation
+from bot.services.tracing import start_span
+from bot.services.command_catalog import CATEGORY_RACE
+from bot.services.rate_limiter import THROTTLE_RACE
 
 
 logger = log_config.setup_logger()
 
 
+def _find_prepared_race(prep_message_id: int):
+    # 준비 메시지 직후의 리액션은 복제본에 아직 경마가 없을 수 있으므로 못 찾으면 주 DB에서 재조회합니다.
+    return read_with_primary_fallback(
+        lambda session: get_prepared_race_by_prep_message_id(session, prep_message_id=prep_message_id)
+    )
+
+
 class HorseRaceCog(commands.Cog):
+    help_category = CATEGORY_RACE
+    throttle_group = THROTTLE_RACE
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
@@ -57,6 +68,15 @@ class HorseRaceCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        set_current_operation("listener:on_raw_reaction_add")
+        with start_span(
+            "on_raw_reaction_add",
+            kind="SERVER",
+            attributes={"discord.guild_id": payload.guild_id or 0, "discord.message_id": payload.message_id},
+        ):
+            await self._handle_reaction_add(payload)
+
+    async def _handle_reaction_add(self, payload: discord.RawReactionActionEvent):
         print(f"🔍 [REACTION ADD] User: {payload.user_id}, Emoji: {payload.emoji}, MSG ID: {payload.message_id}")
         
         # DM/자기봇/다른 서버 등 필터링
@@ -85,12 +105,11 @@ class HorseRaceCog(commands.Cog):
         print(f"🔍 [REACTION ADD] Emoji match start: {emoji_str == HORSE_RACE_START_REACTION}")
         
         # 먼저 해당 메시지 ID로 경마가 있는지 확인
-        with create_session() as session:
-            race = get_prepared_race_by_prep_message_id(session, prep_message_id=payload.message_id)
-            if not race:
-                print(f"❌ [REACTION ADD] No race found for message ID: {payload.message_id}")
-                return
-            print(f"✅ [REACTION ADD] Found race ID: {race.id}, Host: {race.host_user_id}")
+        race = _find_prepared_race(payload.message_id)
+        if not race:
+            print(f"❌ [REACTION ADD] No race found for message ID: {payload.message_id}")
+            return
+        print(f"✅ [REACTION ADD] Found race ID: {race.id}, Host: {race.host_user_id}")
         
         # 경마 시작 리액션 처리 (여러 체커드 플래그 이모지 지원)
         start_emojis = [HORSE_RACE_START_REACTION, "🏁", "🏴", "🏳️", "🏳️‍🌈", "🏳️‍⚧️", "🏴‍☠️"]
@@ -104,35 +123,25 @@ class HorseRaceCog(commands.Cog):
         if emoji_str not in start_emojis:
             print(f"👥 [REACTION ADD] Join reaction detected: {emoji_str}")
             
-            # DB에 참가자 추가 시도
-            with create_session() as session:
-                print(f"📝 [REACTION ADD] Calling add_participant_by_reaction...")
-                ok = add_participant_by_reaction(
-                    session,
-                    prep_message_id=payload.message_id,
-                    user_id=payload.user_id,
-                    emoji=emoji_str,
-                )
-                print(f"📝 [REACTION ADD] add_participant_by_reaction returned: {ok}")
-                
-                # 실제 DB에서 엔트리 생성 여부 확인
-                if ok:
-                    # 참가자 엔트리 조회로 실제 생성 확인
-                    entries = list_participants(session, race_id=race.id)
-                    participant_found = any(entry[0] == payload.user_id for entry in entries)
-                    print(f"🔍 [REACTION ADD] DB verification - participant found: {participant_found}")
-                    print(f"🔍 [REACTION ADD] Current participants: {[entry[0] for entry in entries]}")
-                    
-                    if participant_found:
-                        print(f"✅ [REACTION ADD] Participant successfully added to DB")
-                        success_msg = f"<@{payload.user_id}> 참가 신청됨 {emoji_str}"
-                    else:
-                        print(f"❌ [REACTION ADD] Participant not found in DB despite success return")
-                        success_msg = f"<@{payload.user_id}> 참가 신청 실패 (DB 확인 오류)"
-                else:
-                    print(f"❌ [REACTION ADD] add_participant_by_reaction failed")
-                    success_msg = f"<@{payload.user_id}> 참가 신청 실패"
-            
+            # DB에 참가자 추가 시도 (작업 큐 모드에 따라 워커에서 실행될 수 있음)
+            print(f"📝 [REACTION ADD] Submitting race_add_participant job...")
+            ok, participant_found = await submit_job(
+                "race_add_participant",
+                prep_message_id=payload.message_id,
+                user_id=payload.user_id,
+                emoji=emoji_str,
+            )
+            print(f"📝 [REACTION ADD] race_add_participant returned: {ok}, verified: {participant_found}")
+
+            if ok and participant_found:
+                success_msg = f"<@{payload.user_id}> 참가 신청됨 {emoji_str}"
+            elif ok:
+                print(f"❌ [REACTION ADD] Participant not found in DB despite success return")
+                success_msg = f"<@{payload.user_id}> 참가 신청 실패 (DB 확인 오류)"
+            else:
+                print(f"❌ [REACTION ADD] add_participant_by_reaction failed")
+                success_msg = f"<@{payload.user_id}> 참가 신청 실패"
+
         # 피드백 메시지 전송
         if channel and isinstance(channel, (discord.TextChannel, discord.Thread)):
             try:
@@ -144,6 +153,7 @@ class HorseRaceCog(commands.Cog):
             print(f"❌ [REACTION ADD] Ignoring start/test emoji as join reaction: {emoji_str}")
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        set_current_operation("listener:on_raw_reaction_remove")
         print(f"🔍 [REACTION REMOVE] User: {payload.user_id}, Emoji: {payload.emoji}, MSG ID: {payload.message_id}")
         
         if payload.guild_id is None or payload.user_id is None:
@@ -169,19 +179,19 @@ class HorseRaceCog(commands.Cog):
         print(f"🔍 [REACTION REMOVE] Processing emoji: {emoji_str}")
         
         # 먼저 해당 메시지 ID로 경마가 있는지 확인
-        with create_session() as session:
-            race = get_prepared_race_by_prep_message_id(session, prep_message_id=payload.message_id)
-            if not race:
-                print(f"❌ [REACTION REMOVE] No race found for message ID: {payload.message_id}")
-                return
-            print(f"✅ [REACTION REMOVE] Found race ID: {race.id}, Host: {race.host_user_id}")
+        race = _find_prepared_race(payload.message_id)
+        if not race:
+            print(f"❌ [REACTION REMOVE] No race found for message ID: {payload.message_id}")
+            return
+        print(f"✅ [REACTION REMOVE] Found race ID: {race.id}, Host: {race.host_user_id}")
         
         # 참가 취소 리액션 처리 (시작 이모지 제외)
         start_emojis = [HORSE_RACE_START_REACTION, "🏁", "🏴", "🏳️", "🏳️‍🌈", "🏳️‍⚧️", "🏴‍☠️"]
         if emoji_str not in start_emojis:
             print(f"👥 [REACTION REMOVE] Remove participant: {emoji_str}")
-            with create_session() as session:
-                ok = remove_participant_by_reaction(session, prep_message_id=payload.message_id, user_id=payload.user_id)
+            ok = await submit_job(
+                "race_remove_participant", prep_message_id=payload.message_id, user_id=payload.user_id
+            )
             print(f"📝 [REACTION REMOVE] Remove participant result: {ok}")
             
             if channel and isinstance(channel, (discord.TextChannel, discord.Thread)):
@@ -200,18 +210,17 @@ class HorseRaceCog(commands.Cog):
             print("❌ [HANDLE START] Invalid channel")
             return
             
-        with create_session() as session:
-            race = get_prepared_race_by_prep_message_id(session, prep_message_id=payload.message_id)
-            if not race:
-                print("❌ [HANDLE START] No race found")
-                await channel.send("진행할 경마가 없습니다.")
-                return
-            print(f"✅ [HANDLE START] Found race ID: {race.id}, Host: {race.host_user_id}")
-            
-            if race.host_user_id != payload.user_id:
-                print(f"❌ [HANDLE START] User {payload.user_id} is not host {race.host_user_id}")
-                await channel.send("경마 주최자만 경마를 시작할 수 있습니다.")
-                return
+        race = _find_prepared_race(payload.message_id)
+        if not race:
+            print("❌ [HANDLE START] No race found")
+            await channel.send("진행할 경마가 없습니다.")
+            return
+        print(f"✅ [HANDLE START] Found race ID: {race.id}, Host: {race.host_user_id}")
+
+        if race.host_user_id != payload.user_id:
+            print(f"❌ [HANDLE START] User {payload.user_id} is not host {race.host_user_id}")
+            await channel.send("경마 주최자만 경마를 시작할 수 있습니다.")
+            return
                 
         print(f"🚀 [HANDLE START] Starting race animation for race ID: {race.id}")
         # 기존 _start_race 로직 실행
@@ -248,7 +257,7 @@ class HorseRaceCog(commands.Cog):
             print("❌ [RACE ANIMATION] Guild not found")
             return
 
-        # 참가자 수집
+        # 참가자 수집 (방금 반영된 참가 신청을 읽어야 하므로 주 DB에서 조회)
         participants: List[int] = []
         with create_session() as session:
             entries = list_participants(session, race_id=race_id)
@@ -266,11 +275,8 @@ class HorseRaceCog(commands.Cog):
             entries = list_participants(session, race_id=race_id)
         emoji_map: Dict[int, str] = {user_id: (emoji or "🏇") for user_id, emoji in entries}
         
-        # 참가자별 닉네임 조회
-        name_map: Dict[int, str] = {}
-        with create_session() as session:
-            for uid in participants:
-                name_map[uid] = get_user_display_name(session, user_id=uid, guild_id=guild_id)
+        # 참가자별 닉네임 조회 (DB에서 한 번에 읽고, DB에 없는 참가자만 캐시/API로 조회)
+        name_map: Dict[int, str] = await resolve_display_names(self.bot, guild_id=guild_id, user_ids=participants)
         
         lines = [self._render_lane(None, 0.0, emoji_map.get(uid, "🏇"), display_name=name_map.get(uid)) for uid in participants]
         content = "```\n-\n```\n" + "\n".join(lines) + "\n```\n-\n```"
@@ -308,9 +314,7 @@ class HorseRaceCog(commands.Cog):
                 ranking = sorted([(uid, finish_time_sec.get(uid, duration_all)) for uid in participants], key=lambda x: x[1])
                 lines_rank = []
                 for idx, (uid, t) in enumerate(ranking, start=1):
-                    with create_session() as session:
-                        name = get_user_display_name(session, user_id=uid, guild_id=guild_id)
-                    lines_rank.append(f"{idx}위  {name}  {t}s")
+                    lines_rank.append(f"{idx}위  {name_map.get(uid)}  {t}s")
                 content += "\n\n**최종 순위**\n" + "\n".join(lines_rank)
                 final_announced = True
 
@@ -331,9 +335,7 @@ class HorseRaceCog(commands.Cog):
             ranking = sorted([(uid, finish_time_sec.get(uid, duration_all)) for uid in participants], key=lambda x: x[1])
             lines_rank = []
             for idx, (uid, t) in enumerate(ranking, start=1):
-                with create_session() as session:
-                    name = get_user_display_name(session, user_id=uid, guild_id=guild_id)
-                lines_rank.append(f"{idx}위  {name}  {t}s")
+                lines_rank.append(f"{idx}위  {name_map.get(uid)}  {t}s")
             try:
                 await rail_msg.edit(content="```\n최종 순위\n" + "\n".join(lines_rank) + "\n```")
             except Exception:
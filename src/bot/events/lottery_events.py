@@ -1,23 +1,32 @@
+import discord
 from discord.ext import commands
 
-from bot.config.db_config import create_session
 from bot.config import log_config
-from bot.services.lottery_service import run_lottery_transaction
-from bot.config.bot_config import LOTTERY_EXPECTED_PAYOUT, LOTTERY_MAX_PAYOUT
-from bot.databases.resources_repo import get_lottery_payout_logs
+from bot.services.wallet_executor import message_idempotency_key, run_lottery
+from bot.services.lottery_service import LotteryHistoryPage, load_lottery_history_page, load_lottery_summary
+from bot.services.lottery_analytics import AnalyticsUnavailable, LotteryAnalytics, load_lottery_analytics
+from bot.services.lottery_tables import PayoutTable, get_payout_table
+from bot.services.command_catalog import CATEGORY_LOTTERY
+from bot.services.rate_limiter import THROTTLE_LOTTERY, THROTTLE_READ
 
 
 logger = log_config.setup_logger()
 
+# 페이지 버튼을 유지하는 시간(초). 지나면 버튼을 비활성화합니다.
+HISTORY_VIEW_TIMEOUT_SEC = 180
+
 
 class LotteryCog(commands.Cog):
+    help_category = CATEGORY_LOTTERY
+    throttle_group = THROTTLE_LOTTERY
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
     @commands.command(name="복권")
     async def lottery(self, ctx: commands.Context):
         """
-        복권 사용: 달란트 1 소모 후 1~1205g를 금고에 입금합니다.
+        복권 사용: 달란트 1 소모 후 길드 상금표에 따라 뽑은 상금을 금고에 입금합니다.
         사용법: !복권
         """
         if ctx.guild is None:
@@ -27,25 +36,25 @@ class LotteryCog(commands.Cog):
         user_id = ctx.author.id
         guild_id = ctx.guild.id
 
-        with create_session() as session:
-            ok, payout, vault_balance = run_lottery_transaction(
-                session, user_id=user_id, guild_id=guild_id
-            )
+        ok, payout, vault_balance = await run_lottery(
+            user_id=user_id, guild_id=guild_id, idempotency_key=message_idempotency_key(ctx.message.id)
+        )
 
         if not ok:
             await ctx.send("달란트가 부족합니다. 현재 잔액이 1 미만입니다.")
             return
 
+        table = get_payout_table(guild_id)
         await ctx.send(
             f"복권 결과: {payout} 지급! 현재 VAULT 잔액: {vault_balance}\n"
-            f"(현재 설정: 최대상금 {LOTTERY_MAX_PAYOUT}, 1회 기댓값 {LOTTERY_EXPECTED_PAYOUT})"
+            f"(현재 설정: 최대상금 {table.max_payout}, 1회 기댓값 {table.expected_label})"
         )
 
-    @commands.command(name="복권통계")
-    async def lottery_stats(self, ctx: commands.Context):
+    @commands.command(name="복권통계", extras={"throttle_group": THROTTLE_READ})
+    async def lottery_stats(self, ctx: commands.Context, scope: str | None = None):
         """
-        복권 내역과 수익 요약을 출력합니다.
-        사용법: !복권통계
+        복권 내역과 수익 요약, 당첨금 분석을 출력합니다.
+        사용법: !복권통계 [길드]
         """
         if ctx.guild is None:
             await ctx.send("길드(서버) 안에서만 사용할 수 있습니다.")
@@ -54,44 +63,170 @@ class LotteryCog(commands.Cog):
         user_id = ctx.author.id
         guild_id = ctx.guild.id
 
-        with create_session() as session:
-            logs = get_lottery_payout_logs(session, user_id=user_id, guild_id=guild_id)
+        if scope == "길드":
+            await self._send_guild_stats(ctx)
+            return
 
-        if not logs:
+        summary = await load_lottery_summary(user_id=user_id, guild_id=guild_id)
+        if summary.draws == 0:
             await ctx.send(f"{ctx.author.display_name} 님의 복권 기록이 없습니다.")
             return
 
-        # 라인 포맷: YY/MM/DD amount g (4자리 제로패딩)
-        lines = []
-        total = 0
-        for log in logs:
-            dt = log.created_at
-            y = dt.strftime("%y")
-            m = dt.strftime("%m")
-            d = dt.strftime("%d")
-            amt = int(log.change_amount)
-            total += amt
-            lines.append(f"{y}/{m}/{d} {amt:04d}g")
-
-        n = len(logs)
-        expected = n * LOTTERY_EXPECTED_PAYOUT
-        # 수익률(본전=0%) = ((총수익 / 기댓값) - 1) * 100
-        roi = ((total / expected - 1.0) * 100.0) if expected > 0 else 0.0
-
-        history_block = "\n".join(lines)
-        summary_block = (
-            f"총 사용 달란트: {n}\n"
-            f"기댓값 : {expected} (= {n} * {LOTTERY_EXPECTED_PAYOUT})\n"
-            f"총수익금 : {total}\n"
-            f"수익률 : {roi:.1f}%"
+        table = get_payout_table(guild_id)
+        view = LotteryHistoryView(
+            author_id=user_id,
+            guild_id=guild_id,
+            title=f"{ctx.author.display_name} 님의 복권 기록 통계를 공개합니다.",
+            summary_block=_format_summary(summary.draws, summary.total, table),
+            page=summary.first_page,
         )
+        if view.is_single_page():
+            await ctx.send(view.render())
+        else:
+            view.message = await ctx.send(view.render(), view=view)
+
+        try:
+            report = await load_lottery_analytics(guild_id=guild_id, user_id=user_id)
+        except AnalyticsUnavailable as exc:
+            logger.warning(f"복권 분석 생략: {exc}")
+            return
+        if report.histogram:
+            await ctx.send(f"```\n{_format_analytics(report, table)}\n```")
+
+    async def _send_guild_stats(self, ctx: commands.Context):
+        try:
+            report = await load_lottery_analytics(guild_id=ctx.guild.id)
+        except AnalyticsUnavailable:
+            await ctx.send("길드 복권 분석 기능을 사용할 수 없습니다. (numpy 미설치)")
+            return
+        if report.draws == 0:
+            await ctx.send("이 길드의 복권 기록이 없습니다.")
+            return
 
-        message = (
-            f"{ctx.author.display_name} 님의 복권 기록 통계를 공개합니다.\n"
+        table = get_payout_table(ctx.guild.id)
+        message = f"{ctx.guild.name} 길드 복권 통계\n```\n{_format_summary(report.draws, report.total, table)}\n```"
+        if report.histogram:
+            message += f"```\n{_format_analytics(report, table)}\n```"
+        await ctx.send(message)
+
+
+class LotteryHistoryView(discord.ui.View):
+    """
+    복권 내역 페이지 이동 버튼. 명령을 실행한 사용자만 누를 수 있습니다.
+    각 페이지는 현재 페이지의 첫/마지막 로그 키를 커서로 한 keyset 쿼리 1회로 읽습니다.
+    """
+
+    def __init__(
+        self, *, author_id: int, guild_id: int, title: str, summary_block: str, page: LotteryHistoryPage
+    ):
+        super().__init__(timeout=HISTORY_VIEW_TIMEOUT_SEC)
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.title = title
+        self.summary_block = summary_block
+        self.page = page
+        self.page_number = 1
+        self.message: discord.Message | None = None
+        self._sync_buttons()
+
+    def is_single_page(self) -> bool:
+        return not self.page.has_newer and not self.page.has_older
+
+    def render(self) -> str:
+        # 라인 포맷: YY/MM/DD amount g (4자리 제로패딩), 최신 순
+        # 보존 기간이 지나 정리된 내역은 마지막 페이지에 월 합계 한 줄로 표시: YY/MM (N회) amount g
+        lines = [f"{created_at:%y/%m/%d} {amount:04d}g" for created_at, amount in self.page.rows]
+        for summary in reversed(self.page.monthly):
+            lines.append(f"{summary.month:%y/%m} ({summary.entry_count}회) {int(summary.total_amount):04d}g")
+        history_block = "\n".join(lines) or "(내역 없음)"
+        page_label = "" if self.is_single_page() else f" ({self.page_number}페이지, 최신 순)"
+        return (
+            f"{self.title}{page_label}\n"
             f"```\n{history_block}\n```\n"
-            f"```\n{summary_block}\n```"
+            f"```\n{self.summary_block}\n```"
         )
-        await ctx.send(message)
+
+    def _sync_buttons(self) -> None:
+        self.newer_page.disabled = not self.page.has_newer
+        self.older_page.disabled = not self.page.has_older
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("본인의 복권 기록만 넘겨볼 수 있습니다.", ephemeral=True)
+            return False
+        return True
+
+    async def _move(self, interaction: discord.Interaction, *, older: bool) -> None:
+        # 3초 응답 제한 안에 먼저 응답하고, 페이지를 읽은 뒤 원래 메시지를 수정합니다. (느린 조회에도 상호작용 실패 방지)
+        await interaction.response.defer()
+        cursor = self.page.oldest_key if older else self.page.newest_key
+        page = await load_lottery_history_page(
+            user_id=self.author_id, guild_id=self.guild_id, cursor=cursor, older=older
+        )
+        if page.rows or page.monthly:
+            self.page = page
+            self.page_number += 1 if older else -1
+        self._sync_buttons()
+        await interaction.edit_original_response(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀ 최근", style=discord.ButtonStyle.secondary)
+    async def newer_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._move(interaction, older=False)
+
+    @discord.ui.button(label="이전 기록 ▶", style=discord.ButtonStyle.secondary)
+    async def older_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._move(interaction, older=True)
+
+    async def on_timeout(self) -> None:
+        if self.message is None:
+            return
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
+
+
+def _format_summary(draws: int, total: int, table: PayoutTable) -> str:
+    expected = round(draws * table.expected_payout)
+    # 수익률(본전=0%) = ((총수익 / 기댓값) - 1) * 100
+    roi = ((total / expected - 1.0) * 100.0) if expected > 0 else 0.0
+    return (
+        f"총 사용 달란트: {draws}\n"
+        f"기댓값 : {expected} (= {draws} * {table.expected_label})\n"
+        f"총수익금 : {total}\n"
+        f"수익률 : {roi:.1f}%"
+    )
+
+
+def _format_percent(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}%"
+
+
+def _format_analytics(report: LotteryAnalytics, table: PayoutTable) -> str:
+    analysed = report.draws - report.archived_draws
+    header = f"당첨금 분석 (개별 기록 {analysed}회"
+    header += f", 정리된 {report.archived_draws}회 제외)" if report.archived_draws else ")"
+    lines = [
+        header,
+        f"백분위 : 중앙 {report.median_percentile:.1f}"
+        f" / 최고 {report.best_payout}g (상위 {100 - report.best_percentile:.1f}%)"
+        f" / 최근 {report.last_payout}g ({report.last_percentile:.1f})",
+        f"최장 연속 : 기댓값({table.expected_label}) 이상 {report.longest_hot}회 / 미만 {report.longest_cold}회",
+        f"30일 수익률 : {_format_percent(report.roi_30d)}"
+        f" (최고 {_format_percent(report.roi_30d_best)}, 최저 {_format_percent(report.roi_30d_worst)})",
+        "분포 (실제 횟수 / 이론 비율):",
+    ]
+    peak = max(bin.count for bin in report.histogram) or 1
+    width = len(str(table.max_payout))
+    for bin in report.histogram:
+        bar = "█" * round(bin.count / peak * 20)
+        label = f" {bin.label}" if bin.label else ""
+        lines.append(
+            f"{bin.low:>{width}}-{bin.high:<{width}} |{bar:<20} {bin.count} ({bin.expected_share * 100:.1f}%){label}"
+        )
+    return "\n".join(lines)
 
 
 async def setup(bot: commands.Bot):
@@ -1,22 +1,140 @@
-from discord.ext import commands
+import asyncio
+from typing import Optional
+
+from discord.ext import commands, tasks
 import discord
 
 from bot.config import log_config
+from bot.config.bot_config import NICKNAME_FLUSH_INTERVAL_SEC, NICKNAME_FLUSH_MAX
 from bot.config.db_config import create_session
 from bot.databases.auth_repo import ensure_guild_member
+from bot.services.nickname_index import MemberSnapshot, NicknameWriter, get_nickname_index, load_nickname_index
 from bot.services.request_context import get_current_guild_member
+from bot.services.state_handoff import claim, stash
 
 
 logger = log_config.setup_logger()
 
 
+def _server_nickname(member: discord.Member) -> Optional[str]:
+    """DB/색인에 기록하는 서버 닉네임 (가드와 같은 기준: 서버 별명 또는 표시 이름)"""
+    return member.nick or member.display_name
+
+
 class MemberEvents(commands.Cog):
     """
     가입 등 멤버 관련 명령어를 제공하는 Cog.
+    멤버 이벤트로 닉네임 색인(bot.services.nickname_index)을 최신으로 유지하고, 바뀐 닉네임을 모아서 DB에 기록합니다.
+    (이벤트는 MEMBERS_INTENT가 켜져 있을 때만 들어옵니다. 꺼져 있으면 명령 실행 시 가드가 갱신하는 값만 반영)
     """
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.index = get_nickname_index()
+        self.writer = NicknameWriter(max_pending=NICKNAME_FLUSH_MAX)
+        self._flushing = asyncio.Lock()
+        self._index_loaded = False
+        # 리로드 전에 기록하지 못한 닉네임 대기열과 색인 구성 여부를 이어받습니다. (on_ready는 다시 오지 않음)
+        if state := claim(type(self).__name__):
+            self.writer = state["writer"]
+            self._index_loaded = state["index_loaded"]
+        self.flush_nicknames.change_interval(seconds=NICKNAME_FLUSH_INTERVAL_SEC)
+        self.flush_nicknames.start()
+
+    async def cog_unload(self) -> None:
+        self.flush_nicknames.cancel()
+        await self._flush()
+        stash(type(self).__name__, writer=self.writer, index_loaded=self._index_loaded)
+
+    async def _flush(self) -> None:
+        async with self._flushing:
+            try:
+                written = await asyncio.to_thread(self.writer.flush)
+            except Exception as exc:
+                logger.error(f"닉네임 기록 중 오류: {exc}")
+                return
+            if written:
+                logger.debug(f"닉네임 {written}건 기록")
+
+    @tasks.loop(seconds=5)
+    async def flush_nicknames(self):
+        await self._flush()
+
+    def _remember(self, member: discord.Member) -> None:
+        """색인을 갱신하고, 바뀌었으면 DB 기록 대기열에 넣습니다. (많이 쌓이면 주기를 기다리지 않고 기록)"""
+        if member.bot:
+            return
+        nickname = _server_nickname(member)
+        guild_id = member.guild.id
+        if not self.index.set(guild_id, member.id, nickname) and self.index.is_loaded(guild_id):
+            return
+        snapshot = MemberSnapshot(
+            user_id=member.id,
+            user_name=member.name,
+            guild_id=guild_id,
+            guild_name=member.guild.name,
+            server_nickname=nickname,
+        )
+        if self.writer.queue(snapshot) and not self._flushing.locked():
+            asyncio.create_task(self._flush())
+
+    async def _load_guilds(self, guilds) -> bool:
+        """길드들의 색인을 구성합니다. 실패하면 False. (해당 길드는 호출 측이 DB 조회로 대신함)"""
+        guilds = list(guilds)
+        if not guilds:
+            return True
+        try:
+            count = await asyncio.to_thread(load_nickname_index, self.index, [guild.id for guild in guilds])
+        except Exception as exc:
+            logger.error(f"닉네임 색인 구성 중 오류: {exc}")
+            return False
+        logger.info(f"닉네임 색인 구성 완료: 길드 {len(guilds)}개, 회원 {count}명")
+        # 멤버 캐시가 채워진 길드는 봇이 꺼져 있던 동안 바뀐 닉네임도 바로잡습니다.
+        for guild in guilds:
+            if guild.chunked:
+                for member in guild.members:
+                    self._remember(member)
+        return True
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready는 재연결마다 다시 불리므로 색인은 처음 한 번만 구성합니다. (이후는 이벤트로 갱신)
+        # 구성에 실패하면 다음 on_ready에서 다시 시도합니다.
+        if self._index_loaded:
+            return
+        self._index_loaded = await self._load_guilds(self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        await self._load_guilds([guild])
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.index.drop_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self._remember(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if _server_nickname(before) != _server_nickname(after):
+            self._remember(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # 서버 별명이 없는 회원은 전역 표시 이름이 곧 서버 닉네임입니다.
+        if before.display_name == after.display_name:
+            return
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member is not None and member.nick is None:
+                self._remember(member)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # 캐시에 없는 회원의 퇴장도 받도록 raw 이벤트를 씁니다.
+        self.index.discard(payload.guild_id, payload.user.id)
 
     # @commands.command(name='가입')
     # async def join(self, ctx: commands.Context):
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import discord
+from discord.ext import commands, tasks
+
+from bot.config import log_config
+from bot.config.bot_config import METRICS_REPORT_SEC
+from bot.services import metrics
+
+
+logger = log_config.setup_logger()
+
+
+class MetricsCog(commands.Cog):
+    """
+    샤드별 게이트웨이 상태/이벤트 수를 집계하고 주기적으로 메트릭 스냅샷을 로그로 보고합니다.
+    샤딩을 쓰지 않으면 모든 값이 shard=0으로 기록됩니다.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        if METRICS_REPORT_SEC > 0:
+            self.report_metrics.change_interval(seconds=METRICS_REPORT_SEC)
+            self.report_metrics.start()
+
+    async def cog_unload(self) -> None:
+        self.report_metrics.cancel()
+
+    @commands.Cog.listener()
+    async def on_shard_connect(self, shard_id: int):
+        metrics.incr("gateway_connects", shard=shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id: int):
+        metrics.incr("gateway_disconnects", shard=shard_id)
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id: int):
+        metrics.incr("gateway_resumes", shard=shard_id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        shard_id = message.guild.shard_id if message.guild else 0
+        metrics.incr("gateway_messages", shard=shard_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        guild = self.bot.get_guild(payload.guild_id) if payload.guild_id else None
+        metrics.incr("gateway_reactions", shard=guild.shard_id if guild else 0)
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        shard_id = ctx.guild.shard_id if ctx.guild else 0
+        metrics.incr("commands_completed", shard=shard_id, command=ctx.command.qualified_name)
+
+    @tasks.loop(seconds=300)
+    async def report_metrics(self):
+        self._collect_shard_gauges()
+        logger.info(f"메트릭 스냅샷:\n{metrics.format_snapshot()}")
+
+    @report_metrics.before_loop
+    async def _before_report(self):
+        await self.bot.wait_until_ready()
+
+    def _collect_shard_gauges(self) -> None:
+        latencies = getattr(self.bot, "latencies", None) or [(self.bot.shard_id or 0, self.bot.latency)]
+        for shard_id, latency in latencies:
+            metrics.set_gauge("gateway_latency_ms", latency * 1000, shard=shard_id)
+
+        guild_counts: dict[int, int] = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        for shard_id, count in guild_counts.items():
+            metrics.set_gauge("guilds", count, shard=shard_id)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MetricsCog(bot))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import discord
+from discord.ext import commands, tasks
+
+from bot.config import log_config
+from bot.config.bot_config import (
+    LEDGER_RECONCILE_CHUNK,
+    LEDGER_RECONCILE_INTERVAL_HOURS,
+    LEDGER_RECONCILE_SAFETY_SEC,
+    SHARD_IDS,
+)
+from bot.models.members import RoleLevel
+from bot.services.authorization import require_min_role
+from bot.services.command_catalog import CATEGORY_ADMIN
+from bot.services.ledger_reconciliation import ReconciliationReport, run_reconciliation
+from bot.services.state_handoff import claim, stash
+
+
+logger = log_config.setup_logger()
+
+
+class ReconciliationCog(commands.Cog):
+    """
+    지갑 잔액과 거래 내역 합계를 주기적으로 대사합니다. (증분)
+    여러 프로세스가 샤드를 나눠 맡는 경우 0번 샤드 프로세스만 자동 실행합니다.
+    """
+
+    help_category = CATEGORY_ADMIN
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # 리로드로 다시 만들어진 경우 이전 인스턴스의 다음 실행 시각을 이어받습니다. (리로드마다 즉시 실행하지 않도록)
+        # 실행 중이던 작업은 서비스의 잠금이 스레드가 끝날 때까지 유지하므로 겹쳐 실행되지 않습니다.
+        self._resume_at: datetime | None = None
+        if state := claim(type(self).__name__):
+            self._resume_at = state["next_run_at"]
+        if LEDGER_RECONCILE_INTERVAL_HOURS > 0 and (SHARD_IDS is None or 0 in SHARD_IDS):
+            self.scheduled_reconciliation.change_interval(hours=LEDGER_RECONCILE_INTERVAL_HOURS)
+            self.scheduled_reconciliation.start()
+
+    async def cog_unload(self) -> None:
+        next_run_at = self.scheduled_reconciliation.next_iteration
+        self.scheduled_reconciliation.cancel()
+        stash(type(self).__name__, next_run_at=next_run_at)
+
+    async def _run(self, *, full: bool) -> ReconciliationReport | None:
+        return await asyncio.to_thread(
+            run_reconciliation,
+            full=full,
+            chunk_size=LEDGER_RECONCILE_CHUNK,
+            safety_window_sec=LEDGER_RECONCILE_SAFETY_SEC,
+        )
+
+    @tasks.loop(hours=24)
+    async def scheduled_reconciliation(self):
+        try:
+            await self._run(full=False)
+        except Exception as exc:
+            logger.error(f"지갑-거래내역 대사 중 오류: {exc}")
+
+    @scheduled_reconciliation.before_loop
+    async def _before_scheduled_reconciliation(self):
+        await self.bot.wait_until_ready()
+        if self._resume_at is not None:
+            await discord.utils.sleep_until(self._resume_at)
+
+    @commands.command(name="장부대사")
+    @require_min_role(RoleLevel.ADMIN)
+    async def reconcile_now(self, ctx: commands.Context, mode: str | None = None):
+        """
+        ADMIN 이상만 사용 가능. 지갑 잔액과 거래 내역 합계가 일치하는지 확인합니다.
+        사용법: !장부대사 [전체]
+        """
+        report = await self._run(full=(mode == "전체"))
+        if report is None:
+            await ctx.send("이미 대사 작업이 진행 중입니다.")
+            return
+        await ctx.send(f"```\n{report.summary()}\n```")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ReconciliationCog(bot))
@@ -0,0 +1,53 @@
+from discord.ext import commands
+
+from bot.config import log_config
+from bot.services.command_catalog import CATEGORY_ADMIN
+
+
+logger = log_config.setup_logger()
+
+
+class ReloadCog(commands.Cog):
+    """
+    봇을 재시작하지 않고 Cog 확장의 코드를 교체합니다.
+    게이트웨이 연결, services 모듈의 캐시, 진행 중인 경마/작업 큐는 그대로 유지됩니다.
+    """
+
+    help_category = CATEGORY_ADMIN
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="리로드")
+    @commands.is_owner()
+    async def reload_extensions(self, ctx: commands.Context, *names: str):
+        """
+        봇 소유자만 사용 가능. Cog 확장을 다시 불러옵니다. (이름을 생략하면 전체)
+        사용법: !리로드 [모듈명 ...] (예: !리로드 lottery_events)
+        """
+        loaded = list(self.bot.extensions)
+        targets = []
+        unknown = []
+        for name in names:
+            matched = [module for module in loaded if module == name or module.rsplit(".", 1)[-1] == name]
+            if matched:
+                targets.extend(matched)
+            else:
+                unknown.append(name)
+        if unknown:
+            await ctx.send("알 수 없는 모듈: " + ", ".join(unknown))
+            return
+
+        logger.info(f"확장 리로드 요청: {ctx.author} → {', '.join(targets) or '전체'}")
+        results = await self.bot.reload_modules(targets or loaded)
+        lines = [
+            f"{'✅' if error is None else '❌'} {module.rsplit('.', 1)[-1]}" + (f": {error}" if error else "")
+            for module, error in results
+        ]
+        failed = sum(1 for _, error in results if error is not None)
+        header = f"확장 {len(results)}개 리로드" + (f" (실패 {failed}개, 이전 코드 유지)" if failed else " 완료")
+        await ctx.send("\n".join([header, *lines])[:2000])
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ReloadCog(bot))
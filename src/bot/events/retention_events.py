@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import discord
+from discord.ext import commands, tasks
+
+from bot.config import log_config
+from bot.config.bot_config import (
+    LEDGER_ARCHIVE_DIR,
+    LEDGER_RETENTION_CHUNK,
+    LEDGER_RETENTION_DAYS,
+    LEDGER_RETENTION_INTERVAL_HOURS,
+    SHARD_IDS,
+)
+from bot.models.members import RoleLevel
+from bot.services.authorization import require_min_role
+from bot.services.command_catalog import CATEGORY_ADMIN
+from bot.services.ledger_retention import RetentionReport, run_ledger_retention
+from bot.services.state_handoff import claim, stash
+
+
+logger = log_config.setup_logger()
+
+
+class RetentionCog(commands.Cog):
+    """
+    거래 내역 보존 정책을 주기적으로 실행합니다.
+    여러 프로세스가 샤드를 나눠 맡는 경우 0번 샤드 프로세스만 자동 실행합니다. (스키마 초기화와 동일)
+    """
+
+    help_category = CATEGORY_ADMIN
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # 리로드로 다시 만들어진 경우 이전 인스턴스의 다음 실행 시각을 이어받습니다. (리로드마다 즉시 실행하지 않도록)
+        # 실행 중이던 작업은 서비스의 잠금이 스레드가 끝날 때까지 유지하므로 겹쳐 실행되지 않습니다.
+        self._resume_at: datetime | None = None
+        if state := claim(type(self).__name__):
+            self._resume_at = state["next_run_at"]
+        if LEDGER_RETENTION_DAYS > 0 and LEDGER_RETENTION_INTERVAL_HOURS > 0 and (SHARD_IDS is None or 0 in SHARD_IDS):
+            self.scheduled_retention.change_interval(hours=LEDGER_RETENTION_INTERVAL_HOURS)
+            self.scheduled_retention.start()
+
+    async def cog_unload(self) -> None:
+        next_run_at = self.scheduled_retention.next_iteration
+        self.scheduled_retention.cancel()
+        stash(type(self).__name__, next_run_at=next_run_at)
+
+    async def _run(self) -> RetentionReport | None:
+        return await asyncio.to_thread(
+            run_ledger_retention,
+            retention_days=LEDGER_RETENTION_DAYS,
+            archive_dir=LEDGER_ARCHIVE_DIR,
+            chunk_size=LEDGER_RETENTION_CHUNK,
+        )
+
+    @tasks.loop(hours=24)
+    async def scheduled_retention(self):
+        try:
+            await self._run()
+        except Exception as exc:
+            logger.error(f"거래 내역 보존 정리 중 오류: {exc}")
+
+    @scheduled_retention.before_loop
+    async def _before_scheduled_retention(self):
+        await self.bot.wait_until_ready()
+        if self._resume_at is not None:
+            await discord.utils.sleep_until(self._resume_at)
+
+    @commands.command(name="장부정리")
+    @require_min_role(RoleLevel.ADMIN)
+    async def run_retention_now(self, ctx: commands.Context):
+        """
+        ADMIN 이상만 사용 가능. 보존 기간이 지난 거래 내역을 월별 합계로 정리하고 아카이브합니다.
+        사용법: !장부정리
+        """
+        if LEDGER_RETENTION_DAYS <= 0:
+            await ctx.send("보존 기간(LEDGER_RETENTION_DAYS)이 설정되지 않았습니다.")
+            return
+        report = await self._run()
+        if report is None:
+            await ctx.send("이미 정리 작업이 진행 중입니다.")
+            return
+        await ctx.send(f"```\n{report.summary()}\n```")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(RetentionCog(bot))
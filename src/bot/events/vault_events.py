@@ -4,21 +4,24 @@ from bot.config.db_config import create_session
 from bot.config import log_config
 from bot.databases.resources_repo import withdraw_resource
 from bot.models.gm_resources import ResourceType
-from bot.services.wallet_service import (
-    get_member_balances,
-    deposit_member_resource,
-    withdraw_member_resource,
-)
+from bot.services.leaderboard import load_vault_leaderboard
+from bot.services.wallet_service import load_member_balances
+from bot.services import wallet_executor
+from bot.services.command_catalog import CATEGORY_ASSETS
+from bot.services.rate_limiter import THROTTLE_READ, THROTTLE_WALLET
 
 
 logger = log_config.setup_logger()
 
 
 class VaultCog(commands.Cog):
+    help_category = CATEGORY_ASSETS
+    throttle_group = THROTTLE_WALLET
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    @commands.command(name="잔고확인")
+    @commands.command(name="잔고확인", extras={"throttle_group": THROTTLE_READ})
     async def check_balance(self, ctx: commands.Context):
         """
         본인 금고 잔액을 확인합니다.
@@ -28,7 +31,7 @@ class VaultCog(commands.Cog):
             await ctx.send("길드(서버) 안에서만 사용할 수 있습니다.")
             return
 
-        balances = get_member_balances(user_id=ctx.author.id, guild_id=ctx.guild.id)
+        balances = await load_member_balances(user_id=ctx.author.id, guild_id=ctx.guild.id)
         message = (
             f"현재 잔액\n"
             f"- 금고: {balances['vault']} gp \n"
@@ -37,6 +40,30 @@ class VaultCog(commands.Cog):
         )
         await ctx.send(f"```\n{message}\n```")
 
+    @commands.command(name="금고순위", extras={"throttle_group": THROTTLE_READ})
+    async def vault_leaderboard(self, ctx: commands.Context):
+        """
+        길드 금고 잔액 상위 순위와 본인 순위를 확인합니다.
+        사용법: !금고순위
+        """
+        if ctx.guild is None:
+            await ctx.send("길드(서버) 안에서만 사용할 수 있습니다.")
+            return
+
+        view = await load_vault_leaderboard(guild_id=ctx.guild.id, user_id=ctx.author.id)
+        if not view.entries:
+            await ctx.send("아직 금고에 잔액이 있는 회원이 없습니다.")
+            return
+
+        lines = [f"금고 순위 (상위 {len(view.entries)}명)"]
+        for entry in view.entries:
+            lines.append(f"{entry.rank:>3}. {entry.name} - {entry.amount:,} gp")
+        if view.my_rank is None:
+            lines.append("\n내 순위: 없음 (금고 잔액 0)")
+        else:
+            lines.append(f"\n내 순위: {view.my_rank}위 ({view.my_amount:,} gp)")
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
     @commands.command(name="출금")
     async def withdraw(self, ctx: commands.Context, resource: str | None = None, amount: int | None = None):
         """
@@ -54,11 +81,12 @@ class VaultCog(commands.Cog):
             )
             return
 
-        ok, label_or_msg, remain = withdraw_member_resource(
+        ok, label_or_msg, remain = await wallet_executor.withdraw_member_resource(
             user_id=ctx.author.id,
             guild_id=ctx.guild.id,
             resource_alias=resource,
             amount=amount,
+            idempotency_key=wallet_executor.message_idempotency_key(ctx.message.id),
         )
 
         if not ok:
@@ -84,11 +112,12 @@ class VaultCog(commands.Cog):
             )
             return
 
-        ok, label_or_msg, new_balance = deposit_member_resource(
+        ok, label_or_msg, new_balance = await wallet_executor.deposit_member_resource(
             user_id=ctx.author.id,
             guild_id=ctx.guild.id,
             resource_alias=resource,
             amount=amount,
+            idempotency_key=wallet_executor.message_idempotency_key(ctx.message.id),
         )
 
         if not ok:
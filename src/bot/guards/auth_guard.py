@@ -2,15 +2,40 @@ from discord.ext import commands
 import discord
 
 from bot.config import log_config
-from bot.config.db_config import create_session
+from bot.config.db_config import create_session, retry_on_disconnect
 from bot.databases.auth_repo import ensure_guild_member
-from bot.services.request_context import set_current_guild_member, clear_context
+from bot.services.nickname_index import get_nickname_index
+from bot.services.request_context import (
+    set_current_guild_member,
+    set_current_operation,
+    set_current_span,
+    clear_context,
+)
+from bot.services.tracing import begin_span, end_span, start_span, trace_id_for_message
+from bot.services.work_queue import WorkQueueResultUnknown
 from discord.ext import commands
 
 
 logger = log_config.setup_logger()
 
 
+# 같은 값으로 덮어쓰는 upsert이므로 커밋 후 끊김으로 다시 실행해도 결과가 같습니다.
+@retry_on_disconnect
+def _ensure_and_inject(*, user_id: int, user_name: str, guild_id: int, guild_name: str, server_nickname) -> None:
+    with create_session() as session:
+        gm = ensure_guild_member(
+            session,
+            user_id=user_id,
+            user_name=user_name,
+            guild_id=guild_id,
+            guild_name=guild_name,
+            server_nickname=server_nickname,
+        )
+        set_current_guild_member(gm)
+    # 방금 DB에 반영한 닉네임을 색인에도 반영합니다. (멤버 인텐트가 없어도 활동한 회원의 닉네임은 최신으로 유지)
+    get_nickname_index().set(guild_id, user_id, server_nickname)
+
+
 class AuthGuard(commands.Cog):
     """
     모든 메시지/명령 처리 전에 길드 멤버를 DB에 보장하고 컨텍스트에 주입.
@@ -20,23 +45,41 @@ class AuthGuard(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_unload(self) -> None:
+        # 확장 리로드 시 옛 인스턴스의 전역 체크가 남지 않도록 제거합니다.
+        self.bot.remove_check(self._inject_ctx_check)
+
     async def _inject_ctx_check(self, ctx: commands.Context) -> bool:
         """
         모든 명령 실행 전에 길드 멤버를 보장하고 컨텍스트에 주입합니다.
         (discord.py는 이벤트와 명령 실행이 다른 Task일 수 있으므로 on_message만으로는 부족)
         """
+        if ctx.command is not None:
+            set_current_operation(f"command:{ctx.command.qualified_name}")
+            # 명령 실행 전체를 감싸는 스팬. 같은 메시지의 on_message 스팬과 trace_id를 공유합니다.
+            # 체크는 명령 실행과 같은 Task에서 돌기 때문에 여기서 설정한 현재 스팬이 명령 본문까지 이어집니다.
+            span = begin_span(
+                f"command {ctx.command.qualified_name}",
+                kind="SERVER",
+                trace_id=trace_id_for_message(ctx.message.id),
+                attributes={
+                    "discord.guild_id": ctx.guild.id if ctx.guild else 0,
+                    "discord.user_id": ctx.author.id,
+                },
+            )
+            if span is not None:
+                ctx.trace_span = span  # type: ignore[attr-defined]
+                set_current_span(span)
         if ctx.guild is None or getattr(ctx.author, "bot", False):
             return True
-        with create_session() as session:
-            gm = ensure_guild_member(
-                session,
+        with start_span("guard.inject_ctx"):
+            _ensure_and_inject(
                 user_id=ctx.author.id,
                 user_name=ctx.author.name,
                 guild_id=ctx.guild.id,
                 guild_name=ctx.guild.name,
                 server_nickname=getattr(ctx.author, "nick", None) or getattr(ctx.author, "display_name", None),
             )
-            set_current_guild_member(gm)
         return True
 
     @commands.Cog.listener()
@@ -45,37 +88,52 @@ class AuthGuard(commands.Cog):
         if message.guild is None or message.author.bot:
             return
 
-        with create_session() as session:
-            gm = ensure_guild_member(
-                session,
+        set_current_operation("listener:on_message")
+        with start_span(
+            "on_message",
+            kind="SERVER",
+            trace_id=trace_id_for_message(message.id),
+            attributes={"discord.guild_id": message.guild.id, "discord.user_id": message.author.id},
+        ):
+            # 명령 실행 여부 판단을 위해 컨텍스트를 먼저 확인합니다.
+            ctx = await self.bot.get_context(message)
+
+            # Bot 기본 on_message가 명령 처리를 수행하므로 여기서 재호출하지 않습니다.
+            # 명령 메시지는 전역 체크(_inject_ctx_check)가 다른 체크(속도 제한 등)와 함께 보장하므로 여기서는 건너뜁니다.
+            # (속도 제한에 걸린 명령 메시지마다 DB에 쓰지 않도록)
+            if ctx.command is not None:
+                return
+
+            _ensure_and_inject(
                 user_id=message.author.id,
                 user_name=message.author.name,
                 guild_id=message.guild.id,
                 guild_name=message.guild.name,
                 server_nickname=message.author.nick or message.author.display_name,
             )
-            set_current_guild_member(gm)
-
-        # 명령 실행 여부 판단을 위해 컨텍스트 확인
-        ctx = await self.bot.get_context(message)
-
-        # Bot 기본 on_message가 명령 처리를 수행하므로 여기서 재호출하지 않습니다.
-        # 명령이 아닌 일반 메시지라면 컨텍스트를 즉시 정리합니다.
-        if ctx.command is None:
+            # 명령이 아닌 일반 메시지이므로 컨텍스트를 즉시 정리합니다.
             clear_context()
 
     @commands.Cog.listener()
     async def on_command_completion(self, ctx: commands.Context):
+        end_span(getattr(ctx, "trace_span", None))
         clear_context()
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx: commands.Context, error):
-        # 권한/체크 실패는 사용자에게 안내
-        if isinstance(error, commands.CheckFailure):
+        # 권한/체크 실패는 사용자에게 안내 (메시지가 빈 실패는 조용히 무시: 속도 제한 반복 호출 등)
+        if isinstance(error, commands.CheckFailure) and str(error):
             try:
                 await ctx.send(str(error))
             except Exception:
                 pass
+        elif isinstance(getattr(error, "original", None), WorkQueueResultUnknown):
+            # 반영되었을 수 있으므로 실패로 안내하지 않습니다. (같은 메시지의 재실행은 멱등 키로 한 번만 반영)
+            try:
+                await ctx.send("처리 결과를 확인하지 못했습니다. 잠시 후 잔고를 확인해 주세요.")
+            except Exception:
+                pass
+        end_span(getattr(ctx, "trace_span", None), error)
         clear_context()
 
 
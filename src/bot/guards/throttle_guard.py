@@ -0,0 +1,89 @@
+import time
+
+from discord.ext import commands
+
+from bot.config import log_config
+from bot.config.bot_config import THROTTLE_ENABLED, THROTTLE_USER_LIMITS, THROTTLE_GUILD_LIMITS
+from bot.services import metrics
+from bot.services.rate_limiter import TokenBucketLimiter, command_throttle_group
+from bot.services.state_handoff import claim, stash
+
+
+logger = log_config.setup_logger()
+
+
+class CommandThrottled(commands.CheckFailure):
+    """속도 제한에 걸린 명령. 같은 대기 구간에서는 안내를 한 번만 보내도록 메시지를 비울 수 있습니다."""
+
+    def __init__(self, retry_after: float, *, notify: bool):
+        self.retry_after = retry_after
+        super().__init__(f"⏳ 잠시 후 다시 시도하세요. ({retry_after:.0f}초)" if notify else "")
+
+
+class ThrottleGuard(commands.Cog):
+    """
+    (길드, 사용자, 명령 그룹) / (길드, 명령 그룹) 단위 토큰 버킷으로 명령 호출 속도를 제한합니다.
+    AuthGuard보다 먼저 전역 체크로 등록되어 DB 접근 전에 걸러냅니다.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.user_limiter = TokenBucketLimiter(THROTTLE_USER_LIMITS)
+        self.guild_limiter = TokenBucketLimiter(THROTTLE_GUILD_LIMITS)
+        # 마지막으로 안내를 보낸 시각: 매크로 사용자의 연속 호출마다 답장하지 않도록 대기 구간당 1회만 안내
+        self._notified_until: dict[tuple[int, int, str], float] = {}
+        # 리로드 전 버킷을 이어받아, 리로드 직후에 한도가 다시 차는 일이 없도록 합니다.
+        if state := claim(type(self).__name__):
+            self.user_limiter = state["user_limiter"]
+            self.guild_limiter = state["guild_limiter"]
+            self._notified_until = state["notified_until"]
+
+    async def cog_unload(self) -> None:
+        self.bot.remove_check(self._throttle_check)
+        stash(
+            type(self).__name__,
+            user_limiter=self.user_limiter,
+            guild_limiter=self.guild_limiter,
+            notified_until=self._notified_until,
+        )
+
+    async def _throttle_check(self, ctx: commands.Context) -> bool:
+        if ctx.guild is None or ctx.command is None or getattr(ctx.author, "bot", False):
+            return True
+
+        # 그룹은 명령을 정의한 Cog/명령이 지정합니다. (bot.services.rate_limiter 참고)
+        group = command_throttle_group(ctx.command)
+        user_key = (ctx.guild.id, ctx.author.id, group)
+        guild_key = (ctx.guild.id, group)
+        now = time.monotonic()
+
+        user_wait = self.user_limiter.retry_after(user_key, group, now)
+        guild_wait = self.guild_limiter.retry_after(guild_key, group, now)
+        if user_wait == 0 and guild_wait == 0:
+            self.user_limiter.consume(user_key, group, now)
+            self.guild_limiter.consume(guild_key, group, now)
+            self.user_limiter.prune(now)
+            self.guild_limiter.prune(now)
+            return True
+
+        scope = "user" if user_wait >= guild_wait else "guild"
+        metrics.incr("commands_throttled", group=group, scope=scope)
+        wait = max(user_wait, guild_wait)
+
+        notify = self._notified_until.get(user_key, 0.0) <= now
+        if notify:
+            self._notified_until[user_key] = now + wait
+            if len(self._notified_until) > 1024:
+                self._notified_until = {k: v for k, v in self._notified_until.items() if v > now}
+            logger.info(f"명령 속도 제한: guild={ctx.guild.id} user={ctx.author.id} group={group} scope={scope} wait={wait:.1f}s")
+        raise CommandThrottled(wait, notify=notify)
+
+
+async def setup(bot: commands.Bot):
+    if not THROTTLE_ENABLED:
+        logger.info("명령 속도 제한 비활성화 (THROTTLE_ENABLED=0)")
+        return
+    guard = ThrottleGuard(bot)
+    await bot.add_cog(guard)
+    # 전역 체크는 등록 순서대로 실행되므로 auth_guard보다 먼저 로드합니다.
+    bot.add_check(guard._throttle_check)
@@ -1,60 +1,193 @@
+import time
+
+# 프로세스 시작 시각: 시작 단계별 소요 시간(time-to-ready) 측정 기준
+_PROCESS_STARTED_AT = time.perf_counter()
+
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
 from discord.ext import commands
-import discord
 from bot.config import log_config, bot_config
-from bot.config.db_config import ping_db, init_db
-from bot.events import basic_events, member_events
-from bot.events import lottery_events
-from bot.events import admin_events
-from bot.events import vault_events
-from bot.events import horse_race_events
-from bot.events import help_events
-from bot.guards import auth_guard
-    
-logger = log_config.setup_logger()
+from bot.config.gateway_config import build_client_options
+from bot.services.command_catalog import get_command_catalog
+from bot.services.db_telemetry import install_db_telemetry
+from bot.services.loop_watchdog import LoopWatchdog
+from bot.services.tracing import configure_tracing, install_http_tracing
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.reactions = True
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-# Cog 중복 로드를 방지하기 위한 플래그
-_COGS_LOADED = False
+logger = log_config.setup_logger()
 
-# 명시적으로 Cog를 로드할 모듈 목록
+# setup_hook에서 확장(extension)으로 로드할 Cog 모듈 목록 (임포트도 setup_hook 안에서 지연 수행)
+# 전역 체크는 로드 순서대로 실행되므로 throttle_guard가 auth_guard보다 앞에 있어야 합니다.
 modules_to_setup = [
-    basic_events,
-    member_events,
-    auth_guard,
-    lottery_events,
-    admin_events,
-    vault_events,
-    horse_race_events,
-    help_events,
+    "bot.events.basic_events",
+    "bot.events.member_events",
+    "bot.guards.throttle_guard",
+    "bot.guards.auth_guard",
+    "bot.events.lottery_events",
+    "bot.events.admin_events",
+    "bot.events.vault_events",
+    "bot.events.horse_race_events",
+    "bot.events.export_events",
+    "bot.events.help_events",
+    "bot.events.metrics_events",
+    "bot.events.retention_events",
+    "bot.events.reconciliation_events",
+    "bot.events.reload_events",
 ]
+# 전역 체크를 등록하는 확장. 하나를 리로드하면 체크 순서를 지키기 위해 모두 목록 순서대로 다시 로드합니다.
+_GUARD_PREFIX = "bot.guards."
+
+
+class _DuodeBotMixin:
+    """
+    시작 작업(DB 확인/초기화, Cog 로드, 워치독)을 setup_hook에서 1회만 수행하는 봇.
+    on_ready는 게이트웨이 재연결마다 다시 호출되므로 여기에는 무거운 작업을 두지 않습니다.
+    commands.Bot / commands.AutoShardedBot 양쪽에 섞어 사용합니다.
+    """
+
+    def __init__(self, **options):
+        super().__init__(
+            command_prefix="!",
+            **build_client_options(bot_config.GATEWAY_CACHE_PROFILE),
+            **options,
+        )
+        self.startup_timings: Dict[str, float] = {}
+        self.watchdog: LoopWatchdog | None = None
+        self._ready_reported = False
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = time.perf_counter() - started
+
+    async def setup_hook(self) -> None:
+        # 로그인(HTTP)까지의 시간: 임포트 + 토큰 검증
+        self.startup_timings["import_and_login"] = time.perf_counter() - _PROCESS_STARTED_AT
+
+        if bot_config.LOOP_WATCHDOG_ENABLED:
+            self.watchdog = LoopWatchdog(
+                asyncio.get_running_loop(),
+                threshold_sec=bot_config.LOOP_STALL_THRESHOLD_MS / 1000,
+                interval_sec=bot_config.LOOP_WATCHDOG_INTERVAL_MS / 1000,
+            )
+            self.watchdog.start()
+
+        # DB 연결 확인 및 초기화 (동기 I/O이므로 스레드에서 실행)
+        with self._phase("db_init"):
+            from bot.config.db_config import ping_db, init_db
+
+            if await asyncio.to_thread(ping_db):
+                # 여러 프로세스가 샤드를 나눠 맡는 경우 스키마 생성은 0번 샤드 프로세스만 수행합니다.
+                if bot_config.SHARD_IDS is None or 0 in bot_config.SHARD_IDS:
+                    await asyncio.to_thread(init_db)
+                    logger.info("DB 연결 확인 및 초기화 완료")
+                else:
+                    logger.info("DB 연결 확인 완료 (스키마 초기화는 0번 샤드 프로세스가 담당)")
+            else:
+                logger.warning("DB 연결 확인 실패. SQLite 폴백 또는 환경변수 확인 필요")
+
+        with self._phase("load_cogs"):
+            for module_name in modules_to_setup:
+                try:
+                    await self.load_extension(module_name)
+                    logger.info(f"'{module_name}' Cog를 성공적으로 로드했습니다.")
+                except Exception as e:
+                    logger.error(f"'{module_name}' Cog 로드 중 오류 발생: {e}")
+            # 로드가 끝난 명령 목록으로 !명령어 페이지를 미리 만들어 둡니다.
+            get_command_catalog().pages(self)
+
+    async def add_cog(self, cog: commands.Cog, /, **kwargs) -> None:
+        await super().add_cog(cog, **kwargs)
+        # 명령 목록이 바뀌었으므로 !명령어 카탈로그를 다시 만들도록 표시합니다.
+        get_command_catalog().invalidate()
 
-@bot.event
-async def on_ready():
-    """봇이 준비되었을 때 Cog를 로드합니다."""
-    # DB 연결 확인 및 초기화
-    if ping_db():
-        init_db()
-        logger.info("DB 연결 확인 및 초기화 완료")
-    else:
-        logger.warning("DB 연결 확인 실패. SQLite 폴백 또는 환경변수 확인 필요")
-
-    logger.info(f'{bot.user}으로 로그인 성공!')
-    global _COGS_LOADED
-    if not _COGS_LOADED:
-        for module in modules_to_setup:
+    async def remove_cog(self, name: str, /, **kwargs):
+        cog = await super().remove_cog(name, **kwargs)
+        get_command_catalog().invalidate()
+        return cog
+
+    async def reload_modules(self, module_names: List[str]) -> List[Tuple[str, Optional[Exception]]]:
+        """
+        확장을 목록 순서대로 리로드하고 [(모듈, 실패 시 예외)]를 반환합니다.
+        discord.py는 리로드에 실패하면 이전 모듈로 되돌리므로 실패한 확장도 옛 코드로 계속 동작합니다.
+        Cog 상태는 cog_unload/__init__에서 bot.services.state_handoff로 넘겨받습니다.
+        """
+        targets = set(module_names)
+        if any(name.startswith(_GUARD_PREFIX) for name in targets):
+            targets.update(name for name in modules_to_setup if name.startswith(_GUARD_PREFIX))
+        results: List[Tuple[str, Optional[Exception]]] = []
+        for module_name in modules_to_setup:
+            if module_name not in targets:
+                continue
             try:
-                await module.setup(bot)
-                logger.info(f"'{module.__name__}' Cog를 성공적으로 로드했습니다.")
-            except Exception as e:
-                logger.error(f"'{module.__name__}' Cog 로드 중 오류 발생: {e}")
-        _COGS_LOADED = True
-    
-# 봇 실행
-logger.info("봇을 시작합니다...")
-bot.run(bot_config.DISCORD_BOT_TOKEN)
+                if module_name in self.extensions:
+                    await self.reload_extension(module_name)
+                else:
+                    await self.load_extension(module_name)
+                logger.info(f"'{module_name}' 확장을 리로드했습니다.")
+                results.append((module_name, None))
+            except commands.ExtensionError as e:
+                logger.error(f"'{module_name}' 확장 리로드 실패: {e}")
+                results.append((module_name, e))
+        return results
+
+    async def close(self) -> None:
+        from bot.services.work_queue import close_work_queue
+
+        await close_work_queue()
+        await super().close()
+
+    async def on_ready(self):
+        logger.info(f'{self.user}으로 로그인 성공!')
+        if self._ready_reported:
+            # 재연결에 따른 on_ready 재호출
+            return
+        self._ready_reported = True
+        self.startup_timings["time_to_ready"] = time.perf_counter() - _PROCESS_STARTED_AT
+        summary = ", ".join(f"{name}={sec * 1000:.0f}ms" for name, sec in self.startup_timings.items())
+        logger.info(f"시작 단계별 소요 시간: {summary}")
+
+
+class DuodeBot(_DuodeBotMixin, commands.Bot):
+    pass
+
+
+class ShardedDuodeBot(_DuodeBotMixin, commands.AutoShardedBot):
+    pass
+
+
+def create_bot() -> commands.Bot:
+    """
+    샤딩 설정에 따라 봇 인스턴스를 만듭니다.
+    - AUTO_SHARD 또는 SHARD_COUNT 설정 시 AutoShardedBot (SHARD_IDS로 이 프로세스가 맡을 범위 지정)
+    - 그 외에는 단일 연결 Bot
+    """
+    if bot_config.AUTO_SHARD or bot_config.SHARD_COUNT is not None:
+        logger.info(f"샤딩 모드: shard_count={bot_config.SHARD_COUNT or 'auto'}, shard_ids={bot_config.SHARD_IDS or 'all'}")
+        return ShardedDuodeBot(shard_count=bot_config.SHARD_COUNT, shard_ids=bot_config.SHARD_IDS)
+    return DuodeBot()
+
+
+def main() -> None:
+    bot = create_bot()
+
+    # 요청 추적: TRACE_EXPORT_PATH 설정 시 스팬을 JSONL로 기록하고 Discord API 호출도 스팬으로 남깁니다.
+    configure_tracing(bot_config.TRACE_EXPORT_PATH, service_name=bot_config.TRACE_SERVICE_NAME)
+    install_http_tracing(bot.http)
+    # DB 엔진에 SQL 스팬/풀 메트릭 훅을 붙입니다. (config 계층은 services를 임포트하지 않음)
+    install_db_telemetry()
+
+    # 봇 실행
+    logger.info("봇을 시작합니다...")
+    bot.run(bot_config.DISCORD_BOT_TOKEN)
+
+
+# 작업 큐 프로세스 풀(spawn) 워커가 이 모듈을 다시 임포트해도 봇이 실행되지 않도록 가드합니다.
+if __name__ == "__main__":
+    main()
 
 # python -m bot.main
\ No newline at end of file
@@ -1,9 +1,8 @@
 from typing import Optional
 from sqlmodel import Field, Relationship, SQLModel, Enum, Column
-from sqlalchemy import BigInteger, ForeignKey
-from datetime import datetime
+from sqlalchemy import BigInteger, ForeignKey, Index
+from datetime import date, datetime
 import enum
-from datetime import datetime
 
 class ResourceType(str, enum.Enum):
     TALENT = "gm_talent"
@@ -13,6 +12,8 @@ class ResourceType(str, enum.Enum):
 # 각 GM이 길드별로 가진 리소스의 현재 '잔액'을 저장하는 테이블
 class GMResourceWallet(SQLModel, table=True):
     __tablename__ = "gm_resource_wallet"
+    # 길드별 자원 순위(!금고순위): 상위 N명 조회와 '나보다 많은 사람 수' 집계를 인덱스 범위 스캔으로 처리
+    __table_args__ = (Index("ix_gm_resource_wallet_ranking", "guild_id", "resource_type", "amount"),)
 
     # 복합 기본 키
     user_id: int = Field(sa_column=Column(BigInteger, ForeignKey("user.id"), primary_key=True))
@@ -25,6 +26,14 @@ class GMResourceWallet(SQLModel, table=True):
 # 모든 리소스의 증감 '거래 내역'을 기록하는 테이블
 class GMResourceLog(SQLModel, table=True):
     __tablename__ = "gm_resource_log"
+    # 사용자별 사유 내역(복권 당첨 등)을 (created_at, id) 순으로 읽는 인덱스.
+    # 페이지 조회와 합계 집계가 테이블 행을 읽지 않도록 change_amount까지 포함합니다.
+    __table_args__ = (
+        Index(
+            "ix_gm_resource_log_payouts",
+            "guild_id", "user_id", "resource_type", "reason", "created_at", "id", "change_amount",
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     
@@ -35,5 +44,27 @@ class GMResourceLog(SQLModel, table=True):
     change_amount: int # 예: +10 (획득), -5 (사용)
     reason: str # 예: "주간 세션 진행 보상", "아이템 구매"
     
-    # 레코드가 생성된 시간을 자동으로 기록합니다.
-    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
\ No newline at end of file
+    # 레코드가 생성된 시간을 자동으로 기록합니다. (보존 기간 정리 시 범위 조회용 인덱스)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+
+    # 멱등 키: 같은 명령(메시지)이 재실행되어도 한 번만 반영되도록 '{요청 키}:{변경 순번}'을 기록합니다.
+    # 키 없이 기록된 기존 행은 NULL (유니크 인덱스에서 NULL은 중복 허용)
+    idempotency_key: Optional[str] = Field(default=None, max_length=64, index=True, unique=True)
+    # 이 변경을 반영한 직후의 지갑 잔액. 중복 요청에 원래 결과를 그대로 돌려줄 때 사용합니다.
+    balance_after: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+
+
+# 보존 기간이 지나 정리된 거래 내역의 월별 합계 (gm_resource_log 원본은 압축 아카이브 파일로 보관)
+class GMResourceLogMonthly(SQLModel, table=True):
+    __tablename__ = "gm_resource_log_monthly"
+
+    guild_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    user_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    resource_type: ResourceType = Field(sa_column=Column(Enum(ResourceType), primary_key=True))
+    reason: str = Field(primary_key=True, max_length=191)
+    # 해당 월의 1일 (UTC)
+    month: date = Field(primary_key=True)
+
+    entry_count: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    total_amount: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
\ No newline at end of file
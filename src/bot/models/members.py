@@ -1,6 +1,6 @@
 from typing import List, Optional
 from sqlmodel import Field, Relationship, SQLModel, Enum, Column
-from sqlalchemy import BigInteger, ForeignKey, String
+from sqlalchemy import BigInteger, ForeignKey, Index, String
 import enum
 
 # int를 함께 상속받아, Enum 멤버들을 숫자처럼 비교할 수 있게 됩니다.
@@ -12,6 +12,9 @@ class RoleLevel(int, enum.Enum):
 # Guild와 User 사이의 관계를 정의하는 중간 테이블 모델입니다.
 # SQLModel은 Pydantic의 BaseModel을 상속받으므로 데이터 유효성 검사가 가능합니다.
 class GuildMember(SQLModel, table=True):
+    # 서버 닉네임으로 길드 회원 찾기(닉네임 색인이 아직 없을 때의 DB 조회)용 인덱스
+    __table_args__ = (Index("ix_guildmember_nickname", "guild_id", "server_nickname"),)
+
     # 복합 기본 키 설정
     user_id: int = Field(sa_column=Column(BigInteger, ForeignKey("user.id"), primary_key=True))
     guild_id: int = Field(sa_column=Column(BigInteger, ForeignKey("guild.id"), primary_key=True))
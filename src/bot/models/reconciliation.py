@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel, Field, Column, Enum
+from sqlalchemy import BigInteger
+
+from bot.models.gm_resources import ResourceType
+
+
+# 지갑-거래내역 대사(reconciliation)용 체크포인트.
+# 워터마크(last_log_id)까지의 gm_resource_log 합계를 지갑 키별로 누적해 두어,
+# 다음 실행은 워터마크 이후의 새 로그만 읽고 전체 지갑과 비교합니다.
+class LedgerReconciliationBalance(SQLModel, table=True):
+    __tablename__ = "ledger_reconciliation_balance"
+
+    guild_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    user_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    resource_type: ResourceType = Field(sa_column=Column(Enum(ResourceType), primary_key=True))
+
+    # 워터마크까지의 change_amount 합계 (보존 정책으로 원본 로그가 삭제되어도 유지)
+    log_sum: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+
+
+class LedgerReconciliationWatermark(SQLModel, table=True):
+    __tablename__ = "ledger_reconciliation_watermark"
+
+    name: str = Field(primary_key=True, max_length=64)
+    # 체크포인트에 반영된 마지막 gm_resource_log.id
+    last_log_id: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+    last_run_at: Optional[datetime] = Field(default=None)
+    last_mismatches: int = Field(default=0)
@@ -0,0 +1,176 @@
+"""
+명령어 목록(!명령어) 카탈로그.
+
+분류는 Cog의 help_category 속성(명령별로는 extras={"help_category": ...})에서 가져옵니다.
+분류가 없는 명령은 '기타'로 모읍니다. 새 Cog를 추가할 때는 help_category만 지정하면 됩니다.
+명령 목록과 docstring 파싱, 임베드 렌더링은 한 번만 하고 결과 페이지를 재사용합니다.
+Cog가 추가/제거될 때(확장 로드/언로드 포함)만 봇이 invalidate()를 호출해 다시 만듭니다.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import discord
+from discord.ext import commands
+
+from bot.config import log_config
+from bot.services import metrics
+
+
+logger = log_config.setup_logger()
+
+CATEGORY_ASSETS = "💰 자산 관리"
+CATEGORY_LOTTERY = "🎰 복권"
+CATEGORY_RACE = "🏇 경마"
+CATEGORY_ADMIN = "👤 관리자"
+CATEGORY_HELP = "ℹ️ 도움말"
+CATEGORY_OTHER = "🔧 기타"
+# 표시 순서. 여기 없는 분류는 이름순으로 그 뒤에, '기타'는 항상 마지막에 둡니다.
+CATEGORY_ORDER = (CATEGORY_ASSETS, CATEGORY_LOTTERY, CATEGORY_RACE, CATEGORY_ADMIN, CATEGORY_HELP)
+
+CATALOG_TITLE = "📋 두오데 전술지원시스템 명령어 목록"
+CATALOG_FOOTER = "💡 팁: 각 명령어의 자세한 사용법은 !명령어명을 입력해보세요!"
+
+# Discord 임베드 한도 (필드 값 1024자, 필드 25개, 임베드 전체 6000자)
+_FIELD_VALUE_LIMIT = 1024
+_FIELDS_PER_EMBED = 25
+_EMBED_TOTAL_LIMIT = 6000
+_EMBED_COLOR = 0x5865F2
+
+
+@dataclass(frozen=True)
+class CommandEntry:
+    name: str
+    description: str
+    usage: Optional[str]
+    category: str
+
+    @property
+    def line(self) -> str:
+        if self.usage:
+            return f"!{self.name} - {self.description} | {self.usage}"
+        return f"!{self.name} - {self.description}"
+
+
+def _parse_doc(command: commands.Command) -> tuple[str, Optional[str]]:
+    """docstring 첫 줄을 설명으로, '사용법:'으로 시작하는 줄을 사용법으로 씁니다."""
+    parts = [line.strip() for line in (command.callback.__doc__ or "").splitlines() if line.strip()]
+    description = parts[0] if parts else "(설명 없음)"
+    usage = next((part for part in parts if part.startswith("사용법:")), None)
+    return description, usage
+
+
+def command_category(command: commands.Command) -> str:
+    category = command.extras.get("help_category") or getattr(command.cog, "help_category", None)
+    return category or CATEGORY_OTHER
+
+
+def collect_entries(bot: commands.Bot) -> List[CommandEntry]:
+    entries = []
+    # discord.py 기본 help 명령은 설명이 docstring 형식이 아니므로 목록에서 뺍니다. (!명령어가 대신함)
+    builtin_help = getattr(bot.help_command, "_command_impl", None)
+    for command in bot.commands:
+        if command.hidden or command is builtin_help:
+            continue
+        description, usage = _parse_doc(command)
+        entries.append(
+            CommandEntry(name=command.name, description=description, usage=usage, category=command_category(command))
+        )
+    return entries
+
+
+def _category_key(category: str) -> tuple:
+    if category == CATEGORY_OTHER:
+        return (2, category)
+    if category in CATEGORY_ORDER:
+        return (0, CATEGORY_ORDER.index(category))
+    return (1, category)
+
+
+def _chunk_lines(lines: List[str], limit: int) -> List[str]:
+    """줄 단위로 limit자 이하의 덩어리로 나눕니다. (한 줄이 limit을 넘으면 잘라냄)"""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        if len(line) > limit:
+            line = line[: limit - 1] + "…"
+        added = len(line) + (1 if current else 0)
+        if current and size + added > limit:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+            added = len(line)
+        current.append(line)
+        size += added
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def render_pages(entries: List[CommandEntry]) -> List[discord.Embed]:
+    """분류별 필드로 임베드를 만들고, 필드 수/전체 길이 한도를 넘으면 다음 페이지로 나눕니다."""
+    by_category: Dict[str, List[CommandEntry]] = {}
+    for entry in entries:
+        by_category.setdefault(entry.category, []).append(entry)
+
+    fields: List[tuple[str, str]] = []
+    for category in sorted(by_category, key=_category_key):
+        lines = [entry.line for entry in sorted(by_category[category], key=lambda e: e.name)]
+        for index, chunk in enumerate(_chunk_lines(lines, _FIELD_VALUE_LIMIT)):
+            fields.append((category if index == 0 else f"{category} (계속)", chunk))
+
+    fixed = len(CATALOG_TITLE) + len(CATALOG_FOOTER) + 16  # 페이지 표시 " (n/m)" 여유분
+    pages: List[List[tuple[str, str]]] = [[]]
+    size = fixed
+    for name, value in fields:
+        added = len(name) + len(value)
+        if pages[-1] and (len(pages[-1]) >= _FIELDS_PER_EMBED or size + added > _EMBED_TOTAL_LIMIT):
+            pages.append([])
+            size = fixed
+        pages[-1].append((name, value))
+        size += added
+
+    embeds = []
+    for number, page in enumerate(pages, start=1):
+        title = CATALOG_TITLE if len(pages) == 1 else f"{CATALOG_TITLE} ({number}/{len(pages)})"
+        embed = discord.Embed(title=title, color=_EMBED_COLOR)
+        for name, value in page:
+            embed.add_field(name=name, value=value, inline=False)
+        embed.set_footer(text=CATALOG_FOOTER)
+        embeds.append(embed)
+    return embeds
+
+
+class CommandCatalog:
+    """렌더링된 명령어 목록 페이지 캐시. 무효화된 뒤 처음 조회할 때 한 번만 다시 만듭니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages: Optional[List[discord.Embed]] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._pages = None
+
+    def pages(self, bot: commands.Bot) -> List[discord.Embed]:
+        with self._lock:
+            if self._pages is not None:
+                metrics.incr("command_catalog", result="hit")
+                return self._pages
+            metrics.incr("command_catalog", result="build")
+            entries = collect_entries(bot)
+            self._pages = render_pages(entries)
+            uncategorized = sorted(entry.name for entry in entries if entry.category == CATEGORY_OTHER)
+            if uncategorized:
+                logger.info(f"분류(help_category)가 없는 명령어: {', '.join(uncategorized)}")
+            return self._pages
+
+
+_catalog = CommandCatalog()
+
+
+def get_command_catalog() -> CommandCatalog:
+    return _catalog
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from bot.config import db_config
+from bot.config.db_instrumentation import db_metrics, find_calling_function, normalize_sql
+from bot.services import metrics
+from bot.services.request_context import get_current_span
+from bot.services.tracing import begin_span, end_span, is_tracing_enabled
+
+
+# config 계층의 DB 엔진에 추적/메트릭 훅을 붙입니다.
+# config는 services를 임포트하지 않으므로, 프로세스 시작 시(main/worker) install_db_telemetry()를 한 번 호출합니다.
+_installed = False
+
+
+def _trace_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not is_tracing_enabled() or get_current_span() is None:
+        return
+    operation = statement.lstrip().split(" ", 1)[0].upper()
+    span = begin_span(
+        f"SQL {operation}",
+        kind="CLIENT",
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": normalize_sql(statement),
+            "code.function": find_calling_function(),
+        },
+    )
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _trace_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        end_span(spans.pop())
+
+
+def _trace_handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        end_span(spans.pop(), exception_context.original_exception)
+
+
+def install_sql_tracing(engine: Engine) -> None:
+    """SQL 실행을 현재 스팬(리포지토리 함수 등)의 자식 스팬으로 기록합니다. 추적이 꺼져 있으면 비용이 거의 없습니다."""
+    event.listen(engine, "before_cursor_execute", _trace_before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _trace_after_cursor_execute)
+    event.listen(engine, "handle_error", _trace_handle_error)
+
+
+def _record_pool_gauges(pool, name: str, *, returning: int = 0) -> None:
+    if not isinstance(pool, QueuePool):
+        return
+    # checkin 이벤트는 연결이 풀에 반납되기 직전에 호출되므로 반납 중인 연결(returning)을 반영합니다.
+    metrics.set_gauge("db_pool_in_use", pool.checkedout() - returning, pool=name)
+    metrics.set_gauge("db_pool_idle", pool.checkedin() + returning, pool=name)
+    metrics.set_gauge("db_pool_overflow", max(pool.overflow(), 0), pool=name)
+
+
+def install_pool_metrics(engine: Engine) -> None:
+    """체크아웃/반납 시점마다 사용 중/유휴/오버플로 연결 수를 게이지로 기록합니다. (풀 이름은 db_config가 지정)"""
+    pool = engine.pool
+    name = getattr(pool, "metrics_name", "default")
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _record_pool_gauges(engine.pool, name)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _record_pool_gauges(engine.pool, name, returning=1)
+
+
+def install_db_telemetry() -> None:
+    """
+    주 DB/복제본 엔진에 SQL 스팬과 풀 게이지를 붙이고, config 계층의 DB 메트릭(풀 대기, 재시도, 복제 지연 등)을
+    메트릭 저장소에 연결합니다. 여러 번 호출해도 한 번만 설치합니다.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    db_metrics.connect(metrics)
+    for engine in (db_config.engine, db_config.replica_engine):
+        if engine is None:
+            continue
+        install_sql_tracing(engine)
+        install_pool_metrics(engine)
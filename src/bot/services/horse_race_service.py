@@ -12,8 +12,10 @@ from bot.databases.horse_race_repo import (
     add_participant,
     remove_participant,
 )
+from bot.services.tracing import traced
 
 
+@traced()
 def prepare_race_with_guard(
     session: Session, *, guild_id: int, host_user_id: int, prep_message_id: int
 ):
@@ -22,10 +24,12 @@ def prepare_race_with_guard(
     return True, race
 
 
+@traced()
 def get_latest_prepared_race(session: Session, *, guild_id: int, host_user_id: int):
     return get_latest_prepared_race_by_host(session, guild_id=guild_id, host_user_id=host_user_id)
 
 
+@traced()
 def add_participant_by_reaction(
     session: Session, *, prep_message_id: int, user_id: int, emoji: str | None
 ) -> bool:
@@ -48,6 +52,7 @@ def add_participant_by_reaction(
         return False
 
 
+@traced()
 def remove_participant_by_reaction(
     session: Session, *, prep_message_id: int, user_id: int
 ) -> bool:
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Tuple
+
+from bot.config.db_config import create_session, retry_on_disconnect
+from bot.databases.horse_race_repo import list_participants, get_prepared_race_by_prep_message_id
+from bot.services.horse_race_service import add_participant_by_reaction, remove_participant_by_reaction
+from bot.services.wallet_service import apply_bulk_grant, apply_wallet_batch
+
+
+# 작업 큐(bot.services.work_queue)로 보낼 수 있는 DB 작업들.
+# 게이트웨이와 워커 프로세스 양쪽에서 같은 이름으로 찾기 때문에 인자/반환값은 JSON 직렬화 가능한 값만 사용합니다.
+
+
+# 참가/취소는 (경주, 사용자) 단위로 이미 있으면 건너뛰므로 커밋 후 끊김으로 다시 실행해도 결과가 같습니다.
+@retry_on_disconnect
+def race_add_participant_job(*, prep_message_id: int, user_id: int, emoji: str | None) -> Tuple[bool, bool]:
+    """참가 신청 후 실제로 참가자 목록에 들어갔는지까지 확인합니다. 반환값: (추가 성공, DB 확인 결과)"""
+    with create_session() as session:
+        ok = add_participant_by_reaction(
+            session, prep_message_id=prep_message_id, user_id=user_id, emoji=emoji
+        )
+        if not ok:
+            return False, False
+        race = get_prepared_race_by_prep_message_id(session, prep_message_id=prep_message_id)
+        if race is None:
+            return True, False
+        entries = list_participants(session, race_id=race.id)
+        return True, any(entry[0] == user_id for entry in entries)
+
+
+@retry_on_disconnect
+def race_remove_participant_job(*, prep_message_id: int, user_id: int) -> bool:
+    with create_session() as session:
+        return remove_participant_by_reaction(session, prep_message_id=prep_message_id, user_id=user_id)
+
+
+JOB_HANDLERS: Dict[str, Callable[..., Any]] = {
+    "wallet_batch": apply_wallet_batch,
+    "bulk_grant": apply_bulk_grant,
+    "race_add_participant": race_add_participant_job,
+    "race_remove_participant": race_remove_participant_job,
+}
+
+
+def run_job(job: str, kwargs: Dict[str, Any]) -> Any:
+    """작업 이름으로 핸들러를 찾아 실행합니다. (워커 프로세스의 진입점)"""
+    handler = JOB_HANDLERS.get(job)
+    if handler is None:
+        raise ValueError(f"알 수 없는 작업: {job}")
+    return handler(**kwargs)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlmodel import Session
+
+from bot.config import log_config
+from bot.config.bot_config import LEADERBOARD_CACHE_SEC, LEADERBOARD_SIZE
+from bot.config.db_config import create_read_session, get_read_engine
+from bot.databases.resources_repo import count_wallets_above, get_top_wallets, get_wallet, get_wallet_amounts
+from bot.models.gm_resources import ResourceType
+from bot.services import metrics
+from bot.services.single_flight import SingleFlight
+from bot.services.tracing import traced
+from bot.services.wallet_events import subscribe
+
+
+logger = log_config.setup_logger()
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    rank: int
+    user_id: int
+    name: str
+    amount: int
+
+
+@dataclass
+class LeaderboardView:
+    entries: List[LeaderboardEntry]
+    # 호출한 사용자의 순위 (잔액이 0이면 None)
+    my_rank: Optional[int]
+    my_amount: int
+
+
+@dataclass
+class _CachedBoard:
+    entries: List[LeaderboardEntry]
+    expires_at: float
+
+    @property
+    def user_ids(self) -> Set[int]:
+        return {entry.user_id for entry in self.entries}
+
+    def is_full(self, size: int) -> bool:
+        return len(self.entries) >= size
+
+    @property
+    def threshold(self) -> int:
+        """상위 목록에 들어가기 위한 최소 잔액 (목록 마지막 사람의 잔액)"""
+        return self.entries[-1].amount if self.entries else 0
+
+
+def _ranked(rows) -> List[LeaderboardEntry]:
+    """잔액 내림차순 행에 순위를 매깁니다. 동점은 같은 순위 (count_wallets_above와 같은 기준)"""
+    entries: List[LeaderboardEntry] = []
+    for index, (user_id, amount, name) in enumerate(rows):
+        if entries and entries[-1].amount == amount:
+            rank = entries[-1].rank
+        else:
+            rank = index + 1
+        entries.append(LeaderboardEntry(rank=rank, user_id=user_id, name=name, amount=amount))
+    return entries
+
+
+class LeaderboardCache:
+    """
+    길드별 자원 상위 목록 캐시.
+    - 목록은 ttl_sec 동안 재사용하고, 그 사이의 지갑 변경은 (길드 → 사용자) '변경 표시'로만 모아 둡니다.
+    - 다음 조회 때 표시된 사용자만 골라 잔액을 확인해, 상위 목록에 있던 사람이거나 상위권 경계(threshold) 이상이 된
+      경우에만 목록을 다시 조회합니다. 경계 아래에서의 변경은 목록을 바꾸지 않으므로 캐시를 그대로 씁니다.
+    - 지갑 변경 구독자는 DB 작업 스레드에서 불리므로 내부 상태는 threading.Lock으로 보호합니다.
+    - 변경 표시를 꺼낸 뒤의 확인과 목록 재구성은 주 DB에서 읽습니다. (지연된 복제본에서 읽으면 변경이 반영되지 않은
+      목록이 ttl 동안 남고, 변경 표시는 이미 비워져 다시 확인되지 않음)
+    """
+
+    def __init__(self, *, resource_type: ResourceType, size: int, ttl_sec: float):
+        self.resource_type = resource_type
+        self.size = max(1, size)
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._boards: Dict[int, _CachedBoard] = {}
+        self._dirty: Dict[int, Set[int]] = {}
+        # 목록을 만드는 중인 길드 (그 사이의 변경도 놓치지 않도록 표시)
+        self._building: Dict[int, int] = {}
+
+    def note_write(self, guild_id: int, user_id: int) -> None:
+        with self._lock:
+            if guild_id in self._boards or guild_id in self._building:
+                self._dirty.setdefault(guild_id, set()).add(user_id)
+
+    @traced()
+    def get_top(self, guild_id: int) -> List[LeaderboardEntry]:
+        """동기 조회 (스레드에서 실행). 캐시가 유효하면 DB 접근 없이, 변경 표시가 있으면 해당 사용자만 확인합니다."""
+        with self._lock:
+            board = self._boards.get(guild_id)
+            dirty = self._dirty.pop(guild_id, set())
+            if board is None or board.expires_at <= time.monotonic():
+                board = None
+
+        if board is not None:
+            if not dirty or not self._crosses_threshold(guild_id, board, dirty):
+                metrics.incr("leaderboard_cache", result="hit")
+                return board.entries
+            metrics.incr("leaderboard_cache", result="invalidated")
+        else:
+            metrics.incr("leaderboard_cache", result="miss")
+        return self._rebuild(guild_id)
+
+    def _crosses_threshold(self, guild_id: int, board: _CachedBoard, dirty: Set[int]) -> bool:
+        if dirty & board.user_ids:
+            return True
+        with Session(get_read_engine()) as session:
+            amounts = get_wallet_amounts(
+                session, guild_id=guild_id, user_ids=sorted(dirty), resource_type=self.resource_type
+            )
+        if board.is_full(self.size):
+            return any(amount >= board.threshold for amount in amounts.values())
+        # 목록이 다 차지 않았으면 잔액이 생긴 사람은 모두 목록에 들어갑니다.
+        return any(amount > 0 for amount in amounts.values())
+
+    def _rebuild(self, guild_id: int) -> List[LeaderboardEntry]:
+        with self._lock:
+            self._building[guild_id] = self._building.get(guild_id, 0) + 1
+        try:
+            with Session(get_read_engine()) as session:
+                rows = get_top_wallets(
+                    session, guild_id=guild_id, resource_type=self.resource_type, limit=self.size
+                )
+            entries = _ranked(rows)
+            with self._lock:
+                self._boards[guild_id] = _CachedBoard(entries=entries, expires_at=time.monotonic() + self.ttl_sec)
+            return entries
+        finally:
+            with self._lock:
+                remaining = self._building[guild_id] - 1
+                if remaining:
+                    self._building[guild_id] = remaining
+                else:
+                    del self._building[guild_id]
+
+    @traced()
+    def get_member_rank(
+        self, *, guild_id: int, user_id: int, entries: List[LeaderboardEntry]
+    ) -> Tuple[Optional[int], int]:
+        """(순위, 잔액). 상위 목록에 있으면 목록 값을, 아니면 '나보다 많은 지갑 수' 집계로 순위를 구합니다."""
+        for entry in entries:
+            if entry.user_id == user_id:
+                return entry.rank, entry.amount
+        # 본인 잔액은 방금 바뀌었을 수 있으므로 최근 쓰기 고정(read-your-writes)이 적용되도록 사용자를 넘깁니다.
+        with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+            wallet = get_wallet(session, user_id=user_id, guild_id=guild_id, resource_type=self.resource_type)
+            amount = (wallet.amount or 0) if wallet else 0
+            if amount <= 0:
+                return None, 0
+            above = count_wallets_above(
+                session, guild_id=guild_id, resource_type=self.resource_type, amount=amount
+            )
+        return above + 1, amount
+
+
+_vault_board = LeaderboardCache(
+    resource_type=ResourceType.VAULT, size=LEADERBOARD_SIZE, ttl_sec=LEADERBOARD_CACHE_SEC
+)
+# 캐시가 비어 있을 때 같은 길드의 동시 조회가 목록을 여러 번 만들지 않도록 합칩니다.
+_vault_board_reads = SingleFlight("vault_leaderboard")
+
+
+@subscribe
+def _note_vault_write(guild_id: int, user_id: int) -> None:
+    _vault_board.note_write(guild_id, user_id)
+
+
+async def load_vault_leaderboard(*, guild_id: int, user_id: int) -> LeaderboardView:
+    """길드 금고 상위 목록과 호출한 사용자의 순위를 조회합니다."""
+    entries = await _vault_board_reads.do(guild_id, _vault_board.get_top, guild_id)
+    my_rank, my_amount = await asyncio.to_thread(
+        _vault_board.get_member_rank, guild_id=guild_id, user_id=user_id, entries=entries
+    )
+    return LeaderboardView(entries=entries, my_rank=my_rank, my_amount=my_amount)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, Optional
+
+from sqlmodel import select
+
+from bot.config import log_config
+from bot.config.db_config import create_read_session
+from bot.models.gm_resources import GMResourceLog, GMResourceLogMonthly
+from bot.services.tracing import traced
+
+
+logger = log_config.setup_logger()
+
+
+_COLUMNS = ["id", "created_at", "guild_id", "user_id", "resource_type", "change_amount", "reason"]
+# 이 크기까지는 메모리에 두고, 넘으면 임시 파일로 옮깁니다. (압축된 크기 기준)
+_SPOOL_MAX_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class LedgerExport:
+    file: IO[bytes]
+    filename: str
+    row_count: int
+    size_bytes: int
+    # max_bytes를 넘어 중간에 멈췄으면 True (file은 보내면 안 되는 불완전한 내역)
+    truncated: bool = False
+
+
+@traced()
+def export_ledger_csv(
+    *, guild_id: int, user_id: Optional[int] = None, chunk_size: int = 1000, max_bytes: Optional[int] = None
+) -> LedgerExport:
+    """
+    거래 내역을 gzip CSV로 내보냅니다. user_id가 없으면 길드 전체.
+    - 행은 yield_per로 chunk_size씩 읽어 바로 CSV로 인코딩/압축하므로 메모리 사용량은 내역 크기와 무관합니다.
+    - 보존 정책으로 정리된 월별 합계가 있으면 앞부분에 '월 합계' 행으로 포함합니다. (id 비움)
+    - max_bytes(업로드 한도 등)를 주면 압축된 크기가 이를 넘는 순간 읽기를 멈추고 truncated=True로 반환합니다.
+    반환된 file은 호출 측에서 닫아야 합니다.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+    row_count = 0
+    truncated = False
+
+    monthly_stmt = select(
+        GMResourceLogMonthly.month,
+        GMResourceLogMonthly.guild_id,
+        GMResourceLogMonthly.user_id,
+        GMResourceLogMonthly.resource_type,
+        GMResourceLogMonthly.total_amount,
+        GMResourceLogMonthly.reason,
+        GMResourceLogMonthly.entry_count,
+    ).where(GMResourceLogMonthly.guild_id == guild_id)
+    log_stmt = select(
+        GMResourceLog.id,
+        GMResourceLog.created_at,
+        GMResourceLog.guild_id,
+        GMResourceLog.user_id,
+        GMResourceLog.resource_type,
+        GMResourceLog.change_amount,
+        GMResourceLog.reason,
+    ).where(GMResourceLog.guild_id == guild_id)
+    if user_id is not None:
+        monthly_stmt = monthly_stmt.where(GMResourceLogMonthly.user_id == user_id)
+        log_stmt = log_stmt.where(GMResourceLog.user_id == user_id)
+    monthly_stmt = monthly_stmt.order_by(GMResourceLogMonthly.month, GMResourceLogMonthly.user_id)
+    log_stmt = log_stmt.order_by(GMResourceLog.id).execution_options(yield_per=chunk_size)
+
+    with gzip.GzipFile(fileobj=spool, mode="wb") as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8-sig", newline="")
+        writer = csv.writer(text)
+        writer.writerow(_COLUMNS)
+        with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+            for month, g_id, u_id, resource_type, total, reason, count in session.exec(monthly_stmt):
+                writer.writerow(["", month.isoformat(), g_id, u_id, resource_type.value, total, f"{reason} (월 합계 {count}건)"])
+                row_count += 1
+            for log_id, created_at, g_id, u_id, resource_type, amount, reason in session.exec(log_stmt):
+                writer.writerow([log_id, created_at.isoformat(), g_id, u_id, resource_type.value, amount, reason])
+                row_count += 1
+                # 압축기에 남은 버퍼만큼 늦게 반영되지만, 한도를 넘은 뒤 나머지 내역을 끝까지 읽지 않도록 합니다.
+                if max_bytes is not None and spool.tell() > max_bytes:
+                    truncated = True
+                    break
+        text.flush()
+        text.detach()
+
+    size_bytes = spool.tell()
+    spool.seek(0)
+    scope = f"{guild_id}-{user_id}" if user_id is not None else f"{guild_id}-all"
+    filename = f"ledger-{scope}-{datetime.utcnow():%Y%m%d%H%M%S}.csv.gz"
+    if truncated:
+        logger.info(f"거래 내역 내보내기 중단: {filename} ({row_count}행에서 {max_bytes}바이트 초과)")
+    else:
+        logger.info(f"거래 내역 내보내기: {filename} ({row_count}행, {size_bytes}바이트)")
+    return LedgerExport(
+        file=spool, filename=filename, row_count=row_count, size_bytes=size_bytes, truncated=truncated
+    )
@@ -0,0 +1,282 @@
+"""
+지갑(gm_resource_wallet.amount)과 거래 내역(gm_resource_log.change_amount 합계) 대사.
+
+- 양쪽을 서버 측 커서(stream_results)로 (guild_id, user_id) 순서로 읽어 병합 비교하므로 테이블 전체를 메모리에 올리지 않습니다.
+- 로그 합계는 ledger_reconciliation_balance 체크포인트에 워터마크(last_log_id)까지 누적해 두고,
+  증분 실행은 워터마크 이후의 새 로그만 SQL GROUP BY로 집계해 더합니다.
+- id는 커밋 순서가 아니라 INSERT 순서로 정해지므로, 워터마크는 안전 구간(safety_window_sec)보다 오래된 로그의 최대 id까지만 올립니다.
+  (먼저 id를 받은 긴 트랜잭션이 나중에 커밋되어도 그 로그를 건너뛰지 않도록)
+- 전체 실행은 체크포인트를 월별 합계(보존 정책으로 정리된 내역) + 남아 있는 로그로 다시 만듭니다.
+- 비교 중에도 지갑 변경이 계속되므로, 불일치 후보는 워터마크 이후 로그까지 포함해 한 번 더 확인한 뒤 보고합니다.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, union_all
+
+from bot.config import log_config
+from bot.config.db_config import create_session, get_read_engine
+from bot.models.gm_resources import GMResourceLog, GMResourceLogMonthly, GMResourceWallet, ResourceType
+from bot.models.reconciliation import LedgerReconciliationBalance, LedgerReconciliationWatermark
+from bot.services import metrics
+from bot.services.tracing import traced
+
+
+logger = log_config.setup_logger()
+
+WATERMARK_NAME = "gm_resource_log"
+# 보고서에 담을 최대 불일치 수 (전체 개수는 mismatch_count로 집계)
+_MAX_REPORTED_MISMATCHES = 50
+
+_MemberKey = Tuple[int, int]
+
+# 같은 프로세스의 동시 실행 방지. 호출한 작업(Cog 루프 등)이 취소되어도 스레드가 끝날 때까지 유지됩니다.
+_running = threading.Lock()
+
+
+@dataclass
+class Mismatch:
+    guild_id: int
+    user_id: int
+    resource_type: ResourceType
+    wallet_amount: int
+    ledger_amount: int
+
+    @property
+    def diff(self) -> int:
+        return self.wallet_amount - self.ledger_amount
+
+
+@dataclass
+class ReconciliationReport:
+    full: bool
+    from_log_id: int
+    to_log_id: int
+    wallets_checked: int = 0
+    mismatch_count: int = 0
+    mismatches: List[Mismatch] = field(default_factory=list)
+
+    def summary(self) -> str:
+        mode = "전체" if self.full else "증분"
+        scanned = f"로그 id {self.from_log_id + 1}~{self.to_log_id} 반영" if self.to_log_id > self.from_log_id else "새 로그 없음"
+        lines = [
+            f"{mode} 대사: {scanned}, 지갑 {self.wallets_checked}개 확인",
+            f"불일치: {self.mismatch_count}건",
+        ]
+        for m in self.mismatches[:10]:
+            lines.append(
+                f"- guild={m.guild_id} user={m.user_id} {m.resource_type.name}: "
+                f"지갑 {m.wallet_amount} / 내역 {m.ledger_amount} (차이 {m.diff:+d})"
+            )
+        if self.mismatch_count > 10:
+            lines.append(f"... 외 {self.mismatch_count - 10}건")
+        return "\n".join(lines)
+
+
+def reconciled_through_log_id() -> Optional[int]:
+    """체크포인트에 반영된 마지막 로그 id. 대사를 한 번도 실행하지 않았으면 None."""
+    with create_session() as session:
+        watermark = session.get(LedgerReconciliationWatermark, WATERMARK_NAME)
+        return watermark.last_log_id if watermark is not None else None
+
+
+def _stream(connection, stmt, chunk_size: int):
+    return connection.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+
+
+def _group_by_member(rows) -> Iterator[Tuple[_MemberKey, Dict[ResourceType, int]]]:
+    """(guild_id, user_id, resource_type, amount) 행을 (guild_id, user_id) 단위로 묶습니다. (입력은 같은 순서로 정렬되어 있어야 함)"""
+    current_key: Optional[_MemberKey] = None
+    values: Dict[ResourceType, int] = {}
+    for guild_id, user_id, resource_type, amount in rows:
+        key = (guild_id, user_id)
+        if key != current_key:
+            if current_key is not None:
+                yield current_key, values
+            current_key, values = key, {}
+        values[resource_type] = values.get(resource_type, 0) + int(amount or 0)
+    if current_key is not None:
+        yield current_key, values
+
+
+def _merge(left, right) -> Iterator[Tuple[_MemberKey, Dict[ResourceType, int], Dict[ResourceType, int]]]:
+    """정렬된 두 스트림을 키 기준으로 병합합니다. 한쪽에만 있는 키는 빈 딕셔너리와 짝지어집니다."""
+    left_item = next(left, None)
+    right_item = next(right, None)
+    while left_item is not None or right_item is not None:
+        if right_item is None or (left_item is not None and left_item[0] < right_item[0]):
+            yield left_item[0], left_item[1], {}
+            left_item = next(left, None)
+        elif left_item is None or right_item[0] < left_item[0]:
+            yield right_item[0], {}, right_item[1]
+            right_item = next(right, None)
+        else:
+            yield left_item[0], left_item[1], right_item[1]
+            left_item = next(left, None)
+            right_item = next(right, None)
+
+
+def _rebuild_checkpoint(session, to_log_id: int, chunk_size: int) -> None:
+    """체크포인트를 월별 합계 + to_log_id까지의 로그로 다시 만듭니다."""
+    session.exec(delete(LedgerReconciliationBalance))
+    log_part = select(
+        GMResourceLog.guild_id, GMResourceLog.user_id, GMResourceLog.resource_type,
+        GMResourceLog.change_amount.label("amount"),
+    ).where(GMResourceLog.id <= to_log_id)
+    monthly_part = select(
+        GMResourceLogMonthly.guild_id, GMResourceLogMonthly.user_id, GMResourceLogMonthly.resource_type,
+        GMResourceLogMonthly.total_amount.label("amount"),
+    )
+    combined = union_all(log_part, monthly_part).subquery()
+    stmt = (
+        select(combined.c.guild_id, combined.c.user_id, combined.c.resource_type, func.sum(combined.c.amount))
+        .group_by(combined.c.guild_id, combined.c.user_id, combined.c.resource_type)
+    )
+    with get_read_engine().connect() as connection:
+        batch = []
+        for guild_id, user_id, resource_type, amount in _stream(connection, stmt, chunk_size):
+            batch.append({
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "resource_type": resource_type,
+                "log_sum": int(amount or 0),
+            })
+            if len(batch) >= chunk_size:
+                session.exec(insert(LedgerReconciliationBalance), params=batch)
+                batch = []
+        if batch:
+            session.exec(insert(LedgerReconciliationBalance), params=batch)
+
+
+def _apply_new_logs(session, from_log_id: int, to_log_id: int, chunk_size: int) -> None:
+    """워터마크 이후 로그를 지갑 키별로 SQL에서 집계해 체크포인트에 더합니다."""
+    stmt = (
+        select(GMResourceLog.guild_id, GMResourceLog.user_id, GMResourceLog.resource_type, func.sum(GMResourceLog.change_amount))
+        .where(GMResourceLog.id > from_log_id, GMResourceLog.id <= to_log_id)
+        .group_by(GMResourceLog.guild_id, GMResourceLog.user_id, GMResourceLog.resource_type)
+    )
+    with get_read_engine().connect() as connection:
+        for guild_id, user_id, resource_type, amount in _stream(connection, stmt, chunk_size):
+            balance = session.get(LedgerReconciliationBalance, (guild_id, user_id, resource_type))
+            if balance is None:
+                balance = LedgerReconciliationBalance(
+                    guild_id=guild_id, user_id=user_id, resource_type=resource_type, log_sum=0
+                )
+            balance.log_sum += int(amount or 0)
+            session.add(balance)
+
+
+def _recheck(guild_id: int, user_id: int, resource_type: ResourceType, to_log_id: int) -> Optional[Mismatch]:
+    """비교 도중의 지갑 변경을 배제하기 위해 한 트랜잭션에서 지갑과 (체크포인트 + 이후 로그)를 다시 읽습니다."""
+    with create_session() as session:
+        wallet = session.get(GMResourceWallet, (user_id, guild_id, resource_type))
+        balance = session.get(LedgerReconciliationBalance, (guild_id, user_id, resource_type))
+        newer = session.exec(
+            select(func.coalesce(func.sum(GMResourceLog.change_amount), 0)).where(
+                GMResourceLog.guild_id == guild_id,
+                GMResourceLog.user_id == user_id,
+                GMResourceLog.resource_type == resource_type,
+                GMResourceLog.id > to_log_id,
+            )
+        ).one()[0]
+    wallet_amount = (wallet.amount or 0) if wallet is not None else 0
+    ledger_amount = (balance.log_sum if balance is not None else 0) + int(newer or 0)
+    if wallet_amount == ledger_amount:
+        return None
+    return Mismatch(guild_id, user_id, resource_type, wallet_amount, ledger_amount)
+
+
+def _compare(report: ReconciliationReport, chunk_size: int) -> None:
+    wallets = (
+        select(GMResourceWallet.guild_id, GMResourceWallet.user_id, GMResourceWallet.resource_type, GMResourceWallet.amount)
+        .order_by(GMResourceWallet.guild_id, GMResourceWallet.user_id)
+    )
+    balances = (
+        select(
+            LedgerReconciliationBalance.guild_id, LedgerReconciliationBalance.user_id,
+            LedgerReconciliationBalance.resource_type, LedgerReconciliationBalance.log_sum,
+        )
+        .order_by(LedgerReconciliationBalance.guild_id, LedgerReconciliationBalance.user_id)
+    )
+    # MySQL 서버 측 커서는 연결당 하나만 열 수 있으므로 스트림마다 연결을 따로 씁니다.
+    read_engine = get_read_engine()
+    with read_engine.connect() as wallet_conn, read_engine.connect() as balance_conn:
+        merged = _merge(
+            _group_by_member(_stream(wallet_conn, wallets, chunk_size)),
+            _group_by_member(_stream(balance_conn, balances, chunk_size)),
+        )
+        for (guild_id, user_id), wallet_amounts, ledger_amounts in merged:
+            report.wallets_checked += len(wallet_amounts)
+            for resource_type in set(wallet_amounts) | set(ledger_amounts):
+                if wallet_amounts.get(resource_type, 0) == ledger_amounts.get(resource_type, 0):
+                    continue
+                mismatch = _recheck(guild_id, user_id, resource_type, report.to_log_id)
+                if mismatch is None:
+                    continue
+                report.mismatch_count += 1
+                if len(report.mismatches) < _MAX_REPORTED_MISMATCHES:
+                    report.mismatches.append(mismatch)
+
+
+@traced()
+def run_reconciliation(
+    *, full: bool = False, chunk_size: int = 1000, safety_window_sec: int = 300
+) -> Optional[ReconciliationReport]:
+    """
+    지갑-거래내역 대사를 실행합니다. (동기, 스레드에서 실행) 이미 실행 중이면 None.
+    - 체크포인트가 없거나 full=True면 전체 재구성, 그 외에는 워터마크 이후 로그만 반영
+    - safety_window_sec 이내에 생성된 로그는 다음 실행에서 반영합니다. (비교 시에는 워터마크 이후 로그로 함께 확인)
+    """
+    if not _running.acquire(blocking=False):
+        return None
+    try:
+        return _reconcile(full=full, chunk_size=chunk_size, safety_window_sec=safety_window_sec)
+    finally:
+        _running.release()
+
+
+def _reconcile(*, full: bool, chunk_size: int, safety_window_sec: int) -> ReconciliationReport:
+    with create_session() as session:
+        watermark = session.get(LedgerReconciliationWatermark, WATERMARK_NAME)
+        if watermark is None:
+            watermark = LedgerReconciliationWatermark(name=WATERMARK_NAME, last_log_id=0)
+            full = True
+        from_log_id = 0 if full else watermark.last_log_id
+        # 이번 실행이 반영할 상한을 먼저 고정합니다. (이후 들어오는 로그는 다음 실행 몫)
+        # 최근 로그는 더 작은 id의 트랜잭션이 아직 커밋 전일 수 있으므로 안전 구간보다 오래된 로그까지만 반영합니다.
+        # 보존 정책으로 로그가 모두 정리되어도 워터마크가 뒤로 가지 않도록 이전 값 이상으로 유지합니다.
+        settled_before = datetime.utcnow() - timedelta(seconds=safety_window_sec)
+        to_log_id = session.exec(
+            select(func.coalesce(func.max(GMResourceLog.id), 0)).where(GMResourceLog.created_at < settled_before)
+        ).one()[0]
+        to_log_id = max(int(to_log_id), watermark.last_log_id)
+
+        if full:
+            _rebuild_checkpoint(session, to_log_id, chunk_size)
+        else:
+            _apply_new_logs(session, from_log_id, to_log_id, chunk_size)
+        watermark.last_log_id = to_log_id
+        session.add(watermark)
+        session.commit()
+
+    report = ReconciliationReport(full=full, from_log_id=from_log_id, to_log_id=to_log_id)
+    _compare(report, chunk_size)
+
+    with create_session() as session:
+        watermark = session.get(LedgerReconciliationWatermark, WATERMARK_NAME)
+        watermark.last_run_at = datetime.utcnow()
+        watermark.last_mismatches = report.mismatch_count
+        session.add(watermark)
+        session.commit()
+
+    metrics.set_gauge("ledger_mismatches", report.mismatch_count)
+    if report.mismatch_count:
+        logger.warning(f"지갑-거래내역 불일치 발견:\n{report.summary()}")
+    else:
+        logger.info(f"지갑-거래내역 대사 완료: {report.summary()}")
+    return report
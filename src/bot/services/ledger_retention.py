@@ -0,0 +1,271 @@
+"""
+거래 내역(gm_resource_log) 보존 정책.
+
+보존 기간이 지난 행을 청크 단위로
+  1) 읽어서 월별 gzip CSV 아카이브 파일에 덧붙이고 (쓰기 트랜잭션 밖)
+  2) 쓰기 트랜잭션에서 아직 남아 있는 행을 잠가 다시 읽은 뒤
+  3) 그 행만 (길드, 사용자, 자원, 사유, 월) 합계를 gm_resource_log_monthly에 더하고 삭제합니다.
+지갑-거래내역 대사 체크포인트가 있으면 그 워터마크까지 반영된 로그만 정리합니다.
+합계 반영과 삭제가 한 트랜잭션이고 실제로 지운 행만 더하므로 중간에 실패하거나 겹쳐 실행되어도 이중 집계되지 않습니다.
+(아카이브 파일은 삭제 전에 기록하므로 실패 후 재실행 시 일부 행이 중복 기록될 수는 있지만 유실되지는 않습니다)
+여러 프로세스(샤드)에서 동시에 실행되지 않도록 MySQL에서는 GET_LOCK으로 실행 전체를 감쌉니다.
+
+MySQL에서 gm_resource_log가 created_at 기준 RANGE 파티션으로 구성되어 있으면
+보존 기간 이전 구간의 파티션은 정리 후 비어 있는지 확인하고 DROP PARTITION으로 공간을 즉시 반환합니다.
+파티션 구성은 외래 키 제거와 기본 키 변경(id, created_at)이 필요한 운영 작업이라 자동으로 수행하지 않습니다.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, text
+from sqlmodel import Session, select
+
+from bot.config import log_config
+from bot.config.db_config import create_session, get_engine
+from bot.models.gm_resources import GMResourceLog, GMResourceLogMonthly, ResourceType
+from bot.services.ledger_reconciliation import reconciled_through_log_id
+from bot.services.tracing import traced
+
+
+logger = log_config.setup_logger()
+
+_ARCHIVE_COLUMNS = ["id", "guild_id", "user_id", "resource_type", "change_amount", "reason", "created_at"]
+
+_RollupKey = Tuple[int, int, ResourceType, str, date]
+
+# 같은 프로세스의 동시 실행 방지. 호출한 작업(Cog 루프 등)이 취소되어도 스레드가 끝날 때까지 유지되므로
+# 리로드 직후의 새 루프가 같은 아카이브 파일에 동시에 덧붙이지 않습니다.
+_running = threading.Lock()
+# 프로세스 간 동시 실행 방지용 MySQL 이름 잠금 (세션 단위라 연결이 끊기면 자동으로 풀림)
+_DB_LOCK_NAME = "bot.ledger_retention"
+
+
+@dataclass
+class RetentionReport:
+    cutoff: datetime
+    archived_rows: int = 0
+    chunks: int = 0
+    months: List[str] = field(default_factory=list)
+    dropped_partitions: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        months = ", ".join(self.months) if self.months else "-"
+        dropped = ", ".join(self.dropped_partitions) if self.dropped_partitions else "-"
+        return (
+            f"기준 시각 {self.cutoff:%Y-%m-%d} 이전 {self.archived_rows}건 정리 ({self.chunks}회)\n"
+            f"월: {months}\n"
+            f"삭제한 파티션: {dropped}"
+        )
+
+
+def retention_cutoff(retention_days: int, now: Optional[datetime] = None) -> datetime:
+    """보존 기간 경계. 월 합계가 잘게 나뉘지 않도록 하루 단위(UTC 자정)로 내립니다."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_of(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _append_archive(archive_dir: str, rows: List[GMResourceLog]) -> List[str]:
+    """행을 월별 gzip CSV 파일에 덧붙이고 기록한 월 목록을 반환합니다. (gzip은 멤버를 이어 붙여도 하나의 파일로 읽힘)"""
+    by_month: Dict[date, List[GMResourceLog]] = defaultdict(list)
+    for row in rows:
+        by_month[_month_of(row.created_at)].append(row)
+
+    os.makedirs(archive_dir, exist_ok=True)
+    months = []
+    for month, month_rows in sorted(by_month.items()):
+        path = os.path.join(archive_dir, f"gm_resource_log-{month:%Y-%m}.csv.gz")
+        is_new = not os.path.exists(path)
+        with gzip.open(path, "at", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(_ARCHIVE_COLUMNS)
+            for row in month_rows:
+                writer.writerow([
+                    row.id,
+                    row.guild_id,
+                    row.user_id,
+                    row.resource_type.value,
+                    row.change_amount,
+                    row.reason,
+                    row.created_at.isoformat(),
+                ])
+            f.flush()
+        months.append(f"{month:%Y-%m}")
+    return months
+
+
+def _add_to_rollup(session: Session, rows: List[GMResourceLog]) -> None:
+    totals: Dict[_RollupKey, List[int]] = defaultdict(lambda: [0, 0])
+    for row in rows:
+        key = (row.guild_id, row.user_id, row.resource_type, row.reason, _month_of(row.created_at))
+        totals[key][0] += 1
+        totals[key][1] += int(row.change_amount)
+
+    now = datetime.utcnow()
+    for (guild_id, user_id, resource_type, reason, month), (count, amount) in totals.items():
+        summary = session.get(GMResourceLogMonthly, (guild_id, user_id, resource_type, reason, month))
+        if summary is None:
+            summary = GMResourceLogMonthly(
+                guild_id=guild_id,
+                user_id=user_id,
+                resource_type=resource_type,
+                reason=reason,
+                month=month,
+                entry_count=0,
+                total_amount=0,
+            )
+        summary.entry_count += count
+        summary.total_amount += amount
+        summary.updated_at = now
+        session.add(summary)
+
+
+def _archive_chunk(
+    cutoff: datetime, archive_dir: str, chunk_size: int, max_log_id: Optional[int]
+) -> Tuple[int, int, List[str]]:
+    """보존 기간이 지난 행 chunk_size개를 아카이브/요약/삭제합니다. 반환: (읽은 행 수, 삭제한 행 수, 기록한 월 목록)"""
+    stmt = select(GMResourceLog).where(GMResourceLog.created_at < cutoff)
+    if max_log_id is not None:
+        stmt = stmt.where(GMResourceLog.id <= max_log_id)
+    with create_session() as session:
+        rows = list(session.exec(stmt.order_by(GMResourceLog.id).limit(chunk_size)).all())
+    if not rows:
+        return 0, 0, []
+
+    # 파일 기록은 잠금을 쥔 쓰기 트랜잭션 밖에서 합니다.
+    months = _append_archive(archive_dir, rows)
+
+    with create_session() as session:
+        # 그 사이 다른 실행이 정리한 행은 빼고, 이 트랜잭션에서 실제로 지우는 행만 합계에 더합니다.
+        present = list(
+            session.exec(
+                select(GMResourceLog)
+                .where(GMResourceLog.id.in_([row.id for row in rows]))
+                .with_for_update()
+            ).all()
+        )
+        if not present:
+            return len(rows), 0, months
+        _add_to_rollup(session, present)
+        result = session.exec(delete(GMResourceLog).where(GMResourceLog.id.in_([row.id for row in present])))
+        if result.rowcount != len(present):
+            session.rollback()
+            raise RuntimeError(f"거래 내역 삭제 수 불일치: 예상 {len(present)}건, 실제 {result.rowcount}건")
+        session.commit()
+    if len(present) < len(rows):
+        logger.warning(f"보존 정리 중 다른 실행이 먼저 정리한 행 {len(rows) - len(present)}건을 건너뜀")
+    return len(rows), len(present), months
+
+
+def _partition_upper_bound(description: str) -> Optional[datetime]:
+    """information_schema.PARTITIONS의 RANGE 상한값을 datetime으로 변환합니다. (MAXVALUE는 None)"""
+    value = (description or "").strip().strip("'")
+    if not value or value.upper() == "MAXVALUE":
+        return None
+    if value.isdigit():
+        # PARTITION BY RANGE (TO_DAYS(created_at)): MySQL TO_DAYS('0001-01-01') = 366
+        return datetime.combine(date.fromordinal(int(value) - 365), datetime.min.time())
+    return datetime.fromisoformat(value)
+
+
+def _drop_expired_partitions(cutoff: datetime) -> List[str]:
+    engine = get_engine()
+    if engine.dialect.name != "mysql":
+        return []
+
+    dropped: List[str] = []
+    with engine.connect() as connection:
+        partitions = connection.exec_driver_sql(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'gm_resource_log' "
+            "AND PARTITION_METHOD LIKE 'RANGE%' ORDER BY PARTITION_ORDINAL_POSITION"
+        ).all()
+        for name, description in partitions:
+            upper = _partition_upper_bound(description)
+            if upper is None or upper > cutoff:
+                continue
+            # 정리에서 빠진 행(동시 삽입 등)이 남아 있으면 지우지 않습니다.
+            remaining = connection.exec_driver_sql(
+                f"SELECT 1 FROM gm_resource_log PARTITION (`{name}`) LIMIT 1"
+            ).first()
+            if remaining is not None:
+                logger.warning(f"파티션 {name}에 정리되지 않은 행이 있어 유지합니다.")
+                continue
+            connection.exec_driver_sql(f"ALTER TABLE gm_resource_log DROP PARTITION `{name}`")
+            dropped.append(name)
+    return dropped
+
+
+@traced()
+def run_ledger_retention(
+    *, retention_days: int, archive_dir: str, chunk_size: int, now: Optional[datetime] = None
+) -> Optional[RetentionReport]:
+    """보존 기간이 지난 거래 내역을 월별 합계 + 아카이브로 옮기고 삭제합니다. (동기, 스레드에서 실행) 이미 실행 중이면 None."""
+    if not _running.acquire(blocking=False):
+        return None
+    try:
+        with _exclusive_run() as acquired:
+            if not acquired:
+                logger.info("다른 프로세스에서 거래 내역 보존 정리가 진행 중이라 건너뜁니다.")
+                return None
+            return _run_retention(retention_days, archive_dir, chunk_size, now)
+    finally:
+        _running.release()
+
+
+@contextmanager
+def _exclusive_run() -> Iterator[bool]:
+    """
+    프로세스 간 실행 잠금. MySQL은 GET_LOCK을 실행이 끝날 때까지 쥐고 있고,
+    그 외(SQLite 등 단일 프로세스 구성)는 프로세스 내 잠금만으로 충분하다고 보고 항상 True입니다.
+    """
+    engine = get_engine()
+    if engine.dialect.name != "mysql":
+        yield True
+        return
+    with engine.connect() as connection:
+        acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": _DB_LOCK_NAME}).scalar() == 1
+        # 이름 잠금은 세션 단위이므로 읽기 트랜잭션은 바로 끝내 둡니다.
+        connection.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": _DB_LOCK_NAME})
+                connection.commit()
+
+
+def _run_retention(retention_days: int, archive_dir: str, chunk_size: int, now: Optional[datetime]) -> RetentionReport:
+    report = RetentionReport(cutoff=retention_cutoff(retention_days, now))
+    # 대사 체크포인트가 있으면 아직 대사에 반영되지 않은 로그는 정리하지 않습니다. (증분 대사 누락 방지)
+    max_log_id = reconciled_through_log_id()
+    months = set()
+    while True:
+        fetched, deleted, chunk_months = _archive_chunk(report.cutoff, archive_dir, chunk_size, max_log_id)
+        if fetched == 0:
+            break
+        report.archived_rows += deleted
+        report.chunks += 1
+        months.update(chunk_months)
+        if fetched < chunk_size:
+            break
+
+    report.months = sorted(months)
+    report.dropped_partitions = _drop_expired_partitions(report.cutoff)
+    logger.info(f"거래 내역 보존 정리 완료: {report.summary()}")
+    return report
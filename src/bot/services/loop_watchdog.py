@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from types import FrameType
+from typing import Optional
+
+from bot.config import log_config
+from bot.services.request_context import current_operation
+
+
+logger = log_config.setup_logger()
+
+# 정지가 끝나지 않을 때 중간 경고를 남기는 간격(초)
+_STILL_STALLED_REPORT_SEC = 5.0
+
+
+class LoopWatchdog:
+    """
+    별도 스레드에서 이벤트 루프의 응답 지연(lag)을 측정하는 워치독.
+
+    주기적으로 call_soon_threadsafe로 콜백을 예약하고, 콜백이 threshold 안에 실행되지 않으면
+    루프 스레드의 스택을 수집합니다. 정지가 풀리면 총 지연 시간, 스택, 당시 실행 중이던
+    명령/리스너(request_context.current_operation)를 함께 로그로 남깁니다.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        threshold_sec: float,
+        interval_sec: float,
+    ):
+        self.loop = loop
+        self.threshold_sec = threshold_sec
+        self.interval_sec = interval_sec
+        self.max_lag_sec = 0.0
+        self.stall_count = 0
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """루프 스레드 안에서 호출해야 합니다. (루프 스레드 식별자를 기록)"""
+        if self._thread is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"이벤트 루프 워치독 시작 (임계값 {self.threshold_sec * 1000:.0f}ms, "
+            f"주기 {self.interval_sec * 1000:.0f}ms)"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            ack = threading.Event()
+            sent_at = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(ack.set)
+            except RuntimeError:
+                # 루프가 닫힘
+                return
+
+            if not ack.wait(self.threshold_sec):
+                self._handle_stall(ack, sent_at)
+            else:
+                lag = time.monotonic() - sent_at
+                self.max_lag_sec = max(self.max_lag_sec, lag)
+
+            self._stop.wait(self.interval_sec)
+
+    def _handle_stall(self, ack: threading.Event, sent_at: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "(스택 수집 실패)"
+        blocking_call = _innermost_bot_frame(frame)
+        task_name, operation = self._current_task_info()
+
+        # 정지가 풀릴 때까지 대기 (너무 길어지면 중간 경고)
+        while not ack.wait(_STILL_STALLED_REPORT_SEC):
+            if self._stop.is_set():
+                return
+            logger.warning(
+                f"이벤트 루프 정지 지속 중: {time.monotonic() - sent_at:.1f}s, "
+                f"작업={operation or '-'}, 호출={blocking_call or '-'}"
+            )
+
+        duration = time.monotonic() - sent_at
+        self.stall_count += 1
+        self.max_lag_sec = max(self.max_lag_sec, duration)
+        logger.warning(
+            f"이벤트 루프 정지 감지: {duration * 1000:.0f}ms, "
+            f"작업={operation or '-'}, 태스크={task_name or '-'}, 호출={blocking_call or '-'}\n{stack}"
+        )
+
+    def _current_task_info(self) -> tuple[Optional[str], Optional[str]]:
+        """정지 시점에 루프에서 실행 중이던 태스크 이름과 그 컨텍스트의 current_operation."""
+        try:
+            task = asyncio.current_task(self.loop)
+        except Exception:
+            return None, None
+        if task is None:
+            return None, None
+        try:
+            operation = task.get_context().get(current_operation)
+        except Exception:
+            operation = None
+        return task.get_name(), operation
+
+
+def _innermost_bot_frame(frame: Optional[FrameType]) -> Optional[str]:
+    """스택에서 가장 안쪽의 bot 패키지 함수 이름을 찾아 '모듈.함수' 형태로 반환합니다."""
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("bot."):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
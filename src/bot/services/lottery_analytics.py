@@ -0,0 +1,302 @@
+"""
+복권 통계 분석 (!복권통계).
+
+당첨 로그에서 (created_at, change_amount) 두 컬럼만 읽어 numpy 배열로 옮긴 뒤 벡터 연산으로 계산합니다.
+- 각 당첨금의 백분위: 길드 상금표의 누적분포(CDF)로 계산 (구간별 균등 분포를 한 번에 브로드캐스트)
+- 최장 연속 기록: 기댓값 이상(상승) / 미만(하락) 당첨이 이어진 최대 횟수
+- 30일 이동 수익률: 일별 합계/횟수의 누적합 차이로 모든 30일 구간을 한 번에 계산
+- 당첨금 분포: 상금표 구간(구간이 하나면 10등분)별 실제 횟수와 이론 비율
+
+계산은 스레드에서 실행하고 결과는 (길드, 사용자) 단위로 캐시합니다.
+해당 사용자의 지갑이 바뀌면(복권 당첨 포함) 그 사용자와 길드 전체 분석 캐시를 지웁니다.
+numpy가 없으면 AnalyticsUnavailable을 발생시킵니다. (analytics extra)
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from bot.config import log_config
+from bot.config.db_config import create_read_session, retry_on_disconnect
+from bot.databases.resources_repo import iter_lottery_payout_columns, sum_lottery_payout_monthly
+from bot.services import metrics
+from bot.services.lottery_tables import PayoutTable, get_payout_table
+from bot.services.single_flight import SingleFlight
+from bot.services.tracing import traced
+from bot.services.wallet_events import subscribe
+
+
+logger = log_config.setup_logger()
+
+ROLLING_WINDOW_DAYS = 30
+# 최고/최저 30일 수익률은 이 횟수 이상 당첨된 구간만 비교합니다. (표본이 너무 작은 구간 제외)
+ROLLING_MIN_DRAWS = 5
+_EQUAL_BINS = 10
+_CACHE_MAX_ENTRIES = 1024
+
+
+class AnalyticsUnavailable(RuntimeError):
+    """numpy가 설치되지 않아 분석을 할 수 없을 때 발생합니다."""
+
+
+@dataclass
+class HistogramBin:
+    low: int
+    high: int
+    count: int
+    # 상금표 기준 이 구간에 들어갈 확률
+    expected_share: float
+    label: str = ""
+
+
+@dataclass
+class LotteryAnalytics:
+    guild_id: int
+    user_id: Optional[int]
+    # 개별 로그 + 보존 정책으로 정리된 월 합계
+    draws: int
+    total: int
+    expected_total: float
+    # 정리되어 개별 분석(백분위/연속/분포)에서 빠진 횟수
+    archived_draws: int = 0
+    median_percentile: Optional[float] = None
+    best_payout: Optional[int] = None
+    best_percentile: Optional[float] = None
+    last_payout: Optional[int] = None
+    last_percentile: Optional[float] = None
+    longest_hot: int = 0
+    longest_cold: int = 0
+    roi_30d: Optional[float] = None
+    roi_30d_best: Optional[float] = None
+    roi_30d_worst: Optional[float] = None
+    histogram: List[HistogramBin] = field(default_factory=list)
+
+    @property
+    def roi(self) -> float:
+        """수익률(%, 본전=0%)"""
+        return (self.total / self.expected_total - 1.0) * 100.0 if self.expected_total > 0 else 0.0
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise AnalyticsUnavailable(
+            "복권 분석에는 numpy가 필요합니다. (pip install 'duode-tactical-support[analytics]')"
+        ) from exc
+    return np
+
+
+def _fetch_columns(np, *, guild_id: int, user_id: Optional[int]):
+    """당첨 로그를 (일 단위 datetime64 배열, int64 당첨금 배열)과 정리된 (횟수, 합계)로 읽습니다."""
+    times: List = []
+    amounts: List = []
+    with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+        for rows in iter_lottery_payout_columns(session, guild_id=guild_id, user_id=user_id):
+            created, paid = zip(*rows)
+            times.append(np.array(created, dtype="datetime64[D]"))
+            amounts.append(np.fromiter(paid, dtype=np.int64, count=len(paid)))
+        archived = sum_lottery_payout_monthly(session, guild_id=guild_id, user_id=user_id)
+    if not amounts:
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.int64), archived
+    return np.concatenate(times), np.concatenate(amounts), archived
+
+
+def _tier_arrays(np, table: PayoutTable):
+    low = np.array([tier.minimum for tier in table.tiers], dtype=np.float64)
+    width = np.array([tier.width for tier in table.tiers], dtype=np.float64)
+    prob = np.array(table.probabilities, dtype=np.float64)
+    return low, width, prob
+
+
+def _cdf(np, table: PayoutTable, values):
+    """상금표에서 당첨금이 value 이하일 확률 P(X <= value) (values: 배열)"""
+    low, width, prob = _tier_arrays(np, table)
+    values = np.asarray(values, dtype=np.float64)[:, None]
+    covered = np.clip((np.floor(values) - low + 1) / width, 0.0, 1.0)
+    return covered @ prob
+
+
+def _longest_run(np, mask) -> int:
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def _rolling_roi(np, days, amounts, expected: float, today) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """(오늘까지 30일 수익률, 최고 30일 수익률, 최저 30일 수익률) (%)"""
+    if days.size == 0 or expected <= 0:
+        return None, None, None
+    start = days.min()
+    index = (days - start).astype(np.int64)
+    span = max(int((today - start).astype(np.int64)), int(index.max())) + 1
+    daily_total = np.bincount(index, weights=amounts, minlength=span)
+    daily_count = np.bincount(index, minlength=span)
+
+    total_cs = np.concatenate(([0.0], np.cumsum(daily_total)))
+    count_cs = np.concatenate(([0], np.cumsum(daily_count)))
+    ends = np.arange(1, span + 1)
+    starts = np.maximum(ends - ROLLING_WINDOW_DAYS, 0)
+    window_total = total_cs[ends] - total_cs[starts]
+    window_count = count_cs[ends] - count_cs[starts]
+
+    def roi(i):
+        return float((window_total[i] / (window_count[i] * expected) - 1.0) * 100.0)
+
+    current = roi(-1) if window_count[-1] > 0 else None
+    eligible = np.flatnonzero(window_count >= ROLLING_MIN_DRAWS)
+    if eligible.size == 0:
+        return current, None, None
+    rois = (window_total[eligible] / (window_count[eligible] * expected) - 1.0) * 100.0
+    return current, float(rois.max()), float(rois.min())
+
+
+def _histogram(np, table: PayoutTable, amounts) -> List[HistogramBin]:
+    if len(table.tiers) > 1:
+        ranges = [(tier.minimum, tier.maximum, tier.label) for tier in sorted(table.tiers, key=lambda t: t.minimum)]
+    else:
+        tier = table.tiers[0]
+        edges = np.unique(np.linspace(tier.minimum, tier.maximum + 1, _EQUAL_BINS + 1).round().astype(np.int64))
+        ranges = [(int(lo), int(hi) - 1, "") for lo, hi in zip(edges[:-1], edges[1:])]
+
+    lows = np.array([lo for lo, _, _ in ranges], dtype=np.int64)
+    highs = np.array([hi for _, hi, _ in ranges], dtype=np.int64)
+    # 구간이 겹치지 않는다고 보고, 각 당첨금을 시작값 기준으로 구간에 배정합니다.
+    slot = np.searchsorted(lows, amounts, side="right") - 1
+    inside = (slot >= 0) & (amounts <= highs[np.clip(slot, 0, None)])
+    counts = np.bincount(slot[inside], minlength=len(ranges))
+    shares = _cdf(np, table, highs) - _cdf(np, table, lows - 1)
+    return [
+        HistogramBin(low=lo, high=hi, count=int(count), expected_share=float(share), label=label)
+        for (lo, hi, label), count, share in zip(ranges, counts, shares)
+    ]
+
+
+@traced()
+@retry_on_disconnect
+def compute_lottery_analytics(
+    *, guild_id: int, user_id: Optional[int] = None, now: Optional[datetime] = None
+) -> LotteryAnalytics:
+    """(동기, 스레드에서 실행) user_id가 없으면 길드 전체 분석."""
+    np = _numpy()
+    table = get_payout_table(guild_id)
+    days, amounts, (archived_draws, archived_total) = _fetch_columns(np, guild_id=guild_id, user_id=user_id)
+
+    draws = int(amounts.size) + archived_draws
+    report = LotteryAnalytics(
+        guild_id=guild_id,
+        user_id=user_id,
+        draws=draws,
+        total=int(amounts.sum()) + archived_total,
+        expected_total=draws * table.expected_payout,
+        archived_draws=archived_draws,
+    )
+    if amounts.size == 0:
+        return report
+
+    # 백분위: 자신보다 낮은 당첨금이 나올 확률 + 같은 값이 나올 확률의 절반 (중간 순위 백분위)
+    below = _cdf(np, table, amounts - 1)
+    at_or_below = _cdf(np, table, amounts)
+    percentiles = (below + at_or_below) / 2 * 100.0
+    best = int(np.argmax(amounts))
+    report.median_percentile = float(np.median(percentiles))
+    report.best_payout = int(amounts[best])
+    report.best_percentile = float(percentiles[best])
+    report.last_payout = int(amounts[-1])
+    report.last_percentile = float(percentiles[-1])
+
+    hot = amounts >= table.expected_payout
+    report.longest_hot = _longest_run(np, hot)
+    report.longest_cold = _longest_run(np, ~hot)
+
+    today = np.datetime64((now or datetime.utcnow()).date(), "D")
+    report.roi_30d, report.roi_30d_best, report.roi_30d_worst = _rolling_roi(
+        np, days, amounts.astype(np.float64), table.expected_payout, today
+    )
+    report.histogram = _histogram(np, table, amounts)
+    return report
+
+
+class _AnalyticsCache:
+    """
+    (길드, 사용자|None) → 분석 결과. 지갑 변경 시 해당 사용자와 길드 전체 항목을 지웁니다.
+    계산 도중 무효화된 결과는 저장하지 않도록 계산 중인 키에만 세대 번호를 둡니다. (지갑 변경 구독자는 다른 스레드에서 불림)
+    세대 번호는 그 키의 계산이 모두 끝나면(release) 지우므로, 조회된 적 없는 사용자의 지갑 변경이 항목을 남기지 않습니다.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, LotteryAnalytics]" = OrderedDict()
+        # 계산 중인 키 → (진행 중인 계산 수, 세대 번호)
+        self._computing: Dict[Hashable, List[int]] = {}
+
+    def get(self, key: Hashable) -> Tuple[Optional[LotteryAnalytics], int]:
+        """캐시된 값과 세대 번호. 없으면 계산 중으로 표시하므로 호출 측은 계산 후 반드시 release해야 합니다."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value, 0
+            state = self._computing.setdefault(key, [0, 0])
+            state[0] += 1
+            return None, state[1]
+
+    def put(self, key: Hashable, value: LotteryAnalytics, generation: int) -> None:
+        with self._lock:
+            state = self._computing.get(key)
+            if state is None or state[1] != generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def release(self, key: Hashable) -> None:
+        with self._lock:
+            state = self._computing.get(key)
+            if state is None:
+                return
+            state[0] -= 1
+            if state[0] <= 0:
+                del self._computing[key]
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            state = self._computing.get(key)
+            if state is not None:
+                state[1] += 1
+
+
+_cache = _AnalyticsCache(_CACHE_MAX_ENTRIES)
+_analytics_reads = SingleFlight("lottery_analytics")
+
+
+@subscribe
+def _forget_lottery_analytics(guild_id: int, user_id: int) -> None:
+    for key in ((guild_id, user_id), (guild_id, None)):
+        _cache.invalidate(key)
+        _analytics_reads.forget(key)
+
+
+async def load_lottery_analytics(*, guild_id: int, user_id: Optional[int] = None) -> LotteryAnalytics:
+    """캐시된 분석 결과를 반환하고, 없으면 스레드에서 계산합니다. (같은 키의 동시 계산은 하나로 합침)"""
+    key = (guild_id, user_id)
+    cached, generation = _cache.get(key)
+    if cached is not None:
+        metrics.incr("lottery_analytics_cache", result="hit")
+        return cached
+    metrics.incr("lottery_analytics_cache", result="miss")
+    try:
+        report = await _analytics_reads.do(key, compute_lottery_analytics, guild_id=guild_id, user_id=user_id)
+        _cache.put(key, report, generation)
+    finally:
+        _cache.release(key)
+    return report
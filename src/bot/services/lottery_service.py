@@ -1,50 +1,125 @@
 from __future__ import annotations
 
-import random
-from typing import Tuple
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 from sqlmodel import Session
 
+from bot.config.db_config import create_read_session, retry_on_disconnect
 from bot.databases.resources_repo import (
-    consume_resource,
-    deposit_resource,
+    PayoutKey,
+    get_lottery_payout_monthly,
+    get_lottery_payout_page,
+    sum_lottery_payout_monthly,
+    sum_lottery_payouts,
 )
-from bot.models.gm_resources import ResourceType
-from bot.config.bot_config import LOTTERY_MAX_PAYOUT
-
-
-def run_lottery_transaction(
-    session: Session, *, user_id: int, guild_id: int
-) -> Tuple[bool, int, int]:
-    """
-    복권 로직:
-    1) TALENT 1 소모 (부족 시 실패: False, 0, 현재 TALENT 잔액)
-    2) 1~1205 상금 계산 후 VAULT 지갑에 입금
-    3) 입금 로그 기록
-
-    반환값: (성공여부, 획득 상금, 현재 VAULT 잔액)
-    """
-    ok, talent_remain = consume_resource(
-        session,
-        user_id=user_id,
-        guild_id=guild_id,
-        resource_type=ResourceType.TALENT,
-        amount=1,
+from bot.config.bot_config import LOTTERY_HISTORY_PAGE_SIZE
+from bot.models.gm_resources import GMResourceLogMonthly
+from bot.services.lottery_tables import get_payout_table
+from bot.services.single_flight import SingleFlight
+from bot.services.tracing import traced
+from bot.services.wallet_events import subscribe
+
+
+def draw_lottery_payout(guild_id: Optional[int] = None) -> int:
+    """길드 상금표에서 복권 상금을 뽑습니다. (alias 테이블, O(1))"""
+    return get_payout_table(guild_id).draw()
+
+
+@dataclass
+class LotteryHistoryPage:
+    # 최신 순 (created_at, 당첨금)
+    rows: List[Tuple[datetime, int]]
+    # 이 페이지의 가장 최근 / 가장 오래된 로그 키 (이전/다음 페이지 커서)
+    newest_key: Optional[PayoutKey]
+    oldest_key: Optional[PayoutKey]
+    has_newer: bool
+    has_older: bool
+    # 가장 오래된 페이지에만: 보존 기간이 지나 월별 합계로 정리된 내역
+    monthly: List[GMResourceLogMonthly] = field(default_factory=list)
+
+
+@dataclass
+class LotterySummary:
+    # 개별 로그 + 월별 합계
+    draws: int
+    total: int
+    first_page: LotteryHistoryPage
+
+
+def _read_history_page(
+    session: Session, *, user_id: int, guild_id: int, page_size: int, cursor: Optional[PayoutKey], older: bool
+) -> LotteryHistoryPage:
+    # 한 개 더 읽어 다음 페이지가 있는지 판단합니다.
+    rows = get_lottery_payout_page(
+        session, user_id=user_id, guild_id=guild_id, limit=page_size + 1, cursor=cursor, older=older
     )
-    if not ok:
-        return False, 0, talent_remain
-
-    payout = random.randint(1, LOTTERY_MAX_PAYOUT)
-
-    new_vault_balance = deposit_resource(
-        session,
-        user_id=user_id,
-        guild_id=guild_id,
-        resource_type=ResourceType.VAULT,
-        amount=payout,
-        reason="lottery_payout",
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not older:
+        rows.reverse()
+    has_older = more if older else True
+    has_newer = (cursor is not None) if older else more
+    page = LotteryHistoryPage(
+        rows=[(created_at, amount) for _, created_at, amount in rows],
+        newest_key=(rows[0][1], rows[0][0]) if rows else None,
+        oldest_key=(rows[-1][1], rows[-1][0]) if rows else None,
+        has_newer=has_newer and bool(rows),
+        has_older=has_older and bool(rows),
     )
+    if not page.has_older:
+        page.monthly = get_lottery_payout_monthly(session, user_id=user_id, guild_id=guild_id)
+    return page
+
 
-    return True, payout, new_vault_balance
+@traced()
+@retry_on_disconnect
+def get_lottery_history_page(
+    *,
+    user_id: int,
+    guild_id: int,
+    page_size: int = LOTTERY_HISTORY_PAGE_SIZE,
+    cursor: Optional[PayoutKey] = None,
+    older: bool = True,
+) -> LotteryHistoryPage:
+    """복권 당첨 내역 한 페이지를 조회합니다. (읽기 전용 세션, keyset 페이지네이션 쿼리 1회)"""
+    with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+        return _read_history_page(
+            session, user_id=user_id, guild_id=guild_id, page_size=page_size, cursor=cursor, older=older
+        )
 
 
+@traced()
+@retry_on_disconnect
+def get_lottery_summary(*, user_id: int, guild_id: int, page_size: int = LOTTERY_HISTORY_PAGE_SIZE) -> LotterySummary:
+    """복권 당첨 횟수/합계(인덱스 집계)와 첫 페이지를 조회합니다. (읽기 전용 세션)"""
+    with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+        draws, total = sum_lottery_payouts(session, user_id=user_id, guild_id=guild_id)
+        archived_draws, archived_total = sum_lottery_payout_monthly(session, user_id=user_id, guild_id=guild_id)
+        first_page = _read_history_page(
+            session, user_id=user_id, guild_id=guild_id, page_size=page_size, cursor=None, older=True
+        )
+    return LotterySummary(draws=draws + archived_draws, total=total + archived_total, first_page=first_page)
+
+
+# 복권 통계 조회 합치기: 같은 사용자의 동시 조회는 한 번의 DB 조회 결과를 공유합니다.
+_summary_reads = SingleFlight("lottery_summary")
+
+
+@subscribe
+def _forget_summary_read(guild_id: int, user_id: int) -> None:
+    _summary_reads.forget((guild_id, user_id))
+
+
+async def load_lottery_summary(*, user_id: int, guild_id: int) -> LotterySummary:
+    return await _summary_reads.do((guild_id, user_id), get_lottery_summary, user_id=user_id, guild_id=guild_id)
+
+
+async def load_lottery_history_page(
+    *, user_id: int, guild_id: int, cursor: PayoutKey, older: bool
+) -> LotteryHistoryPage:
+    return await asyncio.to_thread(
+        get_lottery_history_page, user_id=user_id, guild_id=guild_id, cursor=cursor, older=older
+    )
@@ -0,0 +1,289 @@
+"""
+복권 상금표.
+
+상금표는 구간(tier) 목록입니다. 각 구간은 고정 상금(payout) 또는 균등 범위(min~max)와 가중치(weight)를 가집니다.
+  예) {"tiers": [{"min": 1, "max": 1000, "weight": 95}, {"payout": 5000, "weight": 1, "label": "잭팟"}]}
+상금표는 한 번만 alias 테이블(Walker/Vose)로 컴파일하므로 구간 수와 관계없이 1회 추첨이 O(1)입니다.
+(구간 선택: 난수 2개, 구간 안의 상금: 균등 정수 1개)
+
+LOTTERY_TABLES_FILE(JSON)에 {"default": 상금표, "<길드 id>": 상금표, ...} 형식으로 길드별 상금표를 둘 수 있습니다.
+파일이 없으면 기존과 같은 1 ~ LOTTERY_MAX_PAYOUT 균등 분포를 씁니다.
+
+verify_payout_table은 같은 alias 테이블을 numpy로 벡터화해 수백만 회 추첨하고
+평균/분산/최댓값이 이론값 및 LOTTERY_EXPECTED_PAYOUT과 맞는지 확인합니다. (numpy 필요: analytics extra)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from bot.config import log_config
+from bot.config.bot_config import LOTTERY_EXPECTED_PAYOUT, LOTTERY_MAX_PAYOUT, LOTTERY_TABLES_FILE
+
+
+logger = log_config.setup_logger()
+
+
+@dataclass(frozen=True)
+class PayoutTier:
+    minimum: int
+    maximum: int
+    weight: float
+    label: str = ""
+
+    @property
+    def width(self) -> int:
+        return self.maximum - self.minimum + 1
+
+    @property
+    def mean(self) -> float:
+        return (self.minimum + self.maximum) / 2
+
+    @property
+    def second_moment(self) -> float:
+        """E[X²] (구간 안 균등 정수 분포)"""
+        return (self.width * self.width - 1) / 12 + self.mean * self.mean
+
+
+class AliasTable:
+    """
+    가중치 목록에서 O(1)로 인덱스를 뽑는 alias 테이블. (Vose의 Walker alias 구성)
+    칸 i를 고른 뒤 prob[i] 확률로 i, 아니면 alias[i]를 돌려줍니다.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("가중치 합이 0보다 커야 합니다.")
+
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # 남은 칸은 부동소수점 오차로 1에 가까운 값이므로 자기 자신으로 채웁니다.
+        for i in small + large:
+            self.prob[i] = 1.0
+            self.alias[i] = i
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, rng=random) -> int:
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class PayoutTable:
+    def __init__(self, tiers: Sequence[PayoutTier], *, name: str = "default"):
+        if not tiers:
+            raise ValueError(f"상금표 {name}: 구간이 없습니다.")
+        self.name = name
+        self.tiers: List[PayoutTier] = list(tiers)
+        self._alias = AliasTable([tier.weight for tier in self.tiers])
+
+        total = sum(tier.weight for tier in self.tiers)
+        self.probabilities = [tier.weight / total for tier in self.tiers]
+        self.expected_payout = sum(p * tier.mean for p, tier in zip(self.probabilities, self.tiers))
+        self.variance = (
+            sum(p * tier.second_moment for p, tier in zip(self.probabilities, self.tiers))
+            - self.expected_payout ** 2
+        )
+        self.max_payout = max(tier.maximum for tier in self.tiers)
+        # 최대 상금 자체가 나올 확률 (검증 시 충분히 뽑았는데 최대 상금이 안 나오면 이상으로 봄)
+        self.max_payout_probability = sum(
+            p / tier.width for p, tier in zip(self.probabilities, self.tiers) if tier.maximum == self.max_payout
+        )
+
+    def draw(self, rng=random) -> int:
+        tier = self.tiers[self._alias.sample(rng)]
+        if tier.width == 1:
+            return tier.minimum
+        return rng.randint(tier.minimum, tier.maximum)
+
+    @property
+    def expected_label(self) -> str:
+        """표시용 기댓값 (정수면 정수로)"""
+        return f"{round(self.expected_payout, 1):g}"
+
+    @classmethod
+    def uniform(cls, maximum: int, *, name: str = "default") -> "PayoutTable":
+        return cls([PayoutTier(minimum=1, maximum=maximum, weight=1.0)], name=name)
+
+    @classmethod
+    def from_config(cls, raw: dict, *, name: str) -> "PayoutTable":
+        tiers = []
+        for index, item in enumerate(raw.get("tiers") or []):
+            if "payout" in item:
+                minimum = maximum = int(item["payout"])
+            else:
+                minimum, maximum = int(item["min"]), int(item["max"])
+            weight = float(item.get("weight", 1))
+            if minimum < 0 or maximum < minimum or weight <= 0:
+                raise ValueError(f"상금표 {name}: {index + 1}번째 구간이 올바르지 않습니다: {item}")
+            tiers.append(PayoutTier(minimum=minimum, maximum=maximum, weight=weight, label=str(item.get("label", ""))))
+        return cls(tiers, name=name)
+
+
+def load_payout_tables(path: str) -> Dict[str, PayoutTable]:
+    """상금표 파일을 읽어 {"default" | 길드 id 문자열: 컴파일된 상금표}를 반환합니다."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return {str(key): PayoutTable.from_config(spec, name=str(key)) for key, spec in raw.items()}
+
+
+_tables: Optional[Dict[str, PayoutTable]] = None
+_tables_lock = threading.Lock()
+
+
+def _load_configured_tables() -> Dict[str, PayoutTable]:
+    tables = load_payout_tables(LOTTERY_TABLES_FILE) if LOTTERY_TABLES_FILE else {}
+    tables.setdefault("default", PayoutTable.uniform(LOTTERY_MAX_PAYOUT))
+    for key, table in tables.items():
+        logger.info(
+            f"복권 상금표 {key}: 구간 {len(table.tiers)}개, 기댓값 {table.expected_payout:.2f}, 최대 {table.max_payout}"
+        )
+    default = tables["default"]
+    if abs(default.expected_payout - LOTTERY_EXPECTED_PAYOUT) > 0.5:
+        logger.warning(
+            f"기본 상금표 기댓값({default.expected_payout:.2f})이 LOTTERY_EXPECTED_PAYOUT({LOTTERY_EXPECTED_PAYOUT})과 다릅니다."
+        )
+    return tables
+
+
+def get_payout_table(guild_id: Optional[int] = None) -> PayoutTable:
+    """길드 상금표 (없으면 기본 상금표). 설정 파일은 처음 호출할 때 한 번만 읽고 컴파일합니다."""
+    global _tables
+    tables = _tables
+    if tables is None:
+        with _tables_lock:
+            if _tables is None:
+                _tables = _load_configured_tables()
+            tables = _tables
+    if guild_id is not None and str(guild_id) in tables:
+        return tables[str(guild_id)]
+    return tables["default"]
+
+
+@dataclass
+class PayoutVerification:
+    table: str
+    draws: int
+    mean: float
+    variance: float
+    max_seen: int
+    target_mean: float
+    expected_mean: float
+    expected_variance: float
+    max_payout: int
+    mean_ok: bool
+    variance_ok: bool
+    max_ok: bool
+    elapsed_sec: float
+
+    @property
+    def ok(self) -> bool:
+        return self.mean_ok and self.variance_ok and self.max_ok
+
+    def summary(self) -> str:
+        def mark(ok: bool) -> str:
+            return "OK" if ok else "FAIL"
+
+        return (
+            f"[{self.table}] {self.draws:,}회 ({self.elapsed_sec:.2f}s)\n"
+            f"  평균 {self.mean:.3f} (이론 {self.expected_mean:.3f}, 목표 {self.target_mean}) {mark(self.mean_ok)}\n"
+            f"  분산 {self.variance:.1f} (이론 {self.expected_variance:.1f}) {mark(self.variance_ok)}\n"
+            f"  최댓값 {self.max_seen} (상금표 최대 {self.max_payout}) {mark(self.max_ok)}"
+        )
+
+
+def verify_payout_table(
+    table: PayoutTable,
+    *,
+    draws: int = 5_000_000,
+    target_mean: float = LOTTERY_EXPECTED_PAYOUT,
+    seed: Optional[int] = None,
+    chunk_size: int = 1_000_000,
+    z_limit: float = 5.0,
+) -> PayoutVerification:
+    """
+    상금표의 alias 테이블을 numpy로 벡터화해 draws회 추첨하고 통계를 검증합니다.
+    - 평균: 이론값과 목표(LOTTERY_EXPECTED_PAYOUT, 정수라 ±0.5 허용)가 맞고, 표본 평균이 목표에서 z_limit 표준오차 이내
+    - 분산: 표본 분산이 이론 분산에서 z_limit 표준오차 이내 (4차 중심 적률로 표준오차 추정)
+    - 최댓값: 상금표 최대를 넘지 않고, 충분히 뽑았다면(기대 횟수 20회 이상) 최대 상금이 실제로 나옴
+    메모리를 일정하게 유지하려고 chunk_size씩 나눠 뽑고 이론 평균 기준 편차의 합만 누적합니다.
+    """
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise RuntimeError(
+            "상금표 검증에는 numpy가 필요합니다. (pip install 'duode-tactical-support[analytics]')"
+        ) from exc
+
+    rng = np.random.default_rng(seed)
+    prob = np.asarray(table._alias.prob, dtype=np.float64)
+    alias = np.asarray(table._alias.alias, dtype=np.int64)
+    low = np.asarray([tier.minimum for tier in table.tiers], dtype=np.int64)
+    width = np.asarray([tier.width for tier in table.tiers], dtype=np.int64)
+    center = table.expected_payout
+
+    started = time.perf_counter()
+    sum_d = sum_d2 = sum_d4 = 0.0
+    max_seen = 0
+    remaining = draws
+    while remaining > 0:
+        m = min(chunk_size, remaining)
+        slot = rng.integers(0, len(prob), size=m)
+        tier = np.where(rng.random(m) < prob[slot], slot, alias[slot])
+        payouts = low[tier] + rng.integers(0, width[tier])
+        d = payouts - center
+        d2 = d * d
+        sum_d += float(d.sum())
+        sum_d2 += float(d2.sum())
+        sum_d4 += float((d2 * d2).sum())
+        max_seen = max(max_seen, int(payouts.max()))
+        remaining -= m
+    elapsed = time.perf_counter() - started
+
+    mean = center + sum_d / draws
+    variance = sum_d2 / draws - (sum_d / draws) ** 2
+    mean_se = math.sqrt(table.variance / draws) if table.variance > 0 else 0.0
+    fourth = sum_d4 / draws
+    variance_se = math.sqrt(max(fourth - variance * variance, 0.0) / draws)
+
+    mean_ok = (
+        abs(table.expected_payout - target_mean) <= 0.5
+        and abs(mean - target_mean) <= z_limit * mean_se + 0.5
+    )
+    variance_ok = abs(variance - table.variance) <= z_limit * variance_se + 1e-9
+    must_see_max = table.max_payout_probability * draws >= 20
+    max_ok = max_seen <= table.max_payout and (max_seen == table.max_payout or not must_see_max)
+
+    return PayoutVerification(
+        table=table.name,
+        draws=draws,
+        mean=mean,
+        variance=variance,
+        max_seen=max_seen,
+        target_mean=target_mean,
+        expected_mean=table.expected_payout,
+        expected_variance=table.variance,
+        max_payout=table.max_payout,
+        mean_ok=mean_ok,
+        variance_ok=variance_ok,
+        max_ok=max_ok,
+        elapsed_sec=elapsed,
+    )
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import discord
+from discord.ext import commands
+
+from bot.config.bot_config import GATEWAY_CACHE_PROFILE
+from bot.config.db_config import create_read_session
+from bot.databases.horse_race_repo import get_user_display_names
+
+
+def _load_display_names(guild_id: int, user_ids: List[int]) -> Dict[int, str]:
+    with create_read_session(guild_id=guild_id) as session:
+        return get_user_display_names(session, user_ids=user_ids, guild_id=guild_id)
+
+
+async def _fetch_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    try:
+        return await guild.fetch_member(user_id)
+    except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+        return None
+
+
+async def resolve_display_names(bot: commands.Bot, *, guild_id: int, user_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    길드 멤버들의 표시 이름을 한 번에 조회합니다.
+    1) DB에 저장된 서버 닉네임/전역 이름 (한 번의 조회, 스레드에서 실행)
+    2) DB에 없는 사용자만 게이트웨이 캐시에서
+    3) 그래도 없으면 lean 프로필에서만 Discord API로 동시에 조회 (멤버 캐시를 끈 프로필)
+    끝까지 찾지 못한 사용자는 '사용자{id}'로 표시합니다.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    names = await asyncio.to_thread(_load_display_names, guild_id, user_ids)
+
+    guild = bot.get_guild(guild_id)
+    missing = [user_id for user_id in user_ids if user_id not in names]
+    if guild is not None and missing:
+        for user_id in missing:
+            member = guild.get_member(user_id)
+            if member is not None:
+                names[user_id] = member.display_name
+        missing = [user_id for user_id in missing if user_id not in names]
+        if missing and GATEWAY_CACHE_PROFILE == "lean":
+            for member in await asyncio.gather(*(_fetch_member(guild, user_id) for user_id in missing)):
+                if member is not None:
+                    names[member.id] = member.display_name
+
+    for user_id in user_ids:
+        names.setdefault(user_id, f"사용자{user_id}")
+    return names
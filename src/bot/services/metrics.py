@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Tuple
+
+
+# 프로세스 내 메트릭 저장소. 라벨은 (키, 값) 튜플로 정규화하여 같은 시리즈를 하나로 모읍니다.
+# DB 풀 이벤트 등 스레드에서도 기록되므로 락으로 보호합니다.
+_SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_counters: Dict[_SeriesKey, float] = {}
+_gauges: Dict[_SeriesKey, float] = {}
+# 관측값: [count, sum, max]
+_observations: Dict[_SeriesKey, list] = {}
+
+
+def _key(name: str, labels: Dict[str, object]) -> _SeriesKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    """누적 카운터를 증가시킵니다."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    """현재 값을 기록합니다. (마지막 값만 유지)"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """지연 시간 등 분포 값을 count/sum/max로 집계합니다."""
+    key = _key(name, labels)
+    with _lock:
+        stats = _observations.get(key)
+        if stats is None:
+            _observations[key] = [1, value, value]
+        else:
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = max(stats[2], value)
+
+
+def _series_name(key: _SeriesKey, suffix: str = "") -> str:
+    name, labels = key
+    if not labels:
+        return name + suffix
+    return name + suffix + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def snapshot() -> Dict[str, float]:
+    """모든 시리즈를 'name{label=value}' 형태의 평평한 딕셔너리로 반환합니다."""
+    with _lock:
+        result: Dict[str, float] = {}
+        for key, value in _counters.items():
+            result[_series_name(key)] = value
+        for key, value in _gauges.items():
+            result[_series_name(key)] = value
+        for key, (count, total, maximum) in _observations.items():
+            result[_series_name(key, "_count")] = count
+            result[_series_name(key, "_sum")] = total
+            result[_series_name(key, "_max")] = maximum
+        return result
+
+
+def format_snapshot() -> str:
+    return "\n".join(f"{name} {value:g}" for name, value in sorted(snapshot().items()))
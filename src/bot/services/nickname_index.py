@@ -0,0 +1,200 @@
+"""
+길드별 서버닉네임 → 사용자 색인.
+
+관리자 명령(!달란트지급, !달란트일괄지급)이 닉네임으로 대상을 찾을 때 DB 조회 없이 O(1)로 찾도록 메모리에 둡니다.
+- 시작 시(on_ready) 이 프로세스가 맡은 길드들의 닉네임을 DB에서 한 번에 읽어 구성합니다.
+- 이후에는 멤버 이벤트(on_member_update/join/remove)와 명령 실행 시 가드가 보는 닉네임으로 갱신합니다.
+- 이벤트로 바뀐 닉네임은 NicknameWriter에 모았다가 주기적으로(또는 일정 수가 쌓이면) 한 트랜잭션으로 DB에 기록합니다.
+아직 구성되지 않은 길드(시작 직후 등)는 is_loaded가 False이므로 호출 측이 DB 조회로 대신합니다.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from bot.config import log_config
+from bot.config.db_config import create_read_session, create_session, retry_on_disconnect
+from bot.databases.auth_repo import list_guild_nicknames, upsert_guild_member_nicknames
+from bot.services import metrics
+from bot.services.tracing import traced
+
+
+logger = log_config.setup_logger()
+
+# DB에서 색인을 읽을 때 IN 절에 넣을 길드 수
+_LOAD_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class MemberSnapshot:
+    """DB에 기록할 길드 회원 정보 (upsert_guild_member_nicknames 입력 형식과 같은 키)"""
+
+    user_id: int
+    user_name: str
+    guild_id: int
+    guild_name: str
+    server_nickname: Optional[str]
+
+
+class NicknameIndex:
+    """
+    길드 → (닉네임 → 사용자 id 집합)과 길드 → (사용자 id → 닉네임)을 함께 유지합니다.
+    닉네임은 길드 안에서 중복될 수 있으므로 집합으로 두고, 조회 시에는 가장 작은 id를 돌려줍니다. (결과 고정)
+    이벤트 루프와 색인을 읽어 오는 스레드에서 함께 쓰이므로 threading.Lock으로 보호합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_nickname: Dict[int, Dict[str, Set[int]]] = {}
+        self._by_user: Dict[int, Dict[int, Optional[str]]] = {}
+
+    def is_loaded(self, guild_id: int) -> bool:
+        with self._lock:
+            return guild_id in self._by_user
+
+    def replace_guild(self, guild_id: int, members: Iterable[Tuple[int, Optional[str]]]) -> None:
+        """길드 색인을 (user_id, 닉네임) 목록으로 통째로 바꿉니다."""
+        by_nickname: Dict[str, Set[int]] = {}
+        by_user: Dict[int, Optional[str]] = {}
+        for user_id, nickname in members:
+            by_user[user_id] = nickname
+            if nickname:
+                by_nickname.setdefault(nickname, set()).add(user_id)
+        with self._lock:
+            self._by_nickname[guild_id] = by_nickname
+            self._by_user[guild_id] = by_user
+
+    def drop_guild(self, guild_id: int) -> None:
+        with self._lock:
+            self._by_nickname.pop(guild_id, None)
+            self._by_user.pop(guild_id, None)
+
+    def set(self, guild_id: int, user_id: int, nickname: Optional[str]) -> bool:
+        """
+        회원의 닉네임을 기록하고, 이전 값과 달라졌으면 True를 반환합니다.
+        구성되지 않은 길드는 시작 시 DB에서 읽을 때 반영되므로 무시합니다.
+        """
+        with self._lock:
+            by_user = self._by_user.get(guild_id)
+            if by_user is None:
+                return False
+            if user_id in by_user and by_user[user_id] == nickname:
+                return False
+            self._unlink(guild_id, user_id, by_user.get(user_id))
+            by_user[user_id] = nickname
+            if nickname:
+                self._by_nickname[guild_id].setdefault(nickname, set()).add(user_id)
+            return True
+
+    def discard(self, guild_id: int, user_id: int) -> None:
+        """길드를 떠난 회원을 색인에서 뺍니다. (거래 내역 보존을 위해 DB 행은 그대로 둠)"""
+        with self._lock:
+            by_user = self._by_user.get(guild_id)
+            if by_user is None or user_id not in by_user:
+                return
+            self._unlink(guild_id, user_id, by_user.pop(user_id))
+
+    def _unlink(self, guild_id: int, user_id: int, nickname: Optional[str]) -> None:
+        if not nickname:
+            return
+        users = self._by_nickname[guild_id].get(nickname)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._by_nickname[guild_id][nickname]
+
+    def lookup(self, guild_id: int, nickname: str) -> Optional[int]:
+        """닉네임에 해당하는 user_id. (없으면 None, 중복이면 가장 작은 id)"""
+        with self._lock:
+            users = self._by_nickname.get(guild_id, {}).get(nickname)
+            return min(users) if users else None
+
+    def nickname_of(self, guild_id: int, user_id: int) -> Optional[str]:
+        with self._lock:
+            return self._by_user.get(guild_id, {}).get(user_id)
+
+    def contains(self, guild_id: int, user_id: int) -> bool:
+        with self._lock:
+            return user_id in self._by_user.get(guild_id, {})
+
+
+@traced()
+@retry_on_disconnect
+def load_nickname_index(index: NicknameIndex, guild_ids: Sequence[int]) -> int:
+    """(동기, 스레드에서 실행) 길드들의 색인을 DB에서 구성하고 읽은 회원 수를 반환합니다."""
+    guild_ids = list(guild_ids)
+    grouped: Dict[int, List[Tuple[int, Optional[str]]]] = {guild_id: [] for guild_id in guild_ids}
+    with create_read_session() as session:
+        for start in range(0, len(guild_ids), _LOAD_CHUNK):
+            for guild_id, user_id, nickname in list_guild_nicknames(
+                session, guild_ids=guild_ids[start:start + _LOAD_CHUNK]
+            ):
+                grouped[guild_id].append((user_id, nickname))
+    for guild_id, members in grouped.items():
+        index.replace_guild(guild_id, members)
+    return sum(len(members) for members in grouped.values())
+
+
+class NicknameWriter:
+    """
+    멤버 이벤트로 바뀐 닉네임을 (길드, 사용자) 단위로 모아 두었다가 한 트랜잭션으로 기록합니다.
+    같은 회원이 여러 번 바뀌면 마지막 값만 기록합니다. 기록에 실패한 항목은 더 새 값이 없을 때만 다시 넣습니다.
+    """
+
+    def __init__(self, *, max_pending: int):
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, int], MemberSnapshot] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def queue(self, snapshot: MemberSnapshot) -> bool:
+        """기록할 항목을 추가하고, 바로 기록해야 할 만큼 쌓였으면 True를 반환합니다."""
+        with self._lock:
+            self._pending[(snapshot.guild_id, snapshot.user_id)] = snapshot
+            return len(self._pending) >= self.max_pending
+
+    @traced()
+    def flush(self) -> int:
+        """(동기, 스레드에서 실행) 모인 항목을 기록하고 기록한 수를 반환합니다."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        try:
+            self._write(list(batch.values()))
+        except Exception:
+            with self._lock:
+                for key, snapshot in batch.items():
+                    self._pending.setdefault(key, snapshot)
+            metrics.incr("nickname_flush", result="error")
+            raise
+        metrics.incr("nickname_flush", result="ok")
+        return len(batch)
+
+    # 마지막 값으로 덮어쓰는 upsert라 다시 실행해도 결과가 같습니다.
+    @retry_on_disconnect
+    def _write(self, snapshots: List[MemberSnapshot]) -> None:
+        rows = [asdict(snapshot) for snapshot in snapshots]
+        with create_session() as session:
+            try:
+                upsert_guild_member_nicknames(session, rows)
+                session.commit()
+            except IntegrityError:
+                # 같은 회원을 가드(ensure_guild_member)가 동시에 처음 생성한 경우: 다시 읽고 1회 재시도
+                session.rollback()
+                upsert_guild_member_nicknames(session, rows)
+                session.commit()
+
+
+_index = NicknameIndex()
+
+
+def get_nickname_index() -> NicknameIndex:
+    return _index
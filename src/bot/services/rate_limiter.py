@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Tuple
+
+
+# 명령 속도 제한 그룹 (한도는 bot_config의 THROTTLE_USER_LIMITS / THROTTLE_GUILD_LIMITS)
+# 그룹은 Cog의 throttle_group 속성(명령별로는 extras={"throttle_group": ...})으로 지정하고, 없으면 default를 씁니다.
+THROTTLE_LOTTERY = "lottery"
+THROTTLE_WALLET = "wallet"
+THROTTLE_READ = "read"
+THROTTLE_RACE = "race"
+THROTTLE_EXPORT = "export"
+THROTTLE_DEFAULT = "default"
+
+
+def command_throttle_group(command) -> str:
+    group = command.extras.get("throttle_group") or getattr(command.cog, "throttle_group", None)
+    return group or THROTTLE_DEFAULT
+
+
+@dataclass
+class TokenBucket:
+    """용량(capacity)만큼 모았다가 초당 refill_per_sec씩 다시 채워지는 토큰 버킷."""
+
+    capacity: float
+    refill_per_sec: float
+    tokens: float
+    updated_at: float
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_sec)
+            self.updated_at = now
+
+    def retry_after(self, now: float) -> float:
+        """토큰 1개를 쓸 수 있을 때까지 남은 시간(초). 지금 쓸 수 있으면 0."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.refill_per_sec
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class TokenBucketLimiter:
+    """
+    키별 토큰 버킷 모음. 그룹마다 (용량, 기간초) 한도를 가지며 한도가 없는 그룹은 'default'를 사용합니다.
+    이벤트 루프에서만 호출하므로 잠금은 두지 않습니다.
+    """
+
+    # 가득 찬(= 한동안 쓰지 않은) 버킷 정리 주기(초)
+    PRUNE_INTERVAL_SEC = 60.0
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]]):
+        self._limits = limits
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._last_prune = time.monotonic()
+
+    def _limit_for(self, group: str) -> Optional[Tuple[int, float]]:
+        return self._limits.get(group) or self._limits.get(THROTTLE_DEFAULT)
+
+    def _bucket(self, key: Hashable, group: str, now: float) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            limit = self._limit_for(group)
+            if limit is None:
+                return None
+            capacity, period = limit
+            bucket = TokenBucket(capacity=capacity, refill_per_sec=capacity / period, tokens=capacity, updated_at=now)
+            self._buckets[key] = bucket
+        return bucket
+
+    def retry_after(self, key: Hashable, group: str, now: float) -> float:
+        bucket = self._bucket(key, group, now)
+        return 0.0 if bucket is None else bucket.retry_after(now)
+
+    def consume(self, key: Hashable, group: str, now: float) -> None:
+        bucket = self._bucket(key, group, now)
+        if bucket is not None:
+            bucket.consume()
+
+    def prune(self, now: float) -> None:
+        if now - self._last_prune < self.PRUNE_INTERVAL_SEC:
+            return
+        self._last_prune = now
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
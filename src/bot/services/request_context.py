@@ -1,26 +1,59 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import contextvars
 
-from bot.models.members import GuildMember
+if TYPE_CHECKING:
+    from bot.models.members import GuildMember
+    from bot.services.tracing import Span
 
 
 # 메시지 처리 1회(명령어 1회) 동안 유지되는 컨텍스트 저장소
-current_guild_member: contextvars.ContextVar[Optional[GuildMember]] = contextvars.ContextVar(
+current_guild_member: contextvars.ContextVar[Optional["GuildMember"]] = contextvars.ContextVar(
     "current_guild_member", default=None
 )
 
+# 현재 처리 중인 명령/리스너 이름 (예: "command:복권", "listener:on_message")
+# 이벤트 루프 정지 감지기 등에서 어떤 작업이 루프를 막고 있었는지 표시하는 데 사용합니다.
+current_operation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_operation", default=None
+)
+
+# 현재 열린 추적 스팬 (bot.services.tracing 참고). 새 스팬은 이 값을 부모로 삼습니다.
+current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
 
-def set_current_guild_member(guild_member: GuildMember) -> None:
+def set_current_guild_member(guild_member: "GuildMember") -> None:
     current_guild_member.set(guild_member)
 
 
-def get_current_guild_member() -> Optional[GuildMember]:
+def get_current_guild_member() -> Optional["GuildMember"]:
     return current_guild_member.get()
 
 
-def clear_context() -> None:
-    current_guild_member.set(None)
+def set_current_operation(operation: str) -> None:
+    current_operation.set(operation)
+
+
+def get_current_operation() -> Optional[str]:
+    return current_operation.get()
 
 
+def get_current_span() -> Optional["Span"]:
+    return current_span.get()
+
+
+def set_current_span(span: Optional["Span"]) -> contextvars.Token:
+    return current_span.set(span)
+
+
+def reset_current_span(token: contextvars.Token) -> None:
+    current_span.reset(token)
+
+
+def clear_context() -> None:
+    current_guild_member.set(None)
+    current_operation.set(None)
+    current_span.set(None)
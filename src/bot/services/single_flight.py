@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from bot.services import metrics
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 동기 조회를 한 번만 실행하고 결과를 공유합니다.
+    - 첫 호출(리더)이 조회를 스레드에서 실행하는 Task를 만들고, 그동안 들어온 호출은 같은 Task를 기다립니다.
+    - 조회가 끝나면 항목을 지우므로 결과를 캐시하지는 않습니다. (다음 호출은 새 조회)
+    - forget(key): 해당 키에 쓰기가 생기면 진행 중인 조회에 더 이상 합류하지 않도록 끊습니다.
+      쓰기 이후의 호출은 쓰기 결과를 볼 수 있는 새 조회를 시작합니다. 다른 스레드에서 호출해도 안전합니다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done, key=key: self._discard(key, done))
+                shared = False
+            else:
+                shared = True
+        metrics.incr("single_flight_calls", flight=self.name, shared=shared)
+        # 기다리던 호출 하나가 취소되어도 다른 호출이 함께 기다리는 조회는 계속되도록 shield 합니다.
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _discard(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        if not task.cancelled():
+            # 기다리는 호출이 모두 취소된 경우에도 'exception was never retrieved' 경고가 남지 않도록 합니다.
+            task.exception()
@@ -0,0 +1,38 @@
+"""
+확장(Cog 모듈) 리로드 사이에 메모리 상태를 넘겨주는 보관소.
+
+!리로드는 확장 모듈만 다시 임포트하므로 services 모듈의 캐시(순위표, 닉네임 색인, 복권 분석, 작업 큐 등)는 그대로 유지됩니다.
+Cog 인스턴스가 직접 들고 있는 상태(속도 제한 버킷, 닉네임 기록 대기열, 주기 작업의 다음 실행 시각 등)만
+cog_unload에서 stash로 맡기고, 새 인스턴스의 __init__에서 claim으로 찾아갑니다.
+claim은 한 번만 돌려주므로 오래된 상태가 다음 리로드까지 남지 않습니다. (봇 종료 시 맡긴 값은 그대로 버려짐)
+넘겨주는 값은 services 모듈에 정의된 타입이나 기본 타입이어야 합니다. (리로드되는 모듈의 클래스는 옛 정의를 가리킴)
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional
+
+from bot.config import log_config
+
+
+logger = log_config.setup_logger()
+
+_lock = threading.Lock()
+_stash: Dict[str, Dict[str, Any]] = {}
+
+
+def stash(owner: str, **state: Any) -> None:
+    """owner(보통 Cog 이름) 이름으로 상태를 맡깁니다. 같은 이름으로 다시 맡기면 덮어씁니다."""
+    with _lock:
+        _stash[owner] = state
+    logger.debug(f"상태 보관: {owner} ({', '.join(state)})")
+
+
+def claim(owner: str) -> Optional[Dict[str, Any]]:
+    """맡겨 둔 상태를 꺼냅니다. 처음 로드될 때처럼 맡긴 것이 없으면 None."""
+    with _lock:
+        state = _stash.pop(owner, None)
+    if state is not None:
+        logger.info(f"리로드 전 상태를 이어받았습니다: {owner} ({', '.join(state)})")
+    return state
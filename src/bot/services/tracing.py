@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from bot.config import log_config
+from bot.services.request_context import (
+    get_current_span,
+    set_current_span,
+    reset_current_span,
+)
+
+
+logger = log_config.setup_logger()
+
+
+@dataclass
+class Span:
+    """하나의 작업 구간. OpenTelemetry 스팬과 같은 식별자/시각 필드를 가집니다."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    kind: str = "INTERNAL"
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": f"SPAN_KIND_{self.kind}",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error}
+            if self.error
+            else {"code": "STATUS_CODE_OK"},
+        }
+        return span
+
+
+class JsonlSpanExporter:
+    """
+    종료된 스팬을 OTLP JSON(resourceSpans) 형태로 한 줄씩 파일에 추가합니다.
+    otel-collector의 file receiver 등에서 그대로 읽을 수 있습니다.
+    """
+
+    def __init__(self, path: str, *, service_name: str):
+        self.path = path
+        self._resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def export(self, span: Span) -> None:
+        record = {
+            "resourceSpans": [
+                {
+                    "resource": self._resource,
+                    "scopeSpans": [{"scope": {"name": "bot"}, "spans": [span.to_otlp()]}],
+                }
+            ]
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_exporter: Optional[JsonlSpanExporter] = None
+
+
+def configure_tracing(path: Optional[str], *, service_name: str) -> None:
+    """경로가 주어지면 추적을 켭니다. None이면 모든 스팬 API가 아무 일도 하지 않습니다."""
+    global _exporter
+    if not path:
+        return
+    _exporter = JsonlSpanExporter(path, service_name=service_name)
+    logger.info(f"요청 추적 활성화: {path}")
+
+
+def is_tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def trace_id_for_message(message_id: int) -> str:
+    """같은 Discord 메시지에서 파생된 스팬(on_message 리스너, 명령 실행)을 한 트레이스로 묶습니다."""
+    return f"{message_id:032x}"
+
+
+def begin_span(
+    name: str,
+    *,
+    kind: str = "INTERNAL",
+    trace_id: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None,
+) -> Optional[Span]:
+    """
+    현재 스팬의 자식 스팬을 만들어 반환합니다. (컨텍스트에 설정하지는 않음)
+    추적이 꺼져 있으면 None.
+    """
+    if _exporter is None:
+        return None
+    parent = get_current_span()
+    if parent is not None and trace_id is None:
+        trace_id = parent.trace_id
+    return Span(
+        name=name,
+        trace_id=trace_id or f"{random.getrandbits(128):032x}",
+        span_id=f"{random.getrandbits(64):016x}",
+        parent_span_id=parent.span_id if parent is not None and parent.trace_id == trace_id else None,
+        kind=kind,
+        attributes=dict(attributes or {}),
+    )
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    if span is None or span.end_ns is not None:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    exporter = _exporter
+    if exporter is None:
+        return
+    try:
+        exporter.export(span)
+    except Exception as exc:
+        logger.warning(f"스팬 기록 실패: {exc}")
+
+
+@contextmanager
+def start_span(
+    name: str,
+    *,
+    kind: str = "INTERNAL",
+    trace_id: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None,
+) -> Iterator[Optional[Span]]:
+    """with 블록 동안 현재 스팬으로 설정되는 자식 스팬을 엽니다. async 함수 안에서도 사용할 수 있습니다."""
+    span = begin_span(name, kind=kind, trace_id=trace_id, attributes=attributes)
+    if span is None:
+        yield None
+        return
+    token = set_current_span(span)
+    try:
+        yield span
+    except BaseException as exc:
+        end_span(span, exc)
+        raise
+    finally:
+        reset_current_span(token)
+        end_span(span)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    함수 호출 전체를 스팬으로 감싸는 데코레이터. (sync/async 모두 지원)
+    스팬 이름 기본값: '<모듈 마지막 이름>.<함수 이름>' (예: resources_repo.consume_resource)
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _exporter is None:
+                    return await fn(*args, **kwargs)
+                with start_span(span_name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with start_span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def install_http_tracing(http_client: Any) -> None:
+    """discord.py HTTPClient.request를 감싸 Discord API 호출을 CLIENT 스팬으로 기록합니다."""
+    original_request = http_client.request
+
+    async def request(route, **kwargs):
+        if _exporter is None or get_current_span() is None:
+            return await original_request(route, **kwargs)
+        with start_span(
+            f"discord {route.method} {route.path}",
+            kind="CLIENT",
+            attributes={"http.method": route.method, "http.route": route.path},
+        ):
+            return await original_request(route, **kwargs)
+
+    http_client.request = request
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
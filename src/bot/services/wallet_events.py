@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Callable, List
+
+from bot.config import log_config
+from bot.config.db_config import mark_recent_write
+
+
+logger = log_config.setup_logger()
+
+
+# 지갑(잔액/로그)이 바뀐 (guild_id, user_id)를 알리는 프로세스 내 이벤트.
+# 구독자는 커밋 직후 동기로 호출되며, DB 작업 스레드에서 불릴 수 있으므로 가볍고 스레드 안전해야 합니다.
+WalletListener = Callable[[int, int], None]
+
+_listeners: List[WalletListener] = []
+
+
+def subscribe(listener: WalletListener) -> WalletListener:
+    """지갑 변경 구독자를 등록합니다. 데코레이터로도 사용할 수 있습니다."""
+    _listeners.append(listener)
+    return listener
+
+
+def publish_wallet_change(*, guild_id: int, user_id: int) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(guild_id, user_id)
+        except Exception as exc:
+            logger.warning(f"지갑 변경 구독자 오류: {getattr(listener, '__name__', listener)}: {exc}")
+
+
+# 기본 구독자: 쓰기 직후 잠시 동안 같은 사용자의 읽기를 주 DB로 고정 (복제본 지연 대비)
+subscribe(lambda guild_id, user_id: mark_recent_write(guild_id=guild_id, user_id=user_id))
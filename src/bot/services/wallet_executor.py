@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bot.config import log_config
+from bot.config.bot_config import WALLET_BATCH_WINDOW_MS, WALLET_BATCH_MAX
+from bot.models.gm_resources import ResourceType
+from bot.services import metrics
+from bot.services.lottery_service import draw_lottery_payout
+from bot.services.wallet_events import publish_wallet_change
+from bot.services.wallet_service import get_resource_display_name, resolve_resource_type
+from bot.services.work_queue import WorkQueueResultUnknown, submit_job
+
+
+logger = log_config.setup_logger()
+
+
+WalletKey = Tuple[int, int, ResourceType]
+
+
+@dataclass
+class WalletMutation:
+    """한 사용자의 지갑 변경 묶음. 모든 변경이 함께 반영되거나(잔액 충분) 함께 취소됩니다."""
+
+    user_id: int
+    guild_id: int
+    # (자원, 증감량, 사유)
+    changes: Sequence[Tuple[ResourceType, int, str]]
+    # 같은 요청이 다시 들어와도 한 번만 반영되도록 하는 키 (message_idempotency_key 참고)
+    idempotency_key: Optional[str] = None
+
+    def wallet_keys(self) -> List[WalletKey]:
+        return sorted({(self.guild_id, self.user_id, rtype) for rtype, _, _ in self.changes}, key=_key_order)
+
+    def to_job(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "guild_id": self.guild_id,
+            "changes": [[rtype.value, delta, reason] for rtype, delta, reason in self.changes],
+            "idempotency_key": self.idempotency_key,
+        }
+
+
+@dataclass
+class MutationResult:
+    ok: bool
+    balances: Dict[ResourceType, int] = field(default_factory=dict)
+    # 실제로 반영된 증감량 (중복 요청이면 처음 반영했을 때의 값)
+    deltas: Dict[ResourceType, int] = field(default_factory=dict)
+    # 잔액 부족 시 부족했던 자원과 당시 잔액
+    shortfall: Optional[Tuple[ResourceType, int]] = None
+    # 이미 반영된 멱등 키라서 다시 적용하지 않았는지
+    duplicate: bool = False
+
+    @classmethod
+    def from_job(cls, raw: dict) -> "MutationResult":
+        shortfall = raw.get("shortfall")
+        return cls(
+            ok=bool(raw["ok"]),
+            balances={ResourceType(k): int(v) for k, v in raw.get("balances", {}).items()},
+            deltas={ResourceType(k): int(v) for k, v in raw.get("deltas", {}).items()},
+            shortfall=(ResourceType(shortfall["resource_type"]), int(shortfall["balance"])) if shortfall else None,
+            duplicate=bool(raw.get("duplicate", False)),
+        )
+
+
+def message_idempotency_key(message_id: int) -> str:
+    """
+    명령을 호출한 Discord 메시지(또는 인터랙션) id로 만든 멱등 키.
+    게이트웨이 재연결로 같은 메시지가 다시 처리되거나 작업 큐가 같은 작업을 다시 실행해도 한 번만 반영됩니다.
+    """
+    return f"msg:{message_id}"
+
+
+def _key_order(key: WalletKey) -> Tuple[int, int, str]:
+    guild_id, user_id, rtype = key
+    return guild_id, user_id, rtype.value
+
+
+class WalletExecutor:
+    """
+    지갑 변경 실행기.
+    - (길드, 사용자, 자원) 단위 asyncio 잠금으로 같은 지갑의 변경은 하나씩 실행합니다.
+      여러 지갑을 건드리는 변경(복권: 달란트 차감 + 금고 입금)은 정렬된 순서로 잠가 교착을 피합니다.
+    - 잠금을 얻은 변경은 window_ms 동안 모아서 한 트랜잭션(작업 큐의 wallet_batch 작업)으로 그룹 커밋합니다.
+      같은 지갑의 변경은 잠금 때문에 한 배치에 함께 들어가지 않으므로 DB 행 잠금 대기가 생기지 않습니다.
+    잠금은 프로세스 로컬이므로 여러 게이트웨이 프로세스 사이의 보호는 DB 행 잠금(SELECT ... FOR UPDATE)이 맡습니다.
+    """
+
+    def __init__(self, *, window_ms: int, max_batch: int):
+        self._window_sec = window_ms / 1000
+        self._max_batch = max(1, max_batch)
+        self._locks: Dict[WalletKey, asyncio.Lock] = {}
+        # 잠금별 대기/보유 중인 호출 수 (0이 되면 잠금 객체 정리)
+        self._lock_users: Dict[WalletKey, int] = {}
+        self._pending: List[Tuple[WalletMutation, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def _acquire(self, keys: List[WalletKey]) -> None:
+        """keys 순서대로 잠급니다. 잠그는 도중 취소되면 이미 얻은 잠금을 돌려놓습니다."""
+        for key in keys:
+            self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        acquired: List[WalletKey] = []
+        try:
+            for key in keys:
+                await self._locks.setdefault(key, asyncio.Lock()).acquire()
+                acquired.append(key)
+        except BaseException:
+            self._release(keys, acquired)
+            raise
+
+    def _release(self, keys: List[WalletKey], acquired: List[WalletKey]) -> None:
+        for key in reversed(acquired):
+            self._locks[key].release()
+        for key in keys:
+            remaining = self._lock_users[key] - 1
+            if remaining:
+                self._lock_users[key] = remaining
+            else:
+                del self._lock_users[key]
+                self._locks.pop(key, None)
+
+    async def run(self, mutation: WalletMutation) -> MutationResult:
+        keys = mutation.wallet_keys()
+        await self._acquire(keys)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # 잠금은 호출 측이 아니라 배치 결과에 묶어 풉니다.
+        # 호출 측이 취소되어도 배치가 커밋을 마칠 때까지 같은 지갑의 다음 변경이 다른 배치로 나가지 않습니다.
+        future.add_done_callback(lambda _: self._release(keys, keys))
+        self._pending.append((mutation, future))
+        self._schedule_flush()
+        # 호출 측이 취소되어도 배치는 그대로 커밋되므로 결과만 포기합니다.
+        return await asyncio.shield(future)
+
+    def _schedule_flush(self) -> None:
+        if len(self._pending) >= self._max_batch or self._window_sec <= 0:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self._window_sec, self._flush)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        asyncio.get_running_loop().create_task(self._commit(batch))
+
+    async def _commit(self, batch: List[Tuple[WalletMutation, asyncio.Future]]) -> None:
+        metrics.observe("wallet_batch_size", len(batch))
+        # 같은 배치 안에서도 행 잠금 순서를 일정하게 유지합니다. (다른 프로세스와의 교착 방지)
+        ordered = sorted(range(len(batch)), key=lambda i: _key_order(batch[i][0].wallet_keys()[0]))
+        try:
+            raw_results = await submit_job("wallet_batch", mutations=[batch[i][0].to_job() for i in ordered])
+        except Exception as exc:
+            logger.error(f"지갑 그룹 커밋 실패 ({len(batch)}건): {exc}")
+            if isinstance(exc, WorkQueueResultUnknown):
+                # 커밋되었을 수 있으므로 캐시(순위표/분석/읽기 고정)는 바뀐 것으로 보고 무효화합니다.
+                for mutation, _ in batch:
+                    publish_wallet_change(guild_id=mutation.guild_id, user_id=mutation.user_id)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        try:
+            for i, raw in zip(ordered, raw_results):
+                mutation, future = batch[i]
+                result = MutationResult.from_job(raw)
+                if result.ok:
+                    # 워커 프로세스에서 커밋된 경우에도 이 프로세스의 구독자에게 알립니다.
+                    publish_wallet_change(guild_id=mutation.guild_id, user_id=mutation.user_id)
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # 결과를 받지 못한 변경이 남지 않도록 합니다. (지갑 잠금은 future가 끝나야 풀림)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("지갑 배치 결과를 처리하지 못했습니다."))
+
+
+_executor: Optional[WalletExecutor] = None
+
+
+def get_wallet_executor() -> WalletExecutor:
+    global _executor
+    if _executor is None:
+        _executor = WalletExecutor(window_ms=WALLET_BATCH_WINDOW_MS, max_batch=WALLET_BATCH_MAX)
+    return _executor
+
+
+async def run_wallet_mutation(mutation: WalletMutation) -> MutationResult:
+    return await get_wallet_executor().run(mutation)
+
+
+async def deposit_member_resource(
+    *, user_id: int, guild_id: int, resource_alias: str, amount: int, idempotency_key: Optional[str] = None
+) -> Tuple[bool, str, int]:
+    """
+    실행기 경유 입금.
+    반환값: (True, <표시이름>, <새 잔액>) 성공 / (False, <오류메시지>, 0) 실패
+    """
+    if amount <= 0:
+        return False, "입금 금액은 1 이상이어야 합니다.", 0
+    rtype = resolve_resource_type(resource_alias)
+    if rtype is None:
+        return False, "지원하지 않는 재화입니다. 사용 가능: 골드/달란트/럭키", 0
+
+    result = await run_wallet_mutation(
+        WalletMutation(
+            user_id=user_id,
+            guild_id=guild_id,
+            changes=[(rtype, amount, "manual_deposit_command")],
+            idempotency_key=idempotency_key,
+        )
+    )
+    return True, get_resource_display_name(rtype), result.balances[rtype]
+
+
+async def withdraw_member_resource(
+    *, user_id: int, guild_id: int, resource_alias: str, amount: int, idempotency_key: Optional[str] = None
+) -> Tuple[bool, str, int]:
+    """
+    실행기 경유 출금.
+    반환값: (True, <표시이름>, <차감 후 잔액>) 성공 / (False, <오류메시지>, <현재 잔액>) 실패(잔액 부족 등)
+    """
+    if amount <= 0:
+        return False, "출금 금액은 1 이상이어야 합니다.", 0
+    rtype = resolve_resource_type(resource_alias)
+    if rtype is None:
+        return False, "지원하지 않는 재화입니다. 사용 가능: 골드/달란트/럭키", 0
+
+    result = await run_wallet_mutation(
+        WalletMutation(
+            user_id=user_id,
+            guild_id=guild_id,
+            changes=[(rtype, -amount, "manual_withdraw_command")],
+            idempotency_key=idempotency_key,
+        )
+    )
+    if not result.ok:
+        remain = result.shortfall[1] if result.shortfall else 0
+        label = get_resource_display_name(rtype)
+        return False, f"잔액 부족으로 출금 실패. 현재 {label} 잔액: {remain}", remain
+    return True, get_resource_display_name(rtype), result.balances[rtype]
+
+
+async def run_lottery(
+    *, user_id: int, guild_id: int, idempotency_key: Optional[str] = None
+) -> Tuple[bool, int, int]:
+    """
+    실행기 경유 복권. 반환값: (성공여부, 획득 상금, 현재 VAULT 잔액), 달란트 부족 시 (False, 0, 현재 달란트 잔액)
+    달란트 차감과 금고 입금을 한 변경으로 묶어 함께 커밋합니다.
+    중복 요청이면 새로 뽑은 값 대신 처음 반영된 당첨금을 반환합니다.
+    """
+    payout = draw_lottery_payout(guild_id)
+    result = await run_wallet_mutation(
+        WalletMutation(
+            user_id=user_id,
+            guild_id=guild_id,
+            changes=[
+                (ResourceType.TALENT, -1, "spend"),
+                (ResourceType.VAULT, payout, "lottery_payout"),
+            ],
+            idempotency_key=idempotency_key,
+        )
+    )
+    if not result.ok:
+        return False, 0, result.shortfall[1] if result.shortfall else 0
+    return True, result.deltas.get(ResourceType.VAULT, payout), result.balances[ResourceType.VAULT]
+
+
+async def run_bulk_grant(
+    *,
+    guild_id: int,
+    user_ids: Sequence[int],
+    resource_type: ResourceType,
+    amount: int,
+    reason: str,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[Dict[int, int], bool]:
+    """
+    여러 사용자 일괄 지급. 대상 수와 관계없이 작업 큐 작업 1건 / 트랜잭션 1개로 처리합니다.
+    반환값: ({user_id: 지급 후 잔액}, 이미 반영된 요청이었는지)
+    지갑 행 잠금은 DB가 맡으므로 실행기의 지갑별 잠금은 거치지 않습니다.
+    """
+    raw = await submit_job(
+        "bulk_grant",
+        guild_id=guild_id,
+        user_ids=sorted(set(user_ids)),
+        resource_type=resource_type.value,
+        amount=amount,
+        reason=reason,
+        idempotency_key=idempotency_key,
+    )
+    balances = {int(user_id): int(balance) for user_id, balance in raw["balances"]}
+    # 워커 프로세스에서 커밋된 경우에도 이 프로세스의 구독자에게 알립니다.
+    for user_id in balances:
+        publish_wallet_change(guild_id=guild_id, user_id=user_id)
+    return balances, bool(raw["duplicate"])
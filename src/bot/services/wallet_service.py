@@ -1,46 +1,59 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple, Optional
+from typing import Any, Dict, List, Optional
 
-from bot.config.db_config import create_session
+from sqlalchemy.exc import IntegrityError
+
+from bot.config.db_config import create_read_session, create_session, retry_on_disconnect
 from bot.databases.resources_repo import (
-    get_wallet_balance,
-    deposit_resource,
-    withdraw_resource,
+    InsufficientBalance,
+    apply_resource_changes,
+    get_bulk_grant_logs,
+    get_idempotent_logs,
+    get_wallet,
+    grant_resource_bulk,
 )
 from bot.models.gm_resources import ResourceType
+from bot.services import metrics
+from bot.services.single_flight import SingleFlight
+from bot.services.tracing import traced
+from bot.services.wallet_events import publish_wallet_change, subscribe
 
 
+@traced()
+@retry_on_disconnect
 def get_member_balances(*, user_id: int, guild_id: int) -> Dict[str, int]:
     """
     주어진 사용자/길드의 주요 리소스 잔액을 모두 조회합니다.
     반환 키: vault, talent, lucky
     """
-    with create_session() as session:
-        vault_balance = get_wallet_balance(
-            session,
-            user_id=user_id,
-            guild_id=guild_id,
-            resource_type=ResourceType.VAULT,
-        )
-        talent_balance = get_wallet_balance(
-            session,
-            user_id=user_id,
-            guild_id=guild_id,
-            resource_type=ResourceType.TALENT,
-        )
-        lucky_balance = get_wallet_balance(
-            session,
-            user_id=user_id,
-            guild_id=guild_id,
-            resource_type=ResourceType.LUCKY_DICE,
-        )
-
-    return {
-        "vault": vault_balance,
-        "talent": talent_balance,
-        "lucky": lucky_balance,
-    }
+    # 읽기 전용 조회: 복제본으로 보낼 수 있으므로 지갑을 만들지 않고, 없으면 0으로 봅니다.
+    with create_read_session(guild_id=guild_id, user_id=user_id) as session:
+        balances = {}
+        for key, resource_type in (
+            ("vault", ResourceType.VAULT),
+            ("talent", ResourceType.TALENT),
+            ("lucky", ResourceType.LUCKY_DICE),
+        ):
+            wallet = get_wallet(session, user_id=user_id, guild_id=guild_id, resource_type=resource_type)
+            balances[key] = (wallet.amount or 0) if wallet is not None else 0
+
+    return balances
+
+
+# 같은 사용자의 잔고 조회가 몰릴 때(경마 종료 직후 등) DB 조회를 1회로 합칩니다.
+_balance_reads = SingleFlight("member_balances")
+
+
+@subscribe
+def _forget_balance_read(guild_id: int, user_id: int) -> None:
+    _balance_reads.forget((guild_id, user_id))
+
+
+async def load_member_balances(*, user_id: int, guild_id: int) -> Dict[str, int]:
+    """get_member_balances의 비동기 버전. 동시에 들어온 같은 사용자 조회는 한 번의 DB 조회 결과를 공유합니다."""
+    balances = await _balance_reads.do((guild_id, user_id), get_member_balances, user_id=user_id, guild_id=guild_id)
+    return dict(balances)
 
 
 # 재화명 별칭 매핑
@@ -74,68 +87,120 @@ def get_resource_display_name(resource_type: ResourceType) -> str:
     return _DISPLAY_NAME_MAP.get(resource_type, resource_type.name)
 
 
-def deposit_member_resource(
-    *, user_id: int, guild_id: int, resource_alias: str, amount: int
-) -> Tuple[bool, str, int]:
-    """
-    재화 문자열 별칭을 받아 해당 리소스에 amount를 입금하고 결과를 반환합니다.
-
-    반환값:
-      - (True, <표시이름>, <새 잔액>) 성공
-      - (False, <오류메시지>, 0) 실패
-    """
-    if amount <= 0:
-        return False, "입금 금액은 1 이상이어야 합니다.", 0
+def _all_mutations_keyed(*, mutations: List[Dict[str, Any]]) -> bool:
+    """커밋 직후 끊김으로 다시 실행해도 멱등 키가 중복 반영을 막아 주는 경우에만 재시도합니다."""
+    return all(mutation.get("idempotency_key") for mutation in mutations)
 
-    rtype = resolve_resource_type(resource_alias)
-    if rtype is None:
-        return False, "지원하지 않는 재화입니다. 사용 가능: 골드/달란트/럭키", 0
 
+@traced()
+@retry_on_disconnect(when=_all_mutations_keyed)
+def apply_wallet_batch(*, mutations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    여러 지갑 변경을 한 트랜잭션으로 묶어 커밋합니다. (그룹 커밋, bot.services.wallet_executor가 사용)
+    - mutation: {"user_id", "guild_id", "changes": [[resource_type 값, 증감량, 사유], ...], "idempotency_key": str | None}
+    - 변경마다 세이브포인트를 두어 잔액 부족인 변경만 되돌리고 나머지는 함께 커밋합니다.
+    - 이미 반영된 멱등 키의 변경은 다시 적용하지 않고 처음 반영했을 때의 결과를 돌려줍니다.
+    - 반환: 입력 순서대로 {"ok", "balances": {resource_type 값: 변경 후 잔액}, "deltas": {resource_type 값: 증감량},
+            "shortfall": {...} | None, "duplicate": bool}
+    작업 큐로 보낼 수 있도록 인자/반환값은 JSON 직렬화 가능한 값만 사용합니다.
+    """
+    results: List[Dict[str, Any]] = []
     with create_session() as session:
-        new_balance = deposit_resource(
-            session,
-            user_id=user_id,
-            guild_id=guild_id,
-            resource_type=rtype,
-            amount=amount,
-            reason="manual_deposit_command",
-        )
-
-    return True, get_resource_display_name(rtype), new_balance
-
-
-def withdraw_member_resource(
-    *, user_id: int, guild_id: int, resource_alias: str, amount: int
-) -> Tuple[bool, str, int]:
+        for mutation in mutations:
+            changes = [(ResourceType(rtype), int(delta), reason) for rtype, delta, reason in mutation["changes"]]
+            idempotency_key = mutation.get("idempotency_key")
+            try:
+                with session.begin_nested():
+                    balances = apply_resource_changes(
+                        session,
+                        user_id=mutation["user_id"],
+                        guild_id=mutation["guild_id"],
+                        changes=changes,
+                        idempotency_key=idempotency_key,
+                    )
+            except InsufficientBalance as exc:
+                results.append({
+                    "ok": False,
+                    "balances": {},
+                    "deltas": {},
+                    "shortfall": {"resource_type": exc.resource_type.value, "balance": exc.balance},
+                    "duplicate": False,
+                })
+                continue
+            except IntegrityError:
+                # insert-first: 멱등 키 중복이면 이미 반영된 변경입니다. (재전송/재시도된 요청)
+                logs = (
+                    get_idempotent_logs(session, idempotency_key=idempotency_key, leg_count=len(changes))
+                    if idempotency_key
+                    else []
+                )
+                if not logs:
+                    raise
+                metrics.incr("wallet_idempotent_replays")
+                results.append({
+                    "ok": True,
+                    "balances": {log.resource_type.value: int(log.balance_after or 0) for log in logs},
+                    "deltas": {log.resource_type.value: int(log.change_amount) for log in logs},
+                    "shortfall": None,
+                    "duplicate": True,
+                })
+                continue
+            results.append({
+                "ok": True,
+                "balances": {rtype.value: amount for rtype, amount in balances.items()},
+                "deltas": {rtype.value: delta for rtype, delta, _ in changes},
+                "shortfall": None,
+                "duplicate": False,
+            })
+        session.commit()
+
+    for mutation, result in zip(mutations, results):
+        if result["ok"]:
+            publish_wallet_change(guild_id=mutation["guild_id"], user_id=mutation["user_id"])
+    return results
+
+
+@traced()
+@retry_on_disconnect(when=lambda **kwargs: bool(kwargs.get("idempotency_key")))
+def apply_bulk_grant(
+    *,
+    guild_id: int,
+    user_ids: List[int],
+    resource_type: str,
+    amount: int,
+    reason: str,
+    idempotency_key: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    재화 문자열 별칭을 받아 해당 리소스에서 amount를 출금(차감)하고 결과를 반환합니다.
-
-    반환값:
-      - (True, <표시이름>, <새 잔액>) 성공
-      - (False, <오류메시지>, <현재 잔액>) 실패(잔액 부족 등)
+    여러 사용자에게 같은 양의 자원을 한 트랜잭션으로 지급합니다. (작업 큐의 bulk_grant 작업)
+    - 반환: {"balances": [[user_id, 지급 후 잔액], ...], "duplicate": bool}
+    - 이미 반영된 멱등 키면 다시 지급하지 않고 처음 지급했을 때의 잔액을 돌려줍니다.
+    작업 큐로 보낼 수 있도록 인자/반환값은 JSON 직렬화 가능한 값만 사용합니다.
     """
-    if amount <= 0:
-        return False, "출금 금액은 1 이상이어야 합니다.", 0
-
-    rtype = resolve_resource_type(resource_alias)
-    if rtype is None:
-        return False, "지원하지 않는 재화입니다. 사용 가능: 골드/달란트/럭키", 0
-
+    rtype = ResourceType(resource_type)
     with create_session() as session:
-        ok, remain = withdraw_resource(
-            session,
-            user_id=user_id,
-            guild_id=guild_id,
-            resource_type=rtype,
-            amount=amount,
-            reason="manual_withdraw_command",
-        )
-
-    if not ok:
-        label = get_resource_display_name(rtype)
-        return False, f"잔액 부족으로 출금 실패. 현재 {label} 잔액: {remain}", remain
-
-    # 성공 시 remain이 차감 후 잔액
-    return True, get_resource_display_name(rtype), remain
-
-
+        try:
+            balances = grant_resource_bulk(
+                session,
+                guild_id=guild_id,
+                user_ids=user_ids,
+                resource_type=rtype,
+                amount=amount,
+                reason=reason,
+                idempotency_key=idempotency_key,
+            )
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            logs = get_bulk_grant_logs(session, idempotency_key=idempotency_key, user_ids=user_ids) if idempotency_key else []
+            if not logs:
+                raise
+            metrics.incr("wallet_idempotent_replays")
+            return {
+                "balances": [[log.user_id, int(log.balance_after or 0)] for log in logs],
+                "duplicate": True,
+            }
+
+    for user_id in balances:
+        publish_wallet_change(guild_id=guild_id, user_id=user_id)
+    return {"balances": [[user_id, balance] for user_id, balance in balances.items()], "duplicate": False}
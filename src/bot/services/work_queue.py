@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+from bot.config import log_config
+from bot.config.bot_config import (
+    WORK_QUEUE_MODE,
+    WORK_QUEUE_WORKERS,
+    WORK_QUEUE_REDIS_URL,
+    WORK_QUEUE_NAME,
+    WORK_QUEUE_TIMEOUT_SEC,
+)
+from bot.services import metrics
+from bot.services.jobs import run_job
+from bot.services.wallet_events import publish_wallet_change
+
+
+logger = log_config.setup_logger()
+
+
+class WorkQueueError(RuntimeError):
+    """워커에서 작업이 실패했거나 응답이 시간 안에 오지 않았을 때 발생합니다."""
+
+
+class WorkQueueResultUnknown(WorkQueueError):
+    """
+    워커가 이미 실행을 시작한 작업의 응답이 오지 않았을 때 발생합니다.
+    실패로 단정할 수 없으므로(커밋되었을 수 있음) 호출 측은 '결과 미확인'으로 안내해야 합니다.
+    """
+
+
+# 작업별 상태 키(claim/cancel) 보존 시간(초)
+JOB_STATE_TTL_SEC = 3600
+
+
+def job_state_key(queue_name: str, job_id: str) -> str:
+    """게이트웨이의 취소와 워커의 실행 시작 중 먼저 SET NX에 성공한 쪽이 작업의 운명을 정합니다."""
+    return f"{queue_name}:state:{job_id}"
+
+
+class InlineWorkQueue:
+    """기본 모드: 게이트웨이 프로세스에서 바로 실행합니다. (기존 동작과 동일)"""
+
+    async def submit(self, job: str, **kwargs) -> Any:
+        return run_job(job, kwargs)
+
+    async def close(self) -> None:
+        pass
+
+
+class ProcessPoolWorkQueue:
+    """
+    내장 브로커 모드: 로컬 프로세스 풀에 작업을 보냅니다.
+    워커는 spawn으로 시작하므로 게이트웨이의 DB 연결/스레드를 물려받지 않고 각자 엔진을 만듭니다.
+    """
+
+    def __init__(self, max_workers: int):
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"작업 큐: 프로세스 풀 모드 (워커 {max_workers}개)")
+
+    async def submit(self, job: str, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, run_job, job, kwargs)
+
+    async def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RedisWorkQueue:
+    """
+    분리 배포 모드: Redis 호환 브로커의 리스트를 큐로 사용합니다.
+    - 게이트웨이: 작업을 LPUSH하고 작업별 응답 키를 BLPOP으로 대기
+    - 워커(python -m bot.worker): 큐를 BRPOP으로 꺼내 실행 후 응답 키에 결과를 LPUSH
+    워커 컨테이너 수를 늘리는 것만으로 게이트웨이와 독립적으로 확장할 수 있습니다.
+
+    응답 대기 시간이 지나면 작업이 큐에 남아 있다가 나중에 실행되어, 실패 안내 후 쓰기가 반영되는 일이 생길 수 있습니다.
+    이를 막기 위해
+    - 작업에 마감 시각(deadline)을 넣어 워커가 마감이 지난 작업은 실행하지 않고 버립니다.
+    - 시간 초과 시 게이트웨이는 상태 키를 'cancelled'로 SET NX 합니다. 워커는 실행 전에 'running'으로 SET NX 하므로
+      둘 중 하나만 성공합니다. 취소에 성공하면 작업은 절대 실행되지 않으므로 실패로 안내해도 됩니다.
+      취소에 실패하면(이미 실행 중) 한 번 더 응답을 기다리고, 그래도 없으면 WorkQueueResultUnknown을 발생시킵니다.
+    """
+
+    def __init__(self, url: str, queue_name: str, timeout_sec: int):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError(
+                "WORK_QUEUE_MODE=redis 사용 시 redis 패키지가 필요합니다. (pip install 'duode-tactical-support[queue]')"
+            ) from exc
+        self._redis = redis_asyncio.from_url(url)
+        self._queue_name = queue_name
+        self._timeout_sec = timeout_sec
+        logger.info(f"작업 큐: Redis 모드 ({queue_name})")
+
+    async def submit(self, job: str, **kwargs) -> Any:
+        job_id = uuid.uuid4().hex
+        reply_key = f"{self._queue_name}:reply:{job_id}"
+        payload = json.dumps(
+            {
+                "id": job_id,
+                "job": job,
+                "kwargs": kwargs,
+                "reply_to": reply_key,
+                "deadline": time.time() + self._timeout_sec,
+            }
+        )
+        await self._redis.lpush(self._queue_name, payload)
+
+        reply = await self._redis.blpop([reply_key], timeout=self._timeout_sec)
+        if reply is None:
+            state_key = job_state_key(self._queue_name, job_id)
+            if await self._redis.set(state_key, "cancelled", nx=True, ex=JOB_STATE_TTL_SEC):
+                metrics.incr("jobs_cancelled", job=job)
+                raise WorkQueueError(f"작업 응답 시간 초과: {job} ({self._timeout_sec}s)")
+            # 워커가 이미 실행을 시작했으므로 결과를 조금 더 기다립니다.
+            reply = await self._redis.blpop([reply_key], timeout=self._timeout_sec)
+            if reply is None:
+                metrics.incr("jobs_result_unknown", job=job)
+                raise WorkQueueResultUnknown(f"작업이 실행 중이지만 결과를 확인하지 못했습니다: {job}")
+        result = json.loads(reply[1])
+        if not result.get("ok"):
+            raise WorkQueueError(f"작업 실패: {job}: {result.get('error')}")
+        return result.get("result")
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+_queue: Optional[InlineWorkQueue | ProcessPoolWorkQueue | RedisWorkQueue] = None
+
+
+def get_work_queue():
+    global _queue
+    if _queue is None:
+        if WORK_QUEUE_MODE == "process":
+            _queue = ProcessPoolWorkQueue(WORK_QUEUE_WORKERS)
+        elif WORK_QUEUE_MODE == "redis":
+            _queue = RedisWorkQueue(WORK_QUEUE_REDIS_URL, WORK_QUEUE_NAME, WORK_QUEUE_TIMEOUT_SEC)
+        else:
+            _queue = InlineWorkQueue()
+    return _queue
+
+
+async def close_work_queue() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.close()
+        _queue = None
+
+
+async def submit_job(job: str, **kwargs) -> Any:
+    """설정된 모드의 작업 큐로 DB 작업을 보내고 결과를 기다립니다."""
+    metrics.incr("jobs_submitted", job=job, mode=WORK_QUEUE_MODE)
+    try:
+        return await get_work_queue().submit(job, **kwargs)
+    finally:
+        # 워커 프로세스에서 쓴 변경도 이 프로세스의 구독자(읽기 고정, 조회 합류 해제 등)에 알립니다.
+        if "guild_id" in kwargs and "user_id" in kwargs:
+            publish_wallet_change(guild_id=kwargs["guild_id"], user_id=kwargs["user_id"])
@@ -0,0 +1,63 @@
+import json
+import time
+
+from bot.config import log_config
+from bot.config.bot_config import WORK_QUEUE_REDIS_URL, WORK_QUEUE_NAME
+from bot.config.db_config import ping_db
+from bot.services.db_telemetry import install_db_telemetry
+from bot.services.jobs import run_job
+from bot.services.work_queue import JOB_STATE_TTL_SEC, job_state_key
+
+
+logger = log_config.setup_logger()
+
+# 응답 키 보존 시간(초). 게이트웨이가 시간 초과로 떠난 응답이 쌓이지 않도록 합니다.
+_REPLY_TTL_SEC = 60
+
+
+def main() -> None:
+    """
+    Redis 작업 큐 워커. 게이트웨이(WORK_QUEUE_MODE=redis)가 넣은 작업을 하나씩 실행하고 결과를 돌려줍니다.
+    CPU 코어 수만큼 컨테이너/프로세스를 늘려 확장합니다.
+    """
+    import redis
+
+    client = redis.Redis.from_url(WORK_QUEUE_REDIS_URL)
+    install_db_telemetry()
+    if not ping_db():
+        logger.warning("DB 연결 확인 실패. 환경변수 확인 필요")
+    logger.info(f"워커 시작: {WORK_QUEUE_NAME}")
+
+    while True:
+        item = client.brpop([WORK_QUEUE_NAME], timeout=5)
+        if item is None:
+            continue
+        request = json.loads(item[1])
+        # 게이트웨이가 이미 시간 초과로 포기한 작업은 실행하지 않습니다. (실패 안내 후 쓰기가 반영되는 것 방지)
+        deadline = request.get("deadline")
+        if deadline is not None and time.time() >= deadline:
+            logger.warning(f"마감이 지난 작업을 버립니다: {request.get('job')}")
+            continue
+        if request.get("id") and not client.set(
+            job_state_key(WORK_QUEUE_NAME, request["id"]), "running", nx=True, ex=JOB_STATE_TTL_SEC
+        ):
+            logger.warning(f"취소된 작업을 버립니다: {request.get('job')}")
+            continue
+        try:
+            result = run_job(request["job"], request.get("kwargs", {}))
+            reply = {"ok": True, "result": result}
+        except Exception as exc:
+            logger.error(f"작업 실행 중 오류: {request.get('job')}: {exc}")
+            reply = {"ok": False, "error": str(exc)}
+
+        reply_key = request["reply_to"]
+        pipe = client.pipeline()
+        pipe.lpush(reply_key, json.dumps(reply))
+        pipe.expire(reply_key, _REPLY_TTL_SEC)
+        pipe.execute()
+
+
+if __name__ == "__main__":
+    main()
+
+# python -m bot.worker